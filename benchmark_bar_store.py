@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compare the columnar memory-mapped bar store against pickled DataFrames.
+
+Writes 20 years of synthetic daily bars both ways into a temporary directory
+and times a full load, a Close-only load, and a one-year range read.
+Runs offline; no network access is needed.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pickle
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from stock_analyzer.data.columnar_store import read_frame, write_frame
+
+YEARS = 20
+REPEATS = 200
+
+
+def make_bars(years=YEARS):
+    """Synthetic daily OHLCV bars with the columns Ticker.history returns."""
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=years * 252, tz='America/New_York')
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.002, len(index))),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 5_000_000, len(index)).astype(float),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0,
+    }, index=index)
+
+
+def timed(fn, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    df = make_bars()
+    range_start = df.index[-252].strftime("%Y-%m-%d")
+    range_end = (df.index[-1] + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path = os.path.join(tmp, 'bars.pkl')
+        with open(pickle_path, 'wb') as f:
+            pickle.dump(df, f)
+        table_dir = os.path.join(tmp, 'bars')
+        write_frame(table_dir, df)
+
+        def load_pickle():
+            with open(pickle_path, 'rb') as f:
+                return pickle.load(f)
+
+        def pickle_close():
+            return load_pickle()['Close'].sum()
+
+        def pickle_range():
+            bars = load_pickle()
+            return bars[(bars.index >= range_start) & (bars.index < range_end)]
+
+        results = [
+            ("Full load", timed(load_pickle), timed(lambda: read_frame(table_dir))),
+            ("Close column only", timed(pickle_close),
+             timed(lambda: read_frame(table_dir, columns=['Close'])['Close'].sum())),
+            ("Last 1Y range", timed(pickle_range), timed(lambda: read_frame(table_dir, range_start, range_end))),
+        ]
+
+    print(f"{len(df)} daily bars ({YEARS} years), mean of {REPEATS} runs")
+    print(f"{'Operation':<20}{'pickle (ms)':>14}{'columnar (ms)':>16}{'speedup':>10}")
+    for name, pickle_ms, columnar_ms in results:
+        print(f"{name:<20}{pickle_ms:>14.3f}{columnar_ms:>16.3f}{pickle_ms / columnar_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Backfill daily history for a whole universe of symbols into the bar store.
+
+    python bulk_download.py --start 2005-01-01                 # every exchange listing
+    python bulk_download.py --start 2005-01-01 --exchange NYSE NASDAQ
+    python bulk_download.py --start 2005-01-01 --symbols-file universe.txt
+
+Progress is checkpointed to a journal after every batch. Re-running the same
+command after a crash or interruption resumes where it stopped.
+Set "persistent_cache": true in config.json so the app keeps the data on exit.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import datetime
+from stock_analyzer.data.bulk_download import get_journal_path, read_journal, run_bulk_download
+from stock_analyzer.data.stock_fetcher import BATCH_SIZE, get_exchange_stocks
+
+
+def load_universe(args):
+    if args.symbols:
+        return args.symbols
+    if args.symbols_file:
+        with open(args.symbols_file, 'r') as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    symbols = []
+    for exchange in args.exchange:
+        print(f"Getting {exchange} stocks...")
+        symbols.extend(get_exchange_stocks(exchange))
+    return symbols
+
+
+def print_progress(stats):
+    finished = stats['skipped'] + stats['done'] + stats['failed']
+    print(f"{finished}/{stats['total']} symbols ({stats['failed']} failed), {stats['bars']} bars, "
+          f"{stats['symbols_per_sec']:.1f} symbols/s, {stats['bars_per_sec']:.0f} bars/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable bulk download of daily bars into the bar store.")
+    parser.add_argument('symbols', nargs='*', help="symbols to download (default: exchange listings)")
+    parser.add_argument('--symbols-file', help="file with one symbol per line")
+    parser.add_argument('--exchange', nargs='+', default=["NYSE", "NASDAQ", "LSE", "TSE", "NSE"])
+    parser.add_argument('--start', help="first date, YYYY-MM-DD (default: the journal's, else 10 years ago)")
+    parser.add_argument('--end', help="exclusive last date (default: the journal's, else tomorrow)")
+    parser.add_argument('--journal', default=None, help="checkpoint journal path")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--restart', action='store_true', help="ignore the journal and start over")
+    args = parser.parse_args()
+
+    journal_path = args.journal or get_journal_path()
+    header, _ = (None, None) if args.restart else read_journal(journal_path)
+    today = datetime.date.today()
+    start = args.start or (header or {}).get('start') or (today - datetime.timedelta(days=3652)).strftime("%Y-%m-%d")
+    end = args.end or (header or {}).get('end') or (today + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    if header is not None:
+        print(f"Resuming from {journal_path}")
+
+    symbols = load_universe(args)
+    try:
+        stats = run_bulk_download(symbols, start, end, journal_path, batch_size=args.batch_size,
+                                  restart=args.restart, progress=print_progress)
+    except ValueError as e:
+        print(f"Bulk download failed: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume")
+        sys.exit(130)
+    if stats['evicted']:
+        print(f"{stats['evicted']} symbols the journal had as done were no longer cached and were downloaded again")
+    print(f"Finished in {stats['elapsed']:.1f}s: {stats['done']} downloaded, {stats['skipped']} already done, "
+          f"{stats['failed']} failed, {stats['bars']} bars "
+          f"({stats['symbols_per_sec']:.1f} symbols/s, {stats['bars_per_sec']:.0f} bars/s)")
+
+
+if __name__ == "__main__":
+    main()
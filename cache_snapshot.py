@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Export the bar store and metadata cache to a snapshot bundle, or import one.
+
+    python cache_snapshot.py export universe.tar.gz [SYMBOL ...]
+    python cache_snapshot.py import universe.tar.gz
+
+Importing merges into the existing cache, so it is safe to run on a machine
+that already has data and while the app is running.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import time
+from stock_analyzer.data.snapshot import export_snapshot, import_snapshot
+from stock_analyzer.data.stock_fetcher import normalize_symbol
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ship pre-warmed cache data between machines.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help="write the cache to a bundle")
+    export_parser.add_argument('bundle')
+    export_parser.add_argument('symbols', nargs='*', help="only these symbols (default: everything cached)")
+    import_parser = subparsers.add_parser('import', help="merge a bundle into the cache")
+    import_parser.add_argument('bundle')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'export':
+        symbols = [normalize_symbol(symbol) for symbol in args.symbols] or None
+        summary = export_snapshot(args.bundle, symbols)
+        print(f"Exported {summary['bars']} bar tables and {summary['metadata']} metadata entries "
+              f"to {args.bundle} ({summary['bytes'] / (1024 * 1024):.1f} MB) "
+              f"in {time.perf_counter() - start:.1f}s")
+    else:
+        try:
+            summary = import_snapshot(args.bundle)
+        except (ValueError, OSError) as e:
+            print(f"Import failed: {e}")
+            sys.exit(1)
+        print(f"Imported {summary['bars']} bar tables and {summary['metadata']} metadata entries "
+              f"from {args.bundle} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
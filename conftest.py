@@ -0,0 +1,43 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point the cache at an empty temporary directory for one test."""
+    from stock_analyzer.data import cache_manager, validation_cache
+    from stock_analyzer.data.bar_store import clear_memory_tier
+    from stock_analyzer.data.metadata_cache import clear_metadata
+    cache_manager._close_manifest()
+    clear_memory_tier()
+    clear_metadata()
+    validation_cache._results = None
+    monkeypatch.setenv('STOCK_ANALYZER_CACHE_DIR', str(tmp_path / 'cache'))
+    yield cache_manager.get_cache_dir()
+    cache_manager._close_manifest()
+    clear_memory_tier()
+    clear_metadata()
+    validation_cache._results = None
+
+
+@pytest.fixture
+def fake_yahoo(cache_dir, tmp_path):
+    """Route yfinance to a local fake_yahoo server; yields the server (its .settings can be changed)."""
+    import yfinance as yf
+    from stock_analyzer.data.fake_yahoo import start_server
+    from stock_analyzer.data.fetch_engine import FetchEngine, set_engine
+    from stock_analyzer.data.http_session import set_upstream
+    from stock_analyzer.data.providers import YFinanceProvider, set_provider
+    yf.set_tz_cache_location(str(tmp_path / 'yfinance'))
+    server = start_server()
+    set_upstream(server.url)
+    set_engine(FetchEngine(rate_per_sec=200, timeout=10))
+    set_provider(YFinanceProvider())
+    yield server
+    server.shutdown()
+    set_upstream(None)
+    set_provider(None)
+    set_engine(None)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Build and query the fundamentals snapshot from the command line.
+
+    python fundamentals.py refresh --exchange NYSE NASDAQ      # or: refresh AAPL MSFT ...
+    python fundamentals.py query --filter sector==Technology --filter "pe_ratio<15" --sort market_cap --limit 20
+    python fundamentals.py group sector market_cap median
+
+refresh fetches every symbol again unless --max-age-hours allows reusing
+recently cached metadata. query and group only read the stored snapshot.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import datetime
+import re
+import time
+from stock_analyzer.data.fundamentals import NUMERIC_COLUMNS, load_fundamentals, read_snapshot_meta, refresh_fundamentals
+from stock_analyzer.data.stock_fetcher import get_exchange_stocks
+
+_FILTER_PATTERN = re.compile(r'^\s*(\w+)\s*(==|!=|<=|>=|<|>)\s*(.+?)\s*$')
+
+
+def parse_filter(text):
+    """Turn 'pe_ratio<15' into ('pe_ratio', '<', 15.0); 'a==x,y' matches any of x and y."""
+    match = _FILTER_PATTERN.match(text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Invalid filter {text!r}, expected e.g. sector==Technology or pe_ratio<15")
+    column, op, value = match.groups()
+    values = value.split(',')
+    if column in NUMERIC_COLUMNS:
+        try:
+            values = [float(v) for v in values]
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"{column} needs a number, not {value!r}")
+    if len(values) > 1:
+        if op != '==':
+            raise argparse.ArgumentTypeError(f"Only == takes a list of values: {text!r}")
+        return column, 'in', values
+    return column, op, values[0]
+
+
+def load_universe(args):
+    symbols = list(args.symbols)
+    for exchange in args.exchange or []:
+        print(f"Getting {exchange} stocks...")
+        symbols.extend(get_exchange_stocks(exchange))
+    return symbols
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh and query the fundamentals snapshot.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    refresh_parser = subparsers.add_parser('refresh', help="fetch symbols into the snapshot")
+    refresh_parser.add_argument('symbols', nargs='*', help="symbols to refresh")
+    refresh_parser.add_argument('--exchange', nargs='+', help="also refresh these exchanges' listings")
+    refresh_parser.add_argument('--max-age-hours', type=float, default=0,
+                                help="reuse cached metadata younger than this (default: fetch everything)")
+    query_parser = subparsers.add_parser('query', help="list matching symbols")
+    query_parser.add_argument('--filter', type=parse_filter, action='append', default=[],
+                              help="e.g. sector==Technology, pe_ratio<15 or exchange==NYSE,NASDAQ")
+    query_parser.add_argument('--sort', help="numeric column to sort by")
+    query_parser.add_argument('--ascending', action='store_true', help="sort smallest first (default: largest)")
+    query_parser.add_argument('--limit', type=int, default=50)
+    group_parser = subparsers.add_parser('group', help="aggregate a numeric column per category")
+    group_parser.add_argument('column', help="text column to group by, e.g. sector")
+    group_parser.add_argument('value', help="numeric column to aggregate, e.g. market_cap")
+    group_parser.add_argument('how', nargs='?', default='sum', help="count, sum, mean, median, min or max")
+    group_parser.add_argument('--filter', type=parse_filter, action='append', default=[])
+    args = parser.parse_args()
+
+    if args.command == 'refresh':
+        symbols = load_universe(args)
+        if not symbols:
+            parser.error("give symbols or --exchange")
+        start = time.perf_counter()
+        summary = refresh_fundamentals(symbols, max_age=args.max_age_hours * 3600)
+        print(f"Refreshed {summary['refreshed']} symbols ({summary['failed']} failed) in "
+              f"{time.perf_counter() - start:.1f}s; the snapshot has {summary['rows']} rows")
+        return
+
+    snapshot = load_fundamentals()
+    if snapshot is None:
+        print("No fundamentals snapshot yet; run 'python fundamentals.py refresh' first")
+        sys.exit(1)
+    refreshed = datetime.datetime.fromtimestamp(read_snapshot_meta()['refreshed_at'])
+    print(f"{len(snapshot)} symbols, last refreshed {refreshed:%Y-%m-%d %H:%M}")
+    try:
+        if args.command == 'query':
+            result = snapshot.query(args.filter, sort_by=args.sort, descending=not args.ascending, limit=args.limit)
+        else:
+            result = snapshot.group_by(args.column, args.value, args.how, filters=args.filter)
+    except ValueError as e:
+        print(f"Query failed: {e}")
+        sys.exit(1)
+    print(result.to_string())
+
+
+if __name__ == "__main__":
+    main()
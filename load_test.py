@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Measure the fetch pipeline against a local fake Yahoo Finance server.
+
+Starts stock_analyzer.data.fake_yahoo in-process (or uses --server), routes
+every yfinance request to it and fetches a synthetic universe through
+stock_fetcher, with an empty temporary cache so every symbol goes upstream:
+
+    python load_test.py --symbols 200 --clients 16 --latency-ms 80 --jitter-ms 60 \
+        --error-rate 0.02 --max-rps 40
+    python load_test.py --mode bulk --symbols 1000 --currency EUR
+
+Reports end-to-end throughput and p50/p95/p99 latency per symbol, the fetch
+engine's per-request latency, and what the server answered. With --max-rps,
+the rate limiter must have converged: the run fails (exit status 1) when more
+than --max-throttled of the second half's requests were throttled.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+import concurrent.futures
+import datetime
+import tempfile
+import time
+
+
+def ms(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds is not None else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and latency test of the fetch layer against a fake Yahoo.")
+    parser.add_argument('--mode', choices=['single', 'bulk'], default='single',
+                        help="single: one analysis-style fetch per symbol; bulk: fetch_many batches")
+    parser.add_argument('--symbols', type=int, default=100, help="size of the synthetic universe")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent callers in single mode")
+    parser.add_argument('--days', type=int, default=365, help="days of history per symbol")
+    parser.add_argument('--currency', default='USD', help="display currency (non-USD also fetches FX)")
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=25.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--max-rps', type=float, default=0.0, help="server answers 429 beyond this rate")
+    parser.add_argument('--server', help="use a fake_yahoo server already running at this URL")
+    parser.add_argument('--fetch-concurrency', type=int, default=8)
+    parser.add_argument('--fetch-rate', type=float, default=50.0, help="fetch engine requests per second")
+    parser.add_argument('--timeout', type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument('--hedge', action='store_true', help="enable hedged requests")
+    parser.add_argument('--max-throttled', type=float, default=0.05,
+                        help="with --max-rps, the largest share of second-half requests that may be throttled")
+    args = parser.parse_args()
+
+    # Keep the user's cache and yfinance's timezone cache out of it
+    work_dir = tempfile.mkdtemp(prefix='stock-analyzer-load-')
+    os.environ['STOCK_ANALYZER_CACHE_DIR'] = os.path.join(work_dir, 'cache')
+
+    import yfinance as yf
+    yf.set_tz_cache_location(os.path.join(work_dir, 'yfinance'))
+    from stock_analyzer.data.fake_yahoo import UpstreamSettings, start_server
+    from stock_analyzer.data.fetch_engine import FetchEngine, LatencyTracker, set_engine
+    from stock_analyzer.data.http_session import get_connection_stats, set_upstream
+    from stock_analyzer.data.providers import YFinanceProvider, set_provider
+    from stock_analyzer.data.fx_rates import convert_ohlc
+    from stock_analyzer.data.stock_fetcher import BATCH_SIZE, fetch_many, fetch_native_data
+
+    server = None
+    if args.server:
+        set_upstream(args.server)
+    else:
+        settings = UpstreamSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.max_rps)
+        server = start_server(settings=settings)
+        set_upstream(server.url)
+    engine = FetchEngine(concurrency=args.fetch_concurrency, rate_per_sec=args.fetch_rate,
+                         timeout=args.timeout, hedge=args.hedge)
+    set_engine(engine)
+    set_provider(YFinanceProvider())
+
+    symbols = [f"LT{i:05d}" for i in range(args.symbols)]
+    end = datetime.date.today() + datetime.timedelta(days=1)
+    start_str = (end - datetime.timedelta(days=args.days)).strftime("%Y-%m-%d")
+    end_str = end.strftime("%Y-%m-%d")
+
+    latency = LatencyTracker(window=max(1, len(symbols)))
+    failures = 0
+    bars = 0
+    # Server counts once half the universe is done, to judge the second half alone
+    halfway = None
+    started = time.perf_counter()
+    if args.mode == 'single':
+        def fetch_one(symbol):
+            t0 = time.perf_counter()
+            df, native_currency = fetch_native_data(symbol, start_str, end_str)
+            if df is not None:
+                df = convert_ohlc(df, native_currency, args.currency)
+            return df, time.perf_counter() - t0
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.clients) as pool:
+            for done, future in enumerate(concurrent.futures.as_completed([pool.submit(fetch_one, s)
+                                                                          for s in symbols])):
+                if server is not None and halfway is None and done >= len(symbols) // 2:
+                    halfway = server.stats.snapshot()
+                try:
+                    df, elapsed = future.result()
+                except Exception as e:
+                    print(f"Fetch failed: {e}")
+                    failures += 1
+                    continue
+                latency.record(elapsed)
+                if df is None or df.empty:
+                    failures += 1
+                else:
+                    bars += len(df)
+    else:
+        # At least two fetch_many calls, so the second half is measured on its own
+        chunk_size = min(BATCH_SIZE * args.fetch_concurrency, max(1, (len(symbols) + 1) // 2))
+        for i in range(0, len(symbols), chunk_size):
+            chunk = symbols[i:i + chunk_size]
+            t0 = time.perf_counter()
+            data, errors = fetch_many(chunk, start_str, end_str, currency=args.currency)
+            latency.record(time.perf_counter() - t0)
+            failures += len(errors)
+            bars += sum(len(df) for df in data.values())
+            if server is not None and halfway is None and i + len(chunk) >= len(symbols) // 2:
+                halfway = server.stats.snapshot()
+    elapsed = time.perf_counter() - started
+
+    label = "per symbol" if args.mode == 'single' else "per fetch_many call"
+    print(f"\n{len(symbols)} symbols in {elapsed:.2f}s: {(len(symbols) - failures) / elapsed:.1f} symbols/s, "
+          f"{bars / elapsed:.0f} bars/s, {failures} failed")
+    print(f"End-to-end latency {label}: p50 {ms(latency.percentile(50))}  p95 {ms(latency.percentile(95))}  "
+          f"p99 {ms(latency.percentile(99))}  max {ms(latency.percentile(100))}")
+    stats = engine.latency_stats()
+    print(f"Upstream requests (fetch engine): p50 {ms(stats['p50'])}  p95 {ms(stats['p95'])}  "
+          f"p99 {ms(stats['p99'])}  hedged {stats['hedges_fired']} (won {stats['hedges_won']})  "
+          f"timeouts {stats['timeouts']}  final rate {engine.rate:.1f}/s")
+    connections = get_connection_stats()
+    print(f"HTTP: {connections['requests']} requests, {connections['opened']} connections opened, "
+          f"{connections['reuse_ratio']:.0%} reused")
+    if server is not None:
+        served = server.stats.snapshot()
+        print(f"Server: {served['requests']} requests, {served['errors']} errors, {served['throttled']} throttled")
+        server.shutdown()
+        if args.max_rps and halfway is not None:
+            requests = served['requests'] - halfway['requests']
+            throttled = served['throttled'] - halfway['throttled']
+            share = throttled / requests if requests else 0.0
+            print(f"Second half: {throttled} of {requests} requests throttled ({share:.1%})")
+            if share > args.max_throttled:
+                print(f"Rate limiter did not converge: more than {args.max_throttled:.0%} throttled")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,14 @@ from stock_analyzer.analysis.technical_indicators import (
     simple_moving_average, exponential_moving_average, relative_strength_index,
     macd, bollinger_bands, support_resistance_levels, price_momentum
 )
+from stock_analyzer.data.resample import resample_ohlcv
+
+# Short timeframes analyzed on intraday bars when those are available:
+# timeframe -> (trading sessions covered, bar size to resample to or None)
+INTRADAY_TIMEFRAMES = {'1D': (1, None), '5D': (5, '30min')}
+
+# Long-term recommendations also analyze the whole range on weekly or monthly bars
+LONG_TERM_TIMEFRAME = 'Range'
 
 class StockRecommendation:
     def __init__(self, symbol, current_price, recommendation, confidence, reasoning, entry_price, exit_price, stop_loss):
@@ -169,10 +177,13 @@ def calculate_signal_strength(analysis):
     
     return max(-100, min(100, score))
 
-def generate_recommendation(symbol, df, timeframes_data, timeframe_type="short_term"):
+def generate_recommendation(symbol, df, timeframes_data, timeframe_type="short_term", long_term_bars=None):
     """
     Generate professional buy/sell recommendation based on multiple timeframes.
     Uses institutional-grade analysis with proper risk management.
+    long_term_bars, e.g. weekly or monthly bars over the whole range, are
+    analyzed as one more timeframe for long-term recommendations and used for
+    the long-term price targets in place of df's daily bars.
     """
     if df is None or df.empty:
         return None
@@ -188,6 +199,11 @@ def generate_recommendation(symbol, df, timeframes_data, timeframe_type="short_t
     else:
         # Long-term investing (months to years)
         timeframe_weights = {'1D': 0.10, '5D': 0.20, '15D': 0.30, '1M': 0.40}
+        if long_term_bars is not None and len(long_term_bars) >= 3:
+            # The trend over the whole range carries the most weight
+            timeframe_weights = {'1D': 0.05, '5D': 0.10, '15D': 0.20, '1M': 0.25, LONG_TERM_TIMEFRAME: 0.40}
+            timeframes_data = dict(timeframes_data)
+            timeframes_data[LONG_TERM_TIMEFRAME] = analyze_timeframe(long_term_bars, LONG_TERM_TIMEFRAME)
         buy_threshold = 5     # Higher threshold for long-term conviction
         sell_threshold = -5   # Higher threshold for long-term conviction
     
@@ -227,7 +243,9 @@ def generate_recommendation(symbol, df, timeframes_data, timeframe_type="short_t
         confidence = max(40, 50 - abs(total_score))
     
     reasoning = generate_professional_reasoning(timeframes_data, total_score, timeframe_scores)
-    entry_price, exit_price, stop_loss = calculate_professional_price_targets(df, recommendation, total_score, timeframe_type)
+    volatility_bars = long_term_bars if timeframe_type != "short_term" else None
+    entry_price, exit_price, stop_loss = calculate_professional_price_targets(
+        df, recommendation, total_score, timeframe_type, volatility_bars)
     
     return StockRecommendation(
         symbol=symbol,
@@ -309,10 +327,21 @@ def generate_professional_reasoning(timeframes_data, total_score, timeframe_scor
     
     return " | ".join(reasoning_parts)
 
-def calculate_professional_price_targets(df, recommendation, signal_strength, timeframe_type="short_term"):
+def _periods_per_year(df):
+    """Bars per year implied by the spacing of df's bars: daily, weekly or monthly."""
+    if len(df) < 2:
+        return 252
+    spacing = pd.Series(df.index).diff().median().days
+    if spacing <= 3:
+        return 252
+    return 52 if spacing <= 10 else 12
+
+def calculate_professional_price_targets(df, recommendation, signal_strength, timeframe_type="short_term",
+                                         volatility_bars=None):
     """
     Calculate professional entry, exit, and stop loss prices.
     ALWAYS based on buying the stock at entry price, regardless of recommendation.
+    Volatility is measured on volatility_bars when given, else on df.
     """
     if df is None or df.empty:
         return None, None, None
@@ -320,8 +349,10 @@ def calculate_professional_price_targets(df, recommendation, signal_strength, ti
     current_price = df['Close'].iloc[-1]
     
     # Calculate volatility for dynamic targets
-    returns = df['Close'].pct_change().dropna()
-    volatility = returns.std() * np.sqrt(252)  # Annualized volatility
+    if volatility_bars is None or len(volatility_bars) < 3:
+        volatility_bars = df
+    returns = volatility_bars['Close'].pct_change().dropna()
+    volatility = returns.std() * np.sqrt(_periods_per_year(volatility_bars))  # Annualized volatility
     
     # Professional risk-reward ratios
     if timeframe_type == "short_term":
@@ -356,18 +387,36 @@ def calculate_professional_price_targets(df, recommendation, signal_strength, ti
             round(exit_price, 2) if exit_price is not None else None,
             round(stop_loss, 2) if stop_loss is not None else None)
 
-def get_timeframe_data(df, timeframe):
+def _last_sessions(df, sessions):
+    """Bars of the last `sessions` trading days in df."""
+    days = pd.DatetimeIndex(df.index).normalize()
+    session_days = days.unique()
+    return df[days >= session_days[-min(sessions, len(session_days))]]
+
+def get_timeframe_data(df, timeframe, intraday=None):
     """
     Get data for a specific timeframe from the main dataframe.
+    With intraday bars for the same sessions, 1D and 5D are taken from those
+    (5D resampled to 30-minute bars) instead of a handful of daily bars.
     """
     if df is None or df.empty:
         return None
     
     end_date = df.index[-1]
     
+    if timeframe in INTRADAY_TIMEFRAMES and intraday is not None and not intraday.empty:
+        sessions, rule = INTRADAY_TIMEFRAMES[timeframe]
+        # Only when the intraday bars reach the same session as the daily ones
+        if intraday.index[-1].date() == end_date.date():
+            timeframe_df = _last_sessions(intraday, sessions)
+            if rule is not None:
+                timeframe_df = resample_ohlcv(timeframe_df, rule)
+            if len(timeframe_df) >= 2:
+                return timeframe_df
+    
     if timeframe == "1D":
-        # Last trading day - get just the last day's data
-        timeframe_df = df.tail(1)  # Get the last row
+        # Last trading day, measured from the previous session's close
+        timeframe_df = df.tail(2)
     elif timeframe == "5D":
         # Last 5 trading days
         start_date = end_date - pd.Timedelta(days=7)  # Account for weekends
@@ -0,0 +1,572 @@
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
+import datetime
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from stock_analyzer.data.cache_backends import get_cache_backend
+from stock_analyzer.data.cache_manager import cache_lock, get_cache_dir, record_cache_entry, touch_cache_entry
+from stock_analyzer.data.columnar_store import (
+    BAR_COLUMNS, count_rows, open_columns, pack_table, read_frame, read_meta, table_files, unpack_frame, write_frame
+)
+from stock_analyzer.data.fx_rates import to_naive_dates
+from stock_analyzer.data.market_hours import exchange_for_symbol, final_bars_end, next_refresh_time
+from stock_analyzer.data.resample import bucket_codes, local_times, resample_ohlcv
+from stock_analyzer.utils.helpers import load_config
+
+# One merged timeline of daily bars per symbol, stored in the symbol's native
+# currency together with the [start, end) date range already fetched.
+# Each timeline is a columnar table (see columnar_store) so ranges and single
+# columns can be read through memory maps without loading the whole history.
+# Recently used timelines are also kept decoded in memory, in front of disk.
+#
+# [start, end) only ever covers sessions that have closed, whose bars are
+# final. Bars of a session still trading are kept as provisional "live" bars
+# up to live_end and are reused until live_until (see market_hours).
+#
+# Tables are read through memory maps, so they always live in the cache
+# directory whichever cache backend is active. With a shared backend
+# configured, timelines are also shared: local misses are first looked up
+# there and newly fetched bars are written back.
+#
+# Intraday bars (e.g. 5m) are kept the same way in a separate timeline per
+# symbol and interval, named '<SYMBOL>@<interval>'.
+#
+# Weekly and monthly bars are derived from the daily timeline into
+# '<SYMBOL>@1wk' and '<SYMBOL>@1mo' whenever it is saved, rebuilding only the
+# buckets whose days changed, so long ranges can be read at lower resolution.
+# Each bucket is stamped with the date of its last daily bar.
+
+# Longest trailing gap (weekend plus holidays) an empty fetch may be trusted for;
+# longer empty results are more likely a failed request and are retried
+MAX_EMPTY_GAP_DAYS = 5
+
+DEFAULT_MEMORY_CACHE_MB = 64
+
+DAILY_INTERVAL = '1d'
+
+# Timelines derived from the daily one, coarsest first, with their resample rule
+PYRAMID_LEVELS = [('1mo', 'M'), ('1wk', 'W')]
+
+# Memory tier: symbol -> entry with decoded bars, LRU ordered, bounded in bytes
+_memory: "OrderedDict[str, Dict]" = OrderedDict()
+_memory_bytes = 0
+_memory_lock = threading.Lock()
+
+
+def _symbol_lock(symbol):
+    # Shared with other processes using the same cache directory, so only
+    # one of them fetches a missing range while the rest wait for its result
+    return cache_lock(_cache_key(symbol))
+
+
+def claim_symbol(symbol):
+    """
+    Take a symbol's fetch lock without waiting, for callers that fetch and
+    store_bars() many symbols themselves. Returns the held lock (release it
+    when done) or None if another thread or process is filling that symbol.
+    """
+    lock = _symbol_lock(symbol)
+    return lock if lock.acquire(blocking=False) else None
+
+
+def table_name(symbol, interval=DAILY_INTERVAL):
+    """Name of the timeline holding a symbol's bars at the given interval."""
+    return symbol if interval == DAILY_INTERVAL else f"{symbol}@{interval}"
+
+
+def _symbol_of(name):
+    return name.split('@', 1)[0]
+
+
+def get_bars_dir():
+    bars_dir = os.path.join(get_cache_dir(), 'bars')
+    os.makedirs(bars_dir, exist_ok=True)
+    return bars_dir
+
+
+def _table_dir(symbol):
+    return os.path.join(get_bars_dir(), symbol)
+
+
+def _cache_key(symbol):
+    return f"bars/{symbol}"
+
+
+def _to_date(value) -> datetime.date:
+    return pd.Timestamp(value).date()
+
+
+def _coverage(meta):
+    """Coverage fields of a table's metadata as an entry dict without bars, or None."""
+    if meta is None or 'start' not in meta:
+        return None
+    return {
+        'start': _to_date(meta['start']),
+        'end': _to_date(meta['end']),
+        'live_end': _to_date(meta['live_end']) if meta.get('live_end') else None,
+        'live_until': meta.get('live_until'),
+    }
+
+
+def _covers(entry, start, end, now=None) -> bool:
+    """Whether [start, end) can be served from the entry without fetching."""
+    if entry is None or start < entry['start']:
+        return False
+    if end <= entry['end']:
+        return True
+    # Past the final bars: only while the provisional ones are still fresh
+    return (entry.get('live_end') is not None and end <= entry['live_end']
+            and (now or time.time()) < entry['live_until'])
+
+
+def _load_entry(symbol) -> Optional[Dict]:
+    try:
+        table_dir = _table_dir(symbol)
+        meta = read_meta(table_dir)
+        entry = _coverage(meta)
+        if entry is not None:
+            entry['bars'] = read_frame(table_dir, meta=meta)
+            return entry
+    except Exception as e:
+        print(f"Error reading bar store for {symbol}: {e}")
+    return None
+
+
+def _save_entry(symbol, entry):
+    try:
+        meta = {'start': entry['start'].isoformat(), 'end': entry['end'].isoformat()}
+        if entry.get('live_end') is not None:
+            meta.update({'live_end': entry['live_end'].isoformat(), 'live_until': entry['live_until']})
+        write_frame(_table_dir(symbol), entry['bars'], meta)
+        record_cache_entry(_cache_key(symbol))
+        changed = entry.pop('changed', None)
+        if symbol == _symbol_of(symbol):
+            _update_pyramid(symbol, entry['bars'], changed)
+    except Exception as e:
+        print(f"Error writing bar store for {symbol}: {e}")
+
+
+def _splice_level(existing, bars, rule, changed):
+    """Rebuild the buckets of an aggregated timeline that hold changed days."""
+    first_code, last_code = bucket_codes(
+        np.array([pd.Timestamp(changed[0]).value, pd.Timestamp(changed[1] - datetime.timedelta(days=1)).value]),
+        rule)
+    codes = bucket_codes(local_times(bars.index), rule)
+    rebuilt = resample_ohlcv(bars[(codes >= first_code) & (codes <= last_code)], rule, label='last')
+    codes = bucket_codes(local_times(existing.index), rule)
+    kept = existing[(codes < first_code) | (codes > last_code)]
+    frames = [frame for frame in (kept, rebuilt) if frame is not None and not frame.empty]
+    if not frames:
+        return kept
+    return pd.concat(frames).sort_index() if len(frames) > 1 else frames[0]
+
+
+def _update_pyramid(symbol, bars, changed):
+    """
+    Bring the weekly and monthly timelines in line with the daily table just
+    written. Only buckets overlapping the changed date range are rebuilt,
+    unless changed is None or a level is not in step with the previous save.
+    """
+    source = read_meta(_table_dir(symbol))
+    meta = {field: source[field] for field in ('start', 'end', 'live_end', 'live_until') if field in source}
+    meta['source_generation'] = source['generation']
+    for interval, rule in PYRAMID_LEVELS:
+        name = table_name(symbol, interval)
+        table_dir = _table_dir(name)
+        level_meta = read_meta(table_dir)
+        in_step = level_meta is not None and level_meta.get('source_generation') == source['generation'] - 1
+        if changed is not None and in_step and bars is not None and not bars.empty:
+            level = _splice_level(read_frame(table_dir, meta=level_meta), bars, rule, changed)
+        else:
+            level = resample_ohlcv(bars, rule, label='last')
+        write_frame(table_dir, level, meta)
+        record_cache_entry(_cache_key(name))
+
+
+def get_memory_budget():
+    """Byte budget for the memory tier, from the 'memory_cache_mb' config setting."""
+    max_mb = load_config().get("memory_cache_mb", DEFAULT_MEMORY_CACHE_MB)
+    return int(float(max_mb) * 1024 * 1024)
+
+
+def _memory_get(symbol) -> Optional[Dict]:
+    with _memory_lock:
+        entry = _memory.get(symbol)
+        if entry is not None:
+            _memory.move_to_end(symbol)
+        return entry
+
+
+def _memory_put(symbol, entry):
+    """Keep a timeline in the memory tier, evicting least recently used ones over budget."""
+    global _memory_bytes
+    bars = entry['bars']
+    if bars is None:
+        return
+    # Precompute the local dates so slicing is a binary search, not a scan
+    dates = to_naive_dates(bars.index).values
+    nbytes = int(bars.memory_usage(index=True).sum()) + dates.nbytes
+    cached = dict(entry, dates=dates, nbytes=nbytes)
+    budget = get_memory_budget()
+    with _memory_lock:
+        previous = _memory.pop(symbol, None)
+        if previous is not None:
+            _memory_bytes -= previous['nbytes']
+        if nbytes > budget:
+            return
+        _memory[symbol] = cached
+        _memory_bytes += nbytes
+        while _memory_bytes > budget and _memory:
+            _, evicted = _memory.popitem(last=False)
+            _memory_bytes -= evicted['nbytes']
+
+
+def get_memory_usage() -> int:
+    """Bytes currently held by the memory tier."""
+    return _memory_bytes
+
+
+def clear_memory_tier():
+    """Drop every timeline held in memory; the disk store is untouched."""
+    global _memory_bytes
+    with _memory_lock:
+        _memory.clear()
+        _memory_bytes = 0
+
+
+def _slice_memory_entry(entry, start, end):
+    dates = entry['dates']
+    lo = int(np.searchsorted(dates, np.datetime64(start), side='left'))
+    hi = int(np.searchsorted(dates, np.datetime64(end), side='left'))
+    return entry['bars'].iloc[lo:hi]
+
+
+def _missing_ranges(entry, start, end):
+    """Date ranges of [start, end) that the entry does not cover yet."""
+    if entry is None:
+        return [(start, end)]
+    missing = []
+    if start < entry['start']:
+        missing.append((start, entry['start']))
+    if not _covers(entry, entry['end'], end):
+        # Start from the covered end so the timeline stays contiguous
+        missing.append((entry['end'], end))
+    return [(gap_start, gap_end) for gap_start, gap_end in missing if gap_start < gap_end]
+
+
+def _slice(bars, start, end):
+    if bars is None or bars.empty:
+        return bars
+    dates = to_naive_dates(bars.index)
+    mask = (dates >= pd.Timestamp(start)) & (dates < pd.Timestamp(end))
+    return bars[mask]
+
+
+def _merge(entry, df, start, end, symbol):
+    """Merge newly fetched bars for [start, end) into a store entry."""
+    exchange = exchange_for_symbol(_symbol_of(symbol))
+    now = time.time()
+    # Only sessions that have closed become part of the immutable coverage
+    final_end = final_bars_end(exchange, now)
+    live_end = end if end > final_end else None
+    live_until = next_refresh_time(exchange, now) if live_end is not None else None
+    end = max(start, min(end, final_end))
+    if df is not None:
+        df = df[[col for col in BAR_COLUMNS if col in df.columns]]
+    if entry is None:
+        return {'bars': df, 'start': start, 'end': end, 'live_end': live_end, 'live_until': live_until,
+                'changed': None}
+    bars = entry['bars']
+    replaced_end = max(end, live_end or end)
+    if df is not None and bars is not None and not bars.empty:
+        # The fetched range replaces what we had for it, including provisional bars
+        dates = to_naive_dates(bars.index)
+        bars = bars[(dates < pd.Timestamp(start)) | (dates >= pd.Timestamp(replaced_end))]
+    if df is not None and not df.empty:
+        bars = pd.concat([bars, df]) if bars is not None and not bars.empty else df
+        bars = bars[~bars.index.duplicated(keep='last')].sort_index()
+    if live_end is None and entry.get('live_end') is not None and entry['live_end'] > end:
+        # Provisional bars beyond this fetch are still the newest we have
+        live_end, live_until = entry['live_end'], entry['live_until']
+    if start > entry['end'] or end < entry['start']:
+        # Disjoint from what we had, so only the new range is known to be complete
+        return {'bars': bars, 'start': start, 'end': end, 'live_end': live_end, 'live_until': live_until,
+                'changed': None}
+    return {
+        'bars': bars,
+        'start': min(entry['start'], start),
+        'end': max(entry['end'], end),
+        'live_end': live_end,
+        'live_until': live_until,
+        'changed': _changed_range(entry, start, replaced_end),
+    }
+
+
+def _changed_range(entry, start, end):
+    """
+    Date range whose bars merges replaced since the entry was last saved,
+    widened by [start, end). None means everything may have changed.
+    """
+    if 'changed' not in entry:
+        return start, end
+    if entry['changed'] is None:
+        return None
+    return min(entry['changed'][0], start), max(entry['changed'][1], end)
+
+
+def read_bars(symbol, start_date, end_date, interval=DAILY_INTERVAL) -> Optional[pd.DataFrame]:
+    """Return stored bars for [start_date, end_date) if that range is fully covered."""
+    start, end = _to_date(start_date), _to_date(end_date)
+    symbol = table_name(symbol, interval)
+    with _symbol_lock(symbol):
+        table_dir = _table_dir(symbol)
+        meta = read_meta(table_dir)
+        if not _covers(_coverage(meta), start, end):
+            return None
+        touch_cache_entry(_cache_key(symbol))
+        return read_frame(table_dir, start, end, meta=meta)
+
+
+def has_bars(symbol, first_date, last_date, interval=DAILY_INTERVAL) -> bool:
+    """
+    Whether the stored timeline still spans the bars from first_date to
+    last_date inclusive, provisional ones included. Only reads the metadata.
+    """
+    symbol = table_name(symbol, interval)
+    with _symbol_lock(symbol):
+        entry = _coverage(read_meta(_table_dir(symbol)))
+    if entry is None:
+        return False
+    end = max(entry['end'], entry['live_end'] or entry['end'])
+    return entry['start'] <= _to_date(first_date) and _to_date(last_date) < end
+
+
+def read_columns(symbol, columns: List[str], interval=DAILY_INTERVAL) -> Optional[Dict]:
+    """
+    Memory-map selected columns of a symbol's full timeline without copying.
+    Returns a dict of column -> numpy array plus 'timestamps' (UTC ns), or None.
+    """
+    symbol = table_name(symbol, interval)
+    with _symbol_lock(symbol):
+        return open_columns(_table_dir(symbol), columns)
+
+
+def store_bars(symbol, df, start_date, end_date, interval=DAILY_INTERVAL):
+    """Merge bars fetched for [start_date, end_date) into the symbol's timeline."""
+    start, end = _to_date(start_date), _to_date(end_date)
+    symbol = table_name(symbol, interval)
+    with _symbol_lock(symbol):
+        entry = _merge(_load_entry(symbol), df, start, end, symbol)
+        _save_entry(symbol, entry)
+        if symbol in _memory:
+            _memory_put(symbol, entry)
+
+
+def get_bars(symbol, start_date, end_date, fetch_fn: Callable, interval=DAILY_INTERVAL) -> Optional[pd.DataFrame]:
+    """
+    Serve [start_date, end_date) from the symbol's stored timeline for the
+    given bar interval ('1d', or an intraday one such as '5m').
+    The memory tier is tried first, then the disk store. Only the missing
+    leading and trailing date ranges are requested through
+    fetch_fn(start_str, end_str), which must return native-currency bars.
+    Returns None if nothing could be stored or fetched.
+    """
+    start, end = _to_date(start_date), _to_date(end_date)
+    symbol = table_name(symbol, interval)
+    entry = _memory_get(symbol)
+    if entry is not None and not _missing_ranges(entry, start, end):
+        bars = _slice_memory_entry(entry, start, end)
+        return bars if not bars.empty else None
+
+    with _symbol_lock(symbol):
+        # Whoever held the lock before us may already have fetched what we need
+        entry = _load_entry(symbol)
+        if entry is not None:
+            touch_cache_entry(_cache_key(symbol))
+        missing = _missing_ranges(entry, start, end)
+        if missing and pull_shared_tables([symbol]):
+            entry = _load_entry(symbol)
+            missing = _missing_ranges(entry, start, end)
+        changed = False
+        for gap_start, gap_end in missing:
+            df = fetch_fn(gap_start.strftime("%Y-%m-%d"), gap_end.strftime("%Y-%m-%d"))
+            if df is None:
+                continue
+            if df.empty:
+                has_bars = entry is not None and entry['bars'] is not None and not entry['bars'].empty
+                leading = entry is not None and gap_end <= entry['start']
+                # Trust empty results only where no bars are expected: before
+                # the first listed bar, or across a weekend/holiday
+                if not has_bars or (not leading and (gap_end - gap_start).days > MAX_EMPTY_GAP_DAYS):
+                    continue
+            entry = _merge(entry, df, gap_start, gap_end, symbol)
+            changed = True
+        if changed:
+            _save_entry(symbol, entry)
+            push_shared_tables([symbol])
+        if entry is None or entry['bars'] is None:
+            return None
+        _memory_put(symbol, entry)
+
+    bars = _slice(entry['bars'], start, end)
+    if bars is None or bars.empty:
+        return None
+    return bars
+
+
+def _clip_edges(symbol, source, level, rule, start, end):
+    """
+    Rebuild the first and last buckets of a pyramid slice from the daily
+    bars in [start, end): the first bucket may hold days before start, and
+    days after the last whole bucket belong to one that ends past end.
+    """
+    if level is None or level.empty:
+        return level
+    daily_dir = _table_dir(symbol)
+    one_day = datetime.timedelta(days=1)
+    head = read_frame(daily_dir, start, level.index[0].date() + one_day, meta=source)
+    tail = read_frame(daily_dir, level.index[-1].date() + one_day, end, meta=source)
+    frames = [resample_ohlcv(head, rule, label='last'), level.iloc[1:], resample_ohlcv(tail, rule, label='last')]
+    return pd.concat([frame for frame in frames if frame is not None and not frame.empty])
+
+
+def _read_pyramid(symbol, start, end, min_points):
+    """
+    Bars of the coarsest pyramid level with at least min_points buckets whose
+    last day falls in [start, end), as (bars, interval), or (None, None).
+    Buckets at either edge only aggregate the days inside [start, end).
+    """
+    with _symbol_lock(symbol):
+        source = read_meta(_table_dir(symbol))
+        if _coverage(source) is None:
+            return None, None
+        for interval, rule in PYRAMID_LEVELS:
+            name = table_name(symbol, interval)
+            meta = read_meta(_table_dir(name))
+            if meta is None or meta.get('source_generation') != source.get('generation'):
+                # Evicted on its own, or derived from an older daily table
+                entry = _load_entry(symbol)
+                _update_pyramid(symbol, entry['bars'] if entry is not None else None, None)
+                meta = read_meta(_table_dir(name))
+            if count_rows(_table_dir(name), start, end, meta=meta) >= min_points:
+                touch_cache_entry(_cache_key(name))
+                level = read_frame(_table_dir(name), start, end, meta=meta)
+                return _clip_edges(symbol, source, level, rule, start, end), interval
+    return None, None
+
+
+def get_bars_at_resolution(symbol, start_date, end_date, fetch_fn: Callable, min_points=1):
+    """
+    Serve [start_date, end_date) at the coarsest resolution - monthly, weekly
+    or daily - that still gives at least min_points bars over the range.
+    Missing daily bars are fetched as in get_bars(); weekly and monthly bars
+    are read from the precomputed timelines. Returns (bars, interval), where
+    interval is '1mo', '1wk' or '1d' and bars is None if nothing is available.
+    """
+    start, end = _to_date(start_date), _to_date(end_date)
+    with _symbol_lock(symbol):
+        covered = _covers(_coverage(read_meta(_table_dir(symbol))), start, end)
+    if not covered and get_bars(symbol, start, end, fetch_fn) is None:
+        return None, DAILY_INTERVAL
+    bars, interval = _read_pyramid(symbol, start, end, min_points)
+    if bars is not None:
+        return bars, interval
+    return get_bars(symbol, start, end, fetch_fn), DAILY_INTERVAL
+
+
+def list_symbols() -> List[str]:
+    """Symbols with a stored daily timeline."""
+    bars_dir = get_bars_dir()
+    return sorted(name for name in os.listdir(bars_dir)
+                  if '@' not in name and read_meta(os.path.join(bars_dir, name)) is not None)
+
+
+def export_table(symbol, add_file: Callable[[str, str], None]) -> bool:
+    """
+    Pass each file of the symbol's current table to add_file(file_name, path)
+    while holding the symbol's lock, so the files form one consistent version.
+    Returns False if the symbol has no stored timeline.
+    """
+    with _symbol_lock(symbol):
+        table_dir = _table_dir(symbol)
+        meta = read_meta(table_dir)
+        if _coverage(meta) is None:
+            return False
+        for name in table_files(meta):
+            add_file(name, os.path.join(table_dir, name))
+        return True
+
+
+def import_table(symbol, table_dir) -> bool:
+    """
+    Merge a bar table copied from another cache into the symbol's timeline.
+    Only the other table's final bars are taken; its range replaces ours
+    where the two overlap. Returns False if table_dir holds no valid table.
+    """
+    meta = read_meta(table_dir)
+    if _coverage(meta) is None:
+        return False
+    return _import_frame(symbol, meta, read_frame(table_dir, meta=meta))
+
+
+def _import_frame(symbol, meta, bars, only_if_newer=False) -> bool:
+    coverage = _coverage(meta)
+    if coverage is None:
+        return False
+    bars = _slice(bars, coverage['start'], coverage['end'])
+    with _symbol_lock(symbol):
+        entry = _load_entry(symbol)
+        if only_if_newer and entry is not None:
+            overlaps = coverage['start'] <= entry['end'] and coverage['end'] >= entry['start']
+            extends = coverage['start'] < entry['start'] or coverage['end'] > entry['end']
+            if not (overlaps and extends):
+                return False
+        entry = _merge(entry, bars, coverage['start'], coverage['end'], symbol)
+        _save_entry(symbol, entry)
+        if symbol in _memory:
+            _memory_put(symbol, entry)
+    return True
+
+
+def pull_shared_tables(symbols: List[str]) -> int:
+    """
+    Merge timelines from a shared cache backend into the local store with one
+    batched lookup. Only tables that extend what we already have are taken.
+    Returns how many symbols gained data; 0 when the backend is not shared.
+    """
+    backend = get_cache_backend()
+    if not backend.shared or not symbols:
+        return 0
+    blobs = backend.get_many([_cache_key(symbol) for symbol in symbols])
+    pulled = 0
+    for symbol in symbols:
+        blob = blobs.get(_cache_key(symbol))
+        if blob is None:
+            continue
+        try:
+            meta, bars = unpack_frame(blob)
+            if _import_frame(symbol, meta, bars, only_if_newer=True):
+                pulled += 1
+        except Exception as e:
+            print(f"Error reading shared bars for {symbol}: {e}")
+    return pulled
+
+
+def push_shared_tables(symbols: List[str]):
+    """Write the symbols' local timelines to a shared cache backend in one batch."""
+    backend = get_cache_backend()
+    if not backend.shared or not symbols:
+        return
+    items = {}
+    for symbol in symbols:
+        with _symbol_lock(symbol):
+            blob = pack_table(_table_dir(symbol))
+        if blob is not None:
+            items[_cache_key(symbol)] = blob
+    backend.set_many(items)
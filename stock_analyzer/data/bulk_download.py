@@ -0,0 +1,162 @@
+import concurrent.futures
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from stock_analyzer.data.bar_store import get_bars, has_bars
+from stock_analyzer.data.cache_manager import get_cache_dir
+from stock_analyzer.data.fetch_engine import get_engine
+from stock_analyzer.data.providers import get_provider
+from stock_analyzer.data.stock_fetcher import BATCH_SIZE, download_batch, normalize_symbol
+
+# The journal is a JSON-lines file: a header line with the job's parameters,
+# then one line per finished symbol recording the date range now stored,
+#   {"symbol": "AAPL", "status": "done", "start": ..., "end": ..., "bars": 5031}
+#   {"symbol": "XYZ", "status": "failed", "error": "No data returned"}
+# Lines are appended and fsynced after every batch, so a crash loses at most
+# the batches in flight; a torn final line is ignored when resuming.
+# The journal lives outside the cache: cache eviction or cleanup can still
+# delete bars it records as done, so those are checked against the store
+# when resuming and downloaded again if they are gone.
+JOURNAL_FORMAT = 1
+JOURNAL_NAME = 'bulk_download.journal'
+JOBS_DIR = 'jobs'
+
+# Batches in flight at once; the fetch engine still applies its rate limit
+DEFAULT_PARALLEL_BATCHES = 4
+
+
+def get_journal_path() -> str:
+    """Default journal location, in a jobs directory next to the cache directory."""
+    return os.path.join(os.path.dirname(os.path.abspath(get_cache_dir())), JOBS_DIR, JOURNAL_NAME)
+
+
+def read_journal(path) -> Tuple[Optional[Dict], Dict[str, Dict]]:
+    """Return (header, records) from a journal; records holds the last line per symbol."""
+    header = None
+    records = {}
+    if not os.path.exists(path):
+        return header, records
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a partially written last line
+                continue
+            if 'format' in record:
+                header = record
+            elif 'symbol' in record:
+                records[record['symbol']] = record
+    return header, records
+
+
+def _append(f, records: List[Dict]):
+    f.write(''.join(json.dumps(record) + '\n' for record in records))
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _range_of(df) -> Dict:
+    return {'start': df.index[0].strftime("%Y-%m-%d"), 'end': df.index[-1].strftime("%Y-%m-%d"),
+            'bars': len(df)}
+
+
+def run_bulk_download(symbols: List[str], start_date, end_date, journal_path: Optional[str] = None,
+                      batch_size: int = BATCH_SIZE, parallel_batches: int = DEFAULT_PARALLEL_BATCHES,
+                      restart: bool = False, progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Download [start_date, end_date) for every symbol into the bar store,
+    resuming from the journal of an earlier run with the same dates.
+    Symbols the journal records as done are skipped while the store still
+    holds their bars; evicted and failed ones are downloaded again. restart discards the journal and starts over.
+    progress, if given, is called after every batch with the running stats.
+    Raises ValueError if the journal belongs to a job with different dates.
+    Returns the final stats: symbol counts, bars stored, symbols/sec and bars/sec.
+    """
+    journal_path = journal_path or get_journal_path()
+    tickers = list(dict.fromkeys(normalize_symbol(symbol) for symbol in symbols))
+    if restart and os.path.exists(journal_path):
+        os.remove(journal_path)
+    header, records = read_journal(journal_path)
+    if header is not None and (header.get('start') != start_date or header.get('end') != end_date):
+        raise ValueError(f"Journal {journal_path} is for {header.get('start')} to {header.get('end')}; "
+                         f"resume with those dates or restart the job")
+
+    done = {ticker for ticker, record in records.items() if record.get('status') == 'done'}
+    evicted = {ticker for ticker in tickers if ticker in done
+               and not has_bars(ticker, records[ticker]['start'], records[ticker]['end'])}
+    pending = [ticker for ticker in tickers if ticker not in done or ticker in evicted]
+    stats = {'total': len(tickers), 'skipped': len(tickers) - len(pending), 'evicted': len(evicted),
+             'done': 0, 'failed': 0,
+             'bars': 0, 'elapsed': 0.0, 'symbols_per_sec': 0.0, 'bars_per_sec': 0.0}
+    started = time.perf_counter()
+
+    def update(results: List[Dict]):
+        for record in results:
+            if record['status'] == 'done':
+                stats['done'] += 1
+                stats['bars'] += record['bars']
+            else:
+                stats['failed'] += 1
+        stats['elapsed'] = time.perf_counter() - started
+        if stats['elapsed'] > 0:
+            stats['symbols_per_sec'] = (stats['done'] + stats['failed']) / stats['elapsed']
+            stats['bars_per_sec'] = stats['bars'] / stats['elapsed']
+        if progress is not None:
+            progress(dict(stats))
+
+    os.makedirs(os.path.dirname(os.path.abspath(journal_path)), exist_ok=True)
+    with open(journal_path, 'a') as journal:
+        if header is None:
+            _append(journal, [{'format': JOURNAL_FORMAT, 'start': start_date, 'end': end_date,
+                               'created': time.time()}])
+
+        engine = get_engine()
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        waiting = []
+        # Keep a bounded number of batches in flight so the journal tracks progress closely
+        in_flight = {}
+        next_batch = 0
+        while next_batch < len(batches) or in_flight:
+            while next_batch < len(batches) and len(in_flight) < parallel_batches:
+                batch = batches[next_batch]
+                in_flight[engine.submit_job(download_batch, batch, start_date, end_date)] = batch
+                next_batch += 1
+            finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                batch = in_flight.pop(future)
+                try:
+                    frames, errors, batch_waiting = future.result()
+                except Exception as e:
+                    frames, errors, batch_waiting = {}, {ticker: f"Bulk download failed: {e}" for ticker in batch}, []
+                results = []
+                for ticker in batch:
+                    if ticker in frames:
+                        results.append({'symbol': ticker, 'status': 'done', **_range_of(frames[ticker])})
+                    elif ticker in batch_waiting:
+                        waiting.append(ticker)
+                    else:
+                        results.append({'symbol': ticker, 'status': 'failed',
+                                        'error': errors.get(ticker, "No data returned")})
+                _append(journal, results)
+                update(results)
+
+        # Another process held these; by now it has usually stored them
+        provider = get_provider()
+        for ticker in waiting:
+            try:
+                df = get_bars(ticker, start_date, end_date,
+                              lambda start, end, ticker=ticker: provider.history(ticker, start, end))
+            except Exception as e:
+                print(f"Error downloading {ticker}: {e}")
+                df = None
+            if df is None or df.empty:
+                record = {'symbol': ticker, 'status': 'failed', 'error': "No data returned"}
+            else:
+                record = {'symbol': ticker, 'status': 'done', **_range_of(df)}
+            _append(journal, [record])
+            update([record])
+
+    update([])
+    return stats
@@ -0,0 +1,358 @@
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from stock_analyzer.data.cache_manager import get_cache_dir, record_cache_entry, remove_cache_entry, touch_cache_entry
+from stock_analyzer.data.fetch_engine import get_engine
+from stock_analyzer.data.file_lock import atomic_write
+from stock_analyzer.data.kv_server import DEFAULT_PORT, pack_item, recv_message, send_message, unpack_items
+from stock_analyzer.utils.helpers import load_config
+
+# Client-side socket timeouts; a slow or dead cache server must never stall fetching
+NETWORK_TIMEOUT_SECONDS = 5.0
+CONNECT_TIMEOUT_SECONDS = 1.0
+
+# After a failure the server is skipped for this long, doubling up to the
+# maximum while it keeps failing, so a dead server costs one timeout rather
+# than one per lookup
+CIRCUIT_BACKOFF_SECONDS = 5.0
+CIRCUIT_MAX_BACKOFF_SECONDS = 300.0
+
+DEFAULT_MEMORY_BACKEND_MB = 256
+
+_LENGTH = struct.Struct('>I')
+
+
+class CacheBackend:
+    """
+    Interface for storing serialized cache entries by key.
+
+    Keys are relative, '/'-separated names such as "bars/AAPL". Backends
+    implement the batched get_many()/set_many(); get()/set() are single-key
+    shortcuts. A backend is `shared` when other machines see what it stores,
+    in which case the bar store and metadata cache keep their own copies in
+    the local backend and read through and write through to the shared one
+    (see get_local_backend and bar_store.pull_shared_tables).
+    """
+
+    name = "base"
+    shared = False
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """Return the values found for keys; missing keys are left out."""
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[str, bytes]):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def keys(self, prefix: str) -> List[str]:
+        """Keys stored under a '/'-terminated prefix such as "metadata/"; only local backends can list them."""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def set(self, key: str, value: bytes):
+        self.set_many({key: value})
+
+
+class DirectoryBackend(CacheBackend):
+    """
+    One file per key under a local directory, written atomically. Without a
+    directory it stores into the cache directory itself, and its files are
+    tracked in the cache manifest like every other entry there, so they count
+    against the cache budget and are evicted least recently used first.
+    """
+
+    name = "directory"
+
+    def __init__(self, directory=None):
+        self.directory = directory
+
+    def path_for(self, key):
+        parts = [part for part in key.split('/') if part not in ('', '.', '..')]
+        return os.path.join(self.directory or get_cache_dir(), *parts)
+
+    def get_many(self, keys):
+        values = {}
+        for key in keys:
+            try:
+                with open(self.path_for(key), 'rb') as f:
+                    values[key] = f.read()
+            except FileNotFoundError:
+                continue
+            except IOError as e:
+                print(f"Error reading cache entry {key}: {e}")
+                continue
+            if self.directory is None:
+                touch_cache_entry(key)
+        return values
+
+    def set_many(self, items):
+        for key, value in items.items():
+            path = self.path_for(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with atomic_write(path, 'wb') as f:
+                    f.write(value)
+            except IOError as e:
+                print(f"Error writing cache entry {key}: {e}")
+                continue
+            if self.directory is None:
+                record_cache_entry(key)
+
+    def delete(self, key):
+        if self.directory is None:
+            remove_cache_entry(key)
+            return
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing cache entry {key}: {e}")
+
+    def keys(self, prefix):
+        try:
+            names = os.listdir(self.path_for(prefix))
+        except FileNotFoundError:
+            return []
+        return sorted(prefix + name for name in names if not name.endswith('.tmp'))
+
+
+class MemoryBackend(CacheBackend):
+    """Process-local store with LRU eviction over a byte budget; nothing outlives the process."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BACKEND_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._values: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self._lock:
+            values = {}
+            for key in keys:
+                if key in self._values:
+                    self._values.move_to_end(key)
+                    values[key] = self._values[key]
+            return values
+
+    def set_many(self, items):
+        with self._lock:
+            for key, value in items.items():
+                previous = self._values.pop(key, None)
+                if previous is not None:
+                    self._bytes -= len(previous)
+                self._values[key] = value
+                self._bytes += len(value)
+            while self._bytes > self.max_bytes and self._values:
+                _, value = self._values.popitem(last=False)
+                self._bytes -= len(value)
+
+    def delete(self, key):
+        with self._lock:
+            value = self._values.pop(key, None)
+            if value is not None:
+                self._bytes -= len(value)
+
+    def keys(self, prefix):
+        with self._lock:
+            return sorted(key for key in self._values if key.startswith(prefix))
+
+
+class CacheUnavailable(ConnectionError):
+    """Raised instead of contacting a cache server that is being skipped, or past the fetch deadline."""
+
+
+class NetworkBackend(CacheBackend):
+    """
+    Client for the bundled kv_server. Each thread keeps one persistent
+    connection. Errors are reported and treated as cache misses, so an
+    unreachable server only costs the fetches it would have saved.
+    A failed request opens a circuit breaker: the server is skipped (every
+    lookup is an instant miss) for CIRCUIT_BACKOFF_SECONDS, doubling while
+    probes keep failing. Requests never wait past the calling thread's
+    fetch engine deadline.
+    """
+
+    name = "network"
+    shared = True
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, timeout=NETWORK_TIMEOUT_SECONDS,
+                 connect_timeout=CONNECT_TIMEOUT_SECONDS):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self._circuit_lock = threading.Lock()
+
+    def available(self) -> bool:
+        """False while the server is being skipped after a failure."""
+        return time.monotonic() >= self._retry_at
+
+    def _enter(self):
+        """Let a request through unless the circuit is open; only one probe goes through once it may close."""
+        with self._circuit_lock:
+            now = time.monotonic()
+            if now < self._retry_at:
+                raise CacheUnavailable(f"Skipping cache server {self.host}:{self.port} after a failure")
+            if self._backoff:
+                # Others keep skipping while this request probes the server
+                self._retry_at = now + self._backoff
+
+    def _failed(self):
+        with self._circuit_lock:
+            self._backoff = min(CIRCUIT_MAX_BACKOFF_SECONDS, self._backoff * 2 or CIRCUIT_BACKOFF_SECONDS)
+            self._retry_at = time.monotonic() + self._backoff
+
+    def _succeeded(self):
+        with self._circuit_lock:
+            self._backoff = 0.0
+            self._retry_at = 0.0
+
+    def _request_timeout(self) -> float:
+        left = get_engine().time_left()
+        if left is None:
+            return self.timeout
+        if left <= 0:
+            raise CacheUnavailable("Fetch deadline has passed")
+        return min(self.timeout, left)
+
+    def _connection(self, timeout):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.create_connection((self.host, self.port), timeout=min(self.connect_timeout, timeout))
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._local.sock = sock
+        sock.settimeout(timeout)
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _request(self, op: bytes, items: List[bytes], count: int) -> bytes:
+        """Send one request, reconnecting once if a pooled connection went stale."""
+        timeout = self._request_timeout()
+        self._enter()
+        for attempt in range(2):
+            pooled = getattr(self._local, 'sock', None) is not None
+            try:
+                sock = self._connection(timeout)
+                send_message(sock, [op, _LENGTH.pack(count)] + [pack_item(item) for item in items])
+                body = recv_message(sock)
+                self._succeeded()
+                return body
+            except (ConnectionError, OSError) as e:
+                self._close()
+                if pooled and attempt == 0 and not isinstance(e, socket.timeout):
+                    continue
+                # Running out of the caller's deadline says nothing about the server
+                if not (isinstance(e, socket.timeout) and timeout < self.timeout):
+                    self._failed()
+                raise
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        try:
+            body = self._request(b'G', [key.encode('utf-8') for key in keys], len(keys))
+        except CacheUnavailable:
+            return {}
+        except (ConnectionError, OSError, ValueError) as e:
+            print(f"Error reading from cache server {self.host}:{self.port}: {e}")
+            return {}
+        values = {}
+        offset = 4
+        for key in keys:
+            found = body[offset:offset + 1] == b'\x01'
+            offset += 1
+            if found:
+                (value,), offset = unpack_items(body, offset, 1)
+                values[key] = value
+        return values
+
+    def set_many(self, items):
+        if not items:
+            return
+        payload = []
+        for key, value in items.items():
+            payload.extend([key.encode('utf-8'), value])
+        try:
+            self._request(b'S', payload, len(items))
+        except CacheUnavailable:
+            pass
+        except (ConnectionError, OSError, ValueError) as e:
+            print(f"Error writing to cache server {self.host}:{self.port}: {e}")
+
+    def delete(self, key):
+        try:
+            self._request(b'D', [key.encode('utf-8')], 1)
+        except CacheUnavailable:
+            pass
+        except (ConnectionError, OSError, ValueError) as e:
+            print(f"Error deleting from cache server {self.host}:{self.port}: {e}")
+
+    def ping(self) -> bool:
+        try:
+            self._request(b'P', [], 0)
+            return True
+        except (ConnectionError, OSError, ValueError):
+            return False
+
+
+_backend: Optional[CacheBackend] = None
+_local_backend = DirectoryBackend()
+_backend_lock = threading.Lock()
+
+
+def get_cache_backend() -> CacheBackend:
+    """
+    Return the active cache backend. Chosen by the 'cache_backend' config
+    setting: 'directory' (the cache directory, default), 'memory' (kept in
+    this process only), or 'network' (the kv_server at 'cache_server',
+    "host:port", shared with other machines).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            config = load_config()
+            kind = config.get("cache_backend", "directory")
+            if kind == "memory":
+                _backend = MemoryBackend()
+            elif kind == "network":
+                host, _, port = str(config.get("cache_server", "")).rpartition(':')
+                _backend = NetworkBackend(host or '127.0.0.1', int(port or DEFAULT_PORT))
+            else:
+                _backend = _local_backend
+        return _backend
+
+
+def get_local_backend() -> CacheBackend:
+    """The backend holding this machine's own copy: the active one, or the cache directory when that is shared."""
+    backend = get_cache_backend()
+    return _local_backend if backend.shared else backend
+
+
+def set_cache_backend(backend: Optional[CacheBackend]):
+    """Replace the active backend, e.g. to point a batch job at a shared server; None goes back to the config."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
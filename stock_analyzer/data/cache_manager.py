@@ -1,49 +1,205 @@
 import os
-import pickle
 import shutil
+import sqlite3
+import threading
+import time
+import weakref
 from datetime import datetime, timedelta
 import pandas as pd
+from stock_analyzer.data.file_lock import FileLock
+from stock_analyzer.utils.helpers import load_config
+
+MANIFEST_FILE = 'manifest.sqlite3'
+
+# Lock files for cross-process coordination live here, outside the manifest
+LOCKS_DIR = 'locks'
+
+# Default byte budget for everything under the cache directory
+DEFAULT_CACHE_MAX_MB = 500
+
+# Manifest of every cache entry. Totals are kept up to date by triggers so
+# size queries never have to scan the entries table or the directory.
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals (id, size, count) VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET size = size + NEW.size, count = count + 1 WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET size = size - OLD.size + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET size = size - OLD.size, count = count - 1 WHERE id = 0;
+END;
+"""
+
+_manifest = None
+_manifest_lock = threading.RLock()
+
+# Only locks somebody still holds a reference to are kept, so the table does
+# not grow with every key ever locked
+_file_locks = weakref.WeakValueDictionary()
+_file_locks_guard = threading.Lock()
 
 def get_cache_dir():
-    cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'cache')
+    # STOCK_ANALYZER_CACHE_DIR points a process (e.g. a load test) at a separate cache
+    cache_dir = os.environ.get('STOCK_ANALYZER_CACHE_DIR') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'cache')
     os.makedirs(cache_dir, exist_ok=True)
     return cache_dir
 
-def get_cache_filename(symbol, start_date, end_date, currency=None):
-    if currency:
-        return f"{symbol}_{start_date}_{end_date}_{currency}.pkl"
-    else:
-        return f"{symbol}_{start_date}_{end_date}.pkl"
+def get_cache_budget():
+    """Byte budget for the cache, from the 'cache_max_mb' config setting."""
+    max_mb = load_config().get("cache_max_mb", DEFAULT_CACHE_MAX_MB)
+    return int(float(max_mb) * 1024 * 1024)
+
+def cache_lock(key) -> FileLock:
+    """
+    Return the process-wide lock guarding a cache entry across threads and processes.
+    Hold it while checking for and filling a missing entry so only one process
+    fetches a key; the others wait and then read what it wrote. Keep a
+    reference to the lock while it is held (a `with` block does).
+    """
+    with _file_locks_guard:
+        lock = _file_locks.get(key)
+        if lock is None:
+            filename = key.replace('/', '__').replace('\\', '__') + '.lock'
+            lock = FileLock(os.path.join(get_cache_dir(), LOCKS_DIR, filename))
+            _file_locks[key] = lock
+        return lock
 
-def get_cached_data(symbol, start_date, end_date, currency=None):
+def _get_manifest():
+    global _manifest
+    if _manifest is None:
+        path = os.path.join(get_cache_dir(), MANIFEST_FILE)
+        _manifest = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        _manifest.executescript(MANIFEST_SCHEMA)
+    return _manifest
+
+def _close_manifest():
+    global _manifest
+    with _manifest_lock:
+        if _manifest is not None:
+            _manifest.close()
+            _manifest = None
+
+def _path_size(path):
+    """Size of a cache file, or of all files directly inside a cache directory."""
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+def record_cache_entry(key, evict=True):
+    """
+    Record a written cache entry in the manifest and, if evict is set,
+    evict least recently used entries until the cache is back under budget.
+    key is the entry's path relative to the cache directory.
+    """
     try:
-        cache_dir = get_cache_dir()
-        filename = get_cache_filename(symbol, start_date, end_date, currency)
-        filepath = os.path.join(cache_dir, filename)
-        
-        if os.path.exists(filepath):
-            # Check if cache is less than 1 hour old
-            file_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-            if datetime.now() - file_time < timedelta(hours=1):
-                with open(filepath, 'rb') as f:
-                    return pickle.load(f)
+        size = _path_size(os.path.join(get_cache_dir(), key))
+        now = time.time()
+        with _manifest_lock:
+            _get_manifest().execute(
+                "INSERT INTO entries (key, size, created, last_access, hits) VALUES (?, ?, ?, ?, 0) "
+                "ON CONFLICT(key) DO UPDATE SET size = excluded.size, created = excluded.created, "
+                "last_access = excluded.last_access",
+                (key, size, now, now))
+        if evict:
+            enforce_cache_budget(keep=key)
     except Exception as e:
-        print(f"Error reading cache: {e}")
+        print(f"Error recording cache entry {key}: {e}")
+
+def touch_cache_entry(key):
+    """Record a cache hit for LRU ordering."""
+    try:
+        with _manifest_lock:
+            _get_manifest().execute(
+                "UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+    except Exception as e:
+        print(f"Error updating cache entry {key}: {e}")
+
+def get_cache_entry(key):
+    """Return the manifest row for key as a dict, or None if it is not cached."""
+    try:
+        with _manifest_lock:
+            row = _get_manifest().execute(
+                "SELECT size, created, last_access, hits FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            return {'key': key, 'size': row[0], 'created': row[1], 'last_access': row[2], 'hits': row[3]}
+    except Exception as e:
+        print(f"Error reading cache entry {key}: {e}")
     return None
 
-def set_cached_data(symbol, start_date, end_date, data, currency=None):
+def remove_cache_entry(key, blocking=True):
+    """
+    Delete a cache entry's file or directory and its manifest row.
+    With blocking=False an entry that another thread or process is using is
+    left alone. Returns whether the entry was removed.
+    """
+    lock = cache_lock(key)
+    if not lock.acquire(blocking=blocking):
+        return False
     try:
-        cache_dir = get_cache_dir()
-        filename = get_cache_filename(symbol, start_date, end_date, currency)
-        filepath = os.path.join(cache_dir, filename)
-        
-        with open(filepath, 'wb') as f:
-            pickle.dump(data, f)
+        path = os.path.join(get_cache_dir(), key)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Error removing cache entry {key}: {e}")
+        try:
+            with _manifest_lock:
+                _get_manifest().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except Exception as e:
+            print(f"Error removing cache entry {key} from manifest: {e}")
+        return True
+    finally:
+        lock.release()
+
+def enforce_cache_budget(max_bytes=None, keep=None):
+    """Evict least recently used entries until the cache fits in max_bytes."""
+    if max_bytes is None:
+        max_bytes = get_cache_budget()
+    removed_count = 0
+    skipped_count = 0
+    try:
+        while get_cache_size_bytes() > max_bytes:
+            with _manifest_lock:
+                rows = _get_manifest().execute(
+                    "SELECT key FROM entries WHERE key != ? ORDER BY last_access LIMIT 16 OFFSET ?",
+                    (keep or '', skipped_count)).fetchall()
+            if not rows:
+                break
+            for (key,) in rows:
+                # Never wait on (or pull out from under) an entry that is being read or filled
+                if not remove_cache_entry(key, blocking=False):
+                    skipped_count += 1
+                    continue
+                removed_count += 1
+                if get_cache_size_bytes() <= max_bytes:
+                    break
+        if removed_count > 0:
+            print(f"Evicted {removed_count} cache entries to stay under budget")
     except Exception as e:
-        print(f"Error writing cache: {e}")
+        print(f"Error enforcing cache budget: {e}")
+    return removed_count
 
 def clear_cache():
     try:
+        _close_manifest()
         cache_dir = get_cache_dir()
         if os.path.exists(cache_dir):
             shutil.rmtree(cache_dir)
@@ -51,38 +207,26 @@ def clear_cache():
     except Exception as e:
         print(f"Error clearing cache: {e}")
 
+def get_cache_size_bytes():
+    """Total size of all manifest entries in bytes, read from the running totals."""
+    with _manifest_lock:
+        return _get_manifest().execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+
 def get_cache_size():
     try:
-        cache_dir = get_cache_dir()
-        if not os.path.exists(cache_dir):
-            return 0    
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(cache_dir):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                total_size += os.path.getsize(filepath)
-        
-        return round(total_size / (1024 * 1024), 2)  # Convert to MB
+        return round(get_cache_size_bytes() / (1024 * 1024), 2)  # Convert to MB
     except Exception as e:
         print(f"Error calculating cache size: {e}")
         return 0
 
 def cleanup_old_cache():
     try:
-        cache_dir = get_cache_dir()
-        if not os.path.exists(cache_dir):
-            return
-        
-        cutoff_time = datetime.now() - timedelta(hours=24)
-        removed_count = 0      
-        for filename in os.listdir(cache_dir):
-            filepath = os.path.join(cache_dir, filename)
-            if os.path.isfile(filepath):
-                file_time = datetime.fromtimestamp(os.path.getmtime(filepath))
-                if file_time < cutoff_time:
-                    os.remove(filepath)
-                    removed_count += 1       
-        if removed_count > 0:
+        cutoff_time = (datetime.now() - timedelta(hours=24)).timestamp()
+        with _manifest_lock:
+            rows = _get_manifest().execute(
+                "SELECT key FROM entries WHERE last_access < ?", (cutoff_time,)).fetchall()
+        removed_count = sum(remove_cache_entry(key, blocking=False) for (key,) in rows)
+        if removed_count:
             print(f"Removed {removed_count} old cache files")
     except Exception as e:
-        print(f"Error cleaning up old cache: {e}") 
\ No newline at end of file
+        print(f"Error cleaning up old cache: {e}")
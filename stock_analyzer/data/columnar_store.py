@@ -0,0 +1,225 @@
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is not installed. Please install it with 'pip install numpy'.")
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from stock_analyzer.data.file_lock import atomic_write
+
+# On-disk layout of one bar table:
+#   meta.json       row count, time zone and any caller metadata
+#   timestamps.i64  bar times as int64 nanoseconds since the epoch (UTC)
+#   <Column>.f64    one float64 array per OHLCV column
+# Every file is a raw fixed-width array, so columns can be opened with
+# numpy.memmap and read independently of each other.
+# Array files carry the table's generation number and a rewrite creates a new
+# generation, then atomically replaces meta.json to point at it. Readers in
+# other processes therefore see either the old or the new table, never a mix.
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+META_FILE = 'meta.json'
+
+# Time zone aware indexes of recently read tables, so a read only slices one
+# instead of converting every timestamp again. Array files are never modified
+# once written, so a timestamp file's path, size and mtime identify its contents.
+INDEX_CACHE_TABLES = 128
+
+_indexes: "OrderedDict[tuple, pd.DatetimeIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _timestamp_file(generation=None):
+    # Tables written before generations existed use unnumbered file names
+    return f"timestamps.{generation}.i64" if generation else "timestamps.i64"
+
+
+def _column_file(column, generation=None):
+    return f"{column}.{generation}.f64" if generation else f"{column}.f64"
+
+
+def read_meta(directory) -> Optional[Dict]:
+    """Return a table's metadata, or None if the table does not exist."""
+    try:
+        filepath = os.path.join(directory, META_FILE)
+        if os.path.exists(filepath):
+            with open(filepath, 'r') as f:
+                return json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error reading bar table metadata in {directory}: {e}")
+    return None
+
+
+def table_files(meta: Dict) -> List[str]:
+    """File names making up the table generation described by meta, metadata first."""
+    generation = meta.get('generation')
+    return [META_FILE, _timestamp_file(generation)] + [_column_file(col, generation) for col in meta['columns']]
+
+
+def remove_stale_files(directory, keep):
+    """Delete files in directory that are not in keep, such as arrays of older generations."""
+    for entry in os.scandir(directory):
+        if entry.name not in keep and not entry.name.endswith('.tmp'):
+            try:
+                os.remove(entry.path)
+            except OSError:
+                # Still mapped by a reader on Windows; removed by a later write
+                pass
+
+
+def write_frame(directory, df: pd.DataFrame, meta: Optional[Dict] = None):
+    """
+    Write the OHLCV columns of df as a columnar bar table.
+    Concurrent writers to the same directory must be serialized by the caller.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = read_meta(directory) or {}
+    generation = previous.get('generation', 0) + 1
+    index = pd.DatetimeIndex(df.index) if df is not None else pd.DatetimeIndex([])
+    tz = str(index.tz) if index.tz is not None else None
+    # .values is UTC for tz-aware indexes; force ns resolution before taking the integers
+    timestamps = index.values.astype('datetime64[ns]').view(np.int64)
+    timestamps.tofile(os.path.join(directory, _timestamp_file(generation)))
+    columns = [col for col in BAR_COLUMNS if df is not None and col in df.columns]
+    for col in columns:
+        np.asarray(df[col].values, dtype=np.float64).tofile(os.path.join(directory, _column_file(col, generation)))
+    table_meta = dict(meta or {})
+    table_meta.update({'rows': len(index), 'tz': tz, 'columns': columns, 'generation': generation})
+    # Swapping the metadata in publishes the new generation in one step
+    with atomic_write(os.path.join(directory, META_FILE), 'w') as f:
+        json.dump(table_meta, f)
+    remove_stale_files(directory, set(table_files(table_meta)))
+
+
+def _open_array(filepath, dtype, rows):
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    # Copy-on-write: callers may modify what they read without touching the file
+    return np.memmap(filepath, dtype=dtype, mode='c', shape=(rows,))
+
+
+def open_columns(directory, columns: Optional[List[str]] = None, meta: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    Memory-map a table's timestamps and the requested columns without copying.
+    Returns a dict of column name -> array (plus 'timestamps'), or None.
+    Only the files for the requested columns are opened.
+    """
+    meta = meta or read_meta(directory)
+    if meta is None:
+        return None
+    rows = meta['rows']
+    generation = meta.get('generation')
+    arrays = {'timestamps': _open_array(os.path.join(directory, _timestamp_file(generation)), np.int64, rows)}
+    for col in columns or meta['columns']:
+        if col in meta['columns']:
+            arrays[col] = _open_array(os.path.join(directory, _column_file(col, generation)), np.float64, rows)
+    return arrays
+
+
+def _bound(value, tz) -> int:
+    ts = pd.Timestamp(value)
+    if tz:
+        ts = ts.tz_localize(tz)
+    return ts.value
+
+
+def _row_range(timestamps, tz, start_date, end_date):
+    lo = int(np.searchsorted(timestamps, _bound(start_date, tz), side='left')) if start_date is not None else 0
+    hi = int(np.searchsorted(timestamps, _bound(end_date, tz), side='left')) if end_date is not None else len(timestamps)
+    return lo, hi
+
+
+def count_rows(directory, start_date=None, end_date=None, meta: Optional[Dict] = None) -> int:
+    """Number of bars in [start_date, end_date), from the mapped timestamps alone."""
+    meta = meta or read_meta(directory)
+    if meta is None:
+        return 0
+    timestamps = _open_array(os.path.join(directory, _timestamp_file(meta.get('generation'))), np.int64, meta['rows'])
+    lo, hi = _row_range(timestamps, meta.get('tz'), start_date, end_date)
+    return hi - lo
+
+
+def _table_index(directory, meta: Dict, timestamps) -> pd.DatetimeIndex:
+    """The whole table's index in its time zone, built once per table generation."""
+    filepath = os.path.join(directory, _timestamp_file(meta.get('generation')))
+    try:
+        stat = os.stat(filepath)
+        key = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        key = None
+    if key is not None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is not None:
+                _indexes.move_to_end(key)
+                return index
+    index = pd.DatetimeIndex(np.array(timestamps).view('datetime64[ns]'))
+    if meta.get('tz'):
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+    if key is not None:
+        with _indexes_lock:
+            _indexes[key] = index
+            while len(_indexes) > INDEX_CACHE_TABLES:
+                _indexes.popitem(last=False)
+    return index
+
+
+def read_frame(directory, start_date=None, end_date=None, columns: Optional[List[str]] = None,
+               meta: Optional[Dict] = None) -> Optional[pd.DataFrame]:
+    """
+    Read bars in [start_date, end_date) as a DataFrame.
+    Dates are local to the table's time zone. The row range is located with a
+    binary search on the mapped timestamps; each column of the frame is a
+    view of its memory-mapped file, so nothing is copied until it is modified.
+    """
+    meta = meta or read_meta(directory)
+    arrays = open_columns(directory, columns, meta)
+    if arrays is None:
+        return None
+    timestamps = arrays.pop('timestamps')
+    lo, hi = _row_range(timestamps, meta.get('tz'), start_date, end_date)
+    index = _table_index(directory, meta, timestamps)[lo:hi]
+    return pd.DataFrame({col: values[lo:hi] for col, values in arrays.items()}, index=index, copy=False)
+
+
+def pack_table(directory, meta: Optional[Dict] = None) -> Optional[bytes]:
+    """
+    Serialize a table into one byte string: a 4-byte metadata length, the
+    metadata JSON, then the timestamp array and each column array.
+    Returns None if the table does not exist.
+    """
+    meta = meta or read_meta(directory)
+    if meta is None:
+        return None
+    header = json.dumps(meta).encode('utf-8')
+    parts = [struct.pack('>I', len(header)), header]
+    for name in table_files(meta)[1:]:
+        with open(os.path.join(directory, name), 'rb') as f:
+            parts.append(f.read())
+    return b''.join(parts)
+
+
+def unpack_frame(data: bytes):
+    """Inverse of pack_table: returns (meta, DataFrame of every bar), without touching disk."""
+    header_size = struct.unpack_from('>I', data)[0]
+    meta = json.loads(data[4:4 + header_size].decode('utf-8'))
+    rows = meta['rows']
+    offset = 4 + header_size
+    timestamps = np.frombuffer(data, dtype=np.int64, count=rows, offset=offset)
+    offset += rows * 8
+    values = np.empty((rows, len(meta['columns'])), dtype=np.float64)
+    for i in range(len(meta['columns'])):
+        values[:, i] = np.frombuffer(data, dtype=np.float64, count=rows, offset=offset)
+        offset += rows * 8
+    index = pd.DatetimeIndex(timestamps.view('datetime64[ns]'))
+    if meta.get('tz'):
+        index = index.tz_localize('UTC').tz_convert(meta['tz'])
+    return meta, pd.DataFrame(values, index=index, columns=meta['columns'], copy=False)
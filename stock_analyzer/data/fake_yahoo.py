@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Yahoo Finance endpoints the app uses, for load and
+latency testing of the fetch layer without touching the real service.
+
+    python -m stock_analyzer.data.fake_yahoo --port 8765 --latency-ms 80 --jitter-ms 40 \
+        --error-rate 0.02 --max-rps 20
+
+then point the app at it with http_session.set_upstream("http://127.0.0.1:8765"),
+or run load_test.py, which starts one itself.
+
+Serves:
+    /v8/finance/chart/<SYMBOL>           price history (daily or intraday)
+    /v10/finance/quoteSummary/<SYMBOL>   company details
+    /v7/finance/quote?symbols=<SYMBOL>   quote
+    /ws/fundamentals-timeseries/...      always empty
+    /v1/test/getcrumb, /                 cookie and crumb handshake
+FX pairs (USD<CUR>=X) are ordinary chart symbols. Bars are synthetic random
+walks seeded by the symbol, or read from a --data-dir in the local provider's
+layout (see providers.LocalFilesProvider) to replay recorded data.
+
+Every data request waits latency +/- jitter, then fails with a 500 at
+error_rate, or with a 429 when more than max_rps requests arrive per second.
+The cookie and crumb handshake is answered at once and not counted.
+"""
+
+import argparse
+import datetime
+import json
+import random
+import socket
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is not installed. Please install it with 'pip install numpy'.")
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
+
+from stock_analyzer.data.market_hours import EXCHANGE_SESSIONS, exchange_for_symbol
+from stock_analyzer.data.symbol_registry import currency_for_suffix
+
+DEFAULT_PORT = 8765
+
+# Synthetic history starts here; earlier requests get no bars
+SYNTHETIC_START = datetime.date(2000, 1, 3)
+
+_INTRADAY_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+
+# Rough USD rates the synthetic FX walks start from
+_FX_LEVELS = {'EUR': 0.9, 'GBP': 0.8, 'JPY': 140.0, 'INR': 83.0, 'CAD': 1.35, 'AUD': 1.5, 'CHF': 0.9, 'CNY': 7.1}
+
+
+class UpstreamSettings:
+    """Latency and failure behaviour of the fake server; fields may be changed while it runs."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, max_rps=0.0, unknown_symbols=()):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        # Symbols answered with Yahoo's 404 "not found", like delisted or mistyped ones
+        self.unknown_symbols = set(unknown_symbols)
+
+
+class UpstreamStats:
+    """Counts of what the fake server answered, by outcome."""
+
+    def __init__(self):
+        self.requests = 0
+        self.ok = 0
+        self.errors = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def record(self, status):
+        with self._lock:
+            self.requests += 1
+            if status == 429:
+                self.throttled += 1
+            elif status >= 500:
+                self.errors += 1
+            else:
+                self.ok += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'requests': self.requests, 'ok': self.ok, 'errors': self.errors, 'throttled': self.throttled}
+
+
+def _seed(symbol) -> int:
+    return zlib.crc32(symbol.encode('utf-8'))
+
+
+def _session_of(symbol):
+    exchange = exchange_for_symbol(symbol)
+    return exchange, EXCHANGE_SESSIONS[exchange]
+
+
+def _currency_of(symbol) -> str:
+    return currency_for_suffix(symbol)
+
+
+def synthetic_bars(symbol, start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    """
+    Daily bars in [start, end) for any symbol. Each symbol's walk is fixed by
+    its name, so any two requests agree on overlapping dates.
+    """
+    calendar = np.arange(np.datetime64(SYNTHETIC_START), np.datetime64(max(end, SYNTHETIC_START)))
+    days = pd.DatetimeIndex(calendar[np.is_busday(calendar)])
+    rng = np.random.default_rng(_seed(symbol))
+    if symbol.startswith('USD') and symbol.endswith('=X'):
+        level, volatility = _FX_LEVELS.get(symbol[3:-2], 1.0), 0.002
+    else:
+        level, volatility = 20 + _seed(symbol) % 300, 0.015
+    close = level * np.exp(np.cumsum(rng.normal(0, volatility, len(days))))
+    spread = np.abs(rng.normal(0, volatility, len(days))) * close
+    df = pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, volatility / 3, len(days))),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(100_000, 10_000_000, len(days)).astype(float),
+    }, index=days)
+    df['High'] = df[['Open', 'High', 'Close']].max(axis=1)
+    df['Low'] = df[['Open', 'Low', 'Close']].min(axis=1)
+    return df[(df.index >= pd.Timestamp(start)) & (df.index < pd.Timestamp(end))]
+
+
+def _session_timestamps(symbol, days, minutes=None):
+    """UTC epoch seconds for each day's session open, or for every bar of the session."""
+    _, (tz, open_time, close_time) = _session_of(symbol)
+    timestamps = []
+    for day in days:
+        opens = pd.Timestamp.combine(day.date(), open_time).tz_localize(tz)
+        if minutes is None:
+            timestamps.append(int(opens.timestamp()))
+            continue
+        closes = pd.Timestamp.combine(day.date(), close_time).tz_localize(tz)
+        timestamps.extend(int(t.timestamp()) for t in
+                          pd.date_range(opens, closes, freq=f"{minutes}min", inclusive='left'))
+    return timestamps
+
+
+def _chart_meta(symbol, interval, df):
+    exchange, (tz, open_time, close_time) = _session_of(symbol)
+    last = float(df['Close'].iloc[-1]) if not df.empty else None
+    today = datetime.date.today()
+    period = {
+        'timezone': tz, 'gmtoffset': int(pd.Timestamp.now(tz).utcoffset().total_seconds()),
+        'start': int(pd.Timestamp.combine(today, open_time).tz_localize(tz).timestamp()),
+        'end': int(pd.Timestamp.combine(today, close_time).tz_localize(tz).timestamp()),
+    }
+    return {
+        'currency': _currency_of(symbol), 'symbol': symbol, 'exchangeName': exchange,
+        'instrumentType': 'CURRENCY' if symbol.endswith('=X') else 'EQUITY',
+        'firstTradeDate': int(pd.Timestamp(SYNTHETIC_START).timestamp()),
+        'regularMarketTime': int(time.time()), 'gmtoffset': period['gmtoffset'], 'timezone': tz,
+        'exchangeTimezoneName': tz, 'regularMarketPrice': last, 'chartPreviousClose': last,
+        'priceHint': 4 if symbol.endswith('=X') else 2,
+        'currentTradingPeriod': {'pre': period, 'regular': period, 'post': period},
+        'tradingPeriods': {'pre': [[period]], 'regular': [[period]], 'post': [[period]]},
+        'dataGranularity': interval, 'range': '',
+        'validRanges': ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max'],
+    }
+
+
+def chart_response(symbol, period1, period2, interval='1d', source=None) -> Dict:
+    """Yahoo chart API JSON for [period1, period2) (epoch seconds)."""
+    start = datetime.datetime.fromtimestamp(period1, datetime.timezone.utc).date()
+    end = datetime.datetime.fromtimestamp(period2, datetime.timezone.utc).date() + datetime.timedelta(days=1)
+    if source is not None:
+        df = source.history(symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+        if df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+    else:
+        df = synthetic_bars(symbol, start, end)
+    minutes = _INTRADAY_MINUTES.get(interval)
+    if minutes is None:
+        timestamps = _session_timestamps(symbol, df.index)
+        quote = {column.lower(): df[column].round(4).tolist() for column in ('Open', 'High', 'Low', 'Close')}
+        quote['volume'] = df['Volume'].astype(np.int64).tolist()
+    else:
+        # Spread each day's range over its session with a small seeded walk
+        timestamps = _session_timestamps(symbol, df.index, minutes)
+        per_day = len(timestamps) // max(1, len(df))
+        rng = np.random.default_rng(_seed(symbol) + int(period1))
+        close = np.repeat(df['Close'].to_numpy(), per_day) * np.exp(rng.normal(0, 0.001, len(df) * per_day))
+        quote = {'open': np.round(close * (1 + rng.normal(0, 0.0005, len(close))), 4).tolist(),
+                 'high': np.round(close * 1.001, 4).tolist(), 'low': np.round(close * 0.999, 4).tolist(),
+                 'close': np.round(close, 4).tolist(),
+                 'volume': np.repeat(df['Volume'].to_numpy() // max(1, per_day), per_day).astype(np.int64).tolist()}
+    keep = [i for i, t in enumerate(timestamps) if period1 <= t < period2]
+    result = {
+        'meta': _chart_meta(symbol, interval, df),
+        'timestamp': [timestamps[i] for i in keep],
+        'events': {},
+        'indicators': {
+            'quote': [{key: [values[i] for i in keep] for key, values in quote.items()}],
+            'adjclose': [{'adjclose': [quote['close'][i] for i in keep]}],
+        },
+    }
+    return {'chart': {'result': [result], 'error': None}}
+
+
+def quote_fields(symbol, source=None) -> Dict:
+    """The ticker.info fields the app reads, for one symbol."""
+    if source is not None:
+        info = source.info(symbol)
+        if info:
+            return info
+    end = datetime.date.today() + datetime.timedelta(days=1)
+    bars = synthetic_bars(symbol, end - datetime.timedelta(days=10), end)
+    price = round(float(bars['Close'].iloc[-1]), 2) if not bars.empty else None
+    exchange, _ = _session_of(symbol)
+    return {
+        'symbol': symbol, 'longName': f"{symbol} Holdings Inc.", 'shortName': f"{symbol} Holdings",
+        'currency': _currency_of(symbol), 'exchange': exchange, 'regularMarketPrice': price,
+        'currentPrice': price, 'marketCap': int((_seed(symbol) % 500 + 1) * 1e9),
+        'volume': int(bars['Volume'].iloc[-1]) if not bars.empty else 0,
+        'trailingPE': round(5 + _seed(symbol) % 40 + 0.5, 2),
+        'dividendYield': round((_seed(symbol) % 50) / 10, 2),
+        'sector': ['Technology', 'Financial Services', 'Healthcare', 'Energy', 'Industrials'][_seed(symbol) % 5],
+        'industry': 'Synthetic',
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; don't let Nagle hold the body back
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body: bytes, content_type='application/json', headers=None, count=True):
+        if count:
+            self.server.stats.record(status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode('utf-8'))
+
+    def _unknown_symbol(self, path, query) -> bool:
+        """Answer a request for an unknown symbol the way Yahoo does; returns whether it was one."""
+        if path == '/v7/finance/quote':
+            symbol = query.get('symbols', '').split(',')[0]
+        elif path.startswith(('/v8/finance/chart/', '/v10/finance/quoteSummary/')):
+            symbol = unquote(path.rsplit('/', 1)[1])
+        else:
+            return False
+        if symbol not in self.server.settings.unknown_symbols:
+            return False
+        if path.startswith('/v8/'):
+            error = {'code': 'Not Found', 'description': 'No data found, symbol may be delisted'}
+            self._send_json(404, {'chart': {'result': None, 'error': error}})
+        elif path.startswith('/v10/'):
+            error = {'code': 'Not Found', 'description': f'Quote not found for symbol: {symbol}'}
+            self._send_json(404, {'quoteSummary': {'result': None, 'error': error}})
+        else:
+            self._send_json(200, {'quoteResponse': {'result': [], 'error': None}})
+        return True
+
+    def do_GET(self):
+        server = self.server
+        settings = server.settings
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        path = parts.path.rstrip('/')
+        # yfinance cannot keep the fake host's cookie, so it repeats the handshake
+        # on every call; answer it at once so it does not skew the numbers
+        if path == '/v1/test/getcrumb':
+            self._send(200, b'fake-crumb', 'text/plain', count=False)
+            return
+        if path == '':
+            self._send(200, b'', 'text/html', {'Set-Cookie': 'A3=fake; Path=/; Max-Age=31536000'}, count=False)
+            return
+
+        delay = settings.latency_ms + random.uniform(-settings.jitter_ms, settings.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        if server.throttle():
+            self._send(429, b'Too Many Requests', 'text/plain')
+            return
+        if settings.error_rate and random.random() < settings.error_rate:
+            self._send_json(500, {'finance': {'result': None, 'error': {'code': 'Internal Server Error'}}})
+            return
+        try:
+            if self._unknown_symbol(path, query):
+                return
+            if path.startswith('/v8/finance/chart/'):
+                symbol = unquote(path.rsplit('/', 1)[1])
+                now = int(time.time())
+                period1 = int(query.get('period1', now - 86400 * 7))
+                period2 = int(query.get('period2', now))
+                self._send_json(200, chart_response(symbol, period1, period2, query.get('interval', '1d'),
+                                                    server.source))
+            elif path.startswith('/v10/finance/quoteSummary/'):
+                symbol = unquote(path.rsplit('/', 1)[1])
+                fields = quote_fields(symbol, server.source)
+                self._send_json(200, {'quoteSummary': {'result': [{'price': fields}], 'error': None}})
+            elif path == '/v7/finance/quote':
+                symbol = query.get('symbols', '').split(',')[0]
+                self._send_json(200, {'quoteResponse': {'result': [quote_fields(symbol, server.source)],
+                                                        'error': None}})
+            elif path.startswith('/ws/fundamentals-timeseries/'):
+                # Fundamentals are not imitated; an empty result is a valid answer
+                self._send_json(200, {'timeseries': {'result': [], 'error': None}})
+            else:
+                self._send_json(404, {'finance': {'result': None, 'error': {'code': 'Not Found'}}})
+        except Exception as e:
+            self._send_json(500, {'finance': {'result': None, 'error': {'code': str(e)}}})
+
+
+class FakeYahooServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, settings: Optional[UpstreamSettings] = None, data_dir=None):
+        self.settings = settings or UpstreamSettings()
+        self.stats = UpstreamStats()
+        self.source = None
+        if data_dir:
+            from stock_analyzer.data.providers import LocalFilesProvider
+            self.source = LocalFilesProvider(data_dir)
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._throttle_lock = threading.Lock()
+        super().__init__(address, _Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def throttle(self) -> bool:
+        """Whether this request is over the max_rps budget of the current one-second window."""
+        if not self.settings.max_rps:
+            return False
+        with self._throttle_lock:
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_count = 0
+            self._window_count += 1
+            return self._window_count > self.settings.max_rps
+
+
+def start_server(host='127.0.0.1', port=0, settings: Optional[UpstreamSettings] = None,
+                 data_dir=None) -> FakeYahooServer:
+    """Serve in a daemon thread of this process; port 0 picks a free port (see server.url)."""
+    server = FakeYahooServer((host, port), settings, data_dir)
+    threading.Thread(target=server.serve_forever, name='fake-yahoo', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Yahoo Finance server for load testing.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with a 500")
+    parser.add_argument('--max-rps', type=float, default=0.0, help="answer 429 beyond this many requests per second")
+    parser.add_argument('--data-dir', help="serve recorded bars from a local provider directory")
+    args = parser.parse_args()
+    settings = UpstreamSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.max_rps)
+    server = FakeYahooServer((args.host, args.port), settings, args.data_dir)
+    print(f"Fake Yahoo Finance listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,637 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+from stock_analyzer.utils.helpers import load_config
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE_PER_SEC = 4.0
+DEFAULT_MAX_RETRIES = 3
+
+# Retry delays use exponential backoff with full jitter
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 10.0
+
+# The rate limiter never backs off below this many requests per second
+MIN_RATE_PER_SEC = 0.2
+# Throttled responses this soon after a backoff count as the same burst
+BACKOFF_COOLDOWN_SECONDS = 1.0
+# After throttling the rate stays put for this long, then grows by
+# RECOVERY_FACTOR per second for as long as nothing is throttled
+RECOVERY_WINDOW_SECONDS = 5.0
+RECOVERY_FACTOR = 1.1
+
+# A provider call still running after this long is abandoned and retried;
+# time spent waiting for rate-limit tokens does not count
+DEFAULT_TIMEOUT_SECONDS = 30.0
+
+# Threads waiting for a token recheck whether their attempt was abandoned this often
+TOKEN_POLL_SECONDS = 0.25
+
+# Hedged requests fire a duplicate once a call outlives this latency percentile
+DEFAULT_HEDGE_PERCENTILE = 95.0
+# Hedging waits for this many latency samples before it trusts the percentile
+MIN_HEDGE_SAMPLES = 20
+LATENCY_WINDOW = 1000
+
+
+class FetchCancelled(Exception):
+    """Raised for cancellable background calls dropped because foreground work arrived."""
+
+
+class FetchTimeout(TimeoutError):
+    """Raised when an engine call does not finish before its deadline."""
+
+
+def is_throttled(error) -> bool:
+    """Whether an exception looks like the provider rate limiting us."""
+    message = str(error)
+    return (type(error).__name__ == 'YFRateLimitError'
+            or '429' in message or 'Too Many Requests' in message or 'Rate limited' in message)
+
+
+# Local file errors come out the same on every attempt
+_PERMANENT_OS_ERRORS = (FileNotFoundError, IsADirectoryError, NotADirectoryError, PermissionError)
+
+
+def is_transient(error) -> bool:
+    """
+    Whether a failed call is worth retrying: throttling, a timeout, or a
+    connection error (the HTTP clients' errors are OSErrors), but not an
+    HTTP 4xx answer. Errors such as ValueError, KeyError or SymbolNotFound
+    come out the same on every attempt.
+    """
+    if is_throttled(error):
+        return True
+    if not isinstance(error, OSError) or isinstance(error, _PERMANENT_OS_ERRORS):
+        return False
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status is None or status >= 500
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds) with percentile lookups."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, percent) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(percent / 100.0 * len(samples))) - 1))
+        return samples[index]
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+class RateLimiter:
+    """
+    Token bucket limiter with adaptive rate.
+    The rate is halved when throttling is seen, once per burst of throttled
+    responses. It only grows again after RECOVERY_WINDOW_SECONDS without any
+    throttling, and then by RECOVERY_FACTOR per second, so it settles just
+    under the provider's limit instead of overshooting it again and again.
+    """
+
+    def __init__(self, rate_per_sec, burst=None, clock=time.monotonic):
+        self.max_rate = float(rate_per_sec)
+        self.rate = float(rate_per_sec)
+        self.capacity = float(burst or max(1.0, rate_per_sec))
+        self.clock = clock
+        self.updated = clock()
+        self.tokens = self.capacity
+        self.throttled_at = None
+        self.backed_off_at = None
+        self.raised_at = self.updated
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        # Never bank more than a second's worth at the current rate, so a
+        # backed-off limiter does not answer an idle spell with a full burst
+        capacity = min(self.capacity, max(1.0, self.rate))
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token if one is free. Returns 0, or the seconds until the next one."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+    def backoff(self):
+        with self._lock:
+            now = self.clock()
+            self.throttled_at = now
+            # Requests already in flight when we backed off get throttled too
+            if self.backed_off_at is not None and now - self.backed_off_at < BACKOFF_COOLDOWN_SECONDS:
+                return
+            self._refill()
+            self.rate = max(MIN_RATE_PER_SEC, self.rate / 2)
+            self.tokens = 0.0
+            self.backed_off_at = now
+
+    def recover(self):
+        with self._lock:
+            now = self.clock()
+            if self.rate >= self.max_rate or now - self.raised_at < 1.0:
+                return
+            if self.throttled_at is not None and now - self.throttled_at < RECOVERY_WINDOW_SECONDS:
+                return
+            self._refill()
+            self.rate = min(self.max_rate, self.rate * RECOVERY_FACTOR)
+            self.raised_at = now
+
+
+class Attempt:
+    """
+    One run of a call on a worker thread. The worker records how long its
+    requests waited for rate-limit tokens; the engine loop reads that to time
+    the attempt, and sets abandoned once it stops waiting for the result.
+    """
+
+    def __init__(self, deadline: Optional[float]):
+        self.deadline = deadline
+        self.started = time.monotonic()
+        self.waited = 0.0
+        self.abandoned = False
+
+    def busy_time(self) -> float:
+        """Seconds the attempt has run, not counting waits for rate-limit tokens."""
+        return time.monotonic() - self.started - self.waited
+
+
+class FetchEngine:
+    """
+    Runs blocking provider calls on an asyncio loop in a background thread,
+    with bounded concurrency, an adaptive rate limiter and jittered retries.
+    Synchronous code uses call()/map(); the loop itself never blocks.
+    The rate limit applies per upstream HTTP request: http_session calls
+    before_request()/after_response() around every request, whichever
+    thread makes it, and a call that makes many requests (a bulk download)
+    takes a token for each.
+    A call made from inside another engine call is scheduled like any other,
+    with its own retries, timeout and hedging, but shares its parent's
+    concurrency slot and deadline. Jobs that coordinate several calls
+    (claiming, downloading and storing a batch) run through submit_job() and
+    map_jobs() instead, so no lock they hold is ever left behind in an
+    abandoned attempt.
+    Calls made inside low_priority() only start while no foreground call is
+    in flight, so background work never delays what the user is waiting for.
+    Speculative work can also ask to be cancelled outright when a foreground
+    call arrives.
+    Each attempt is abandoned after timeout seconds, not counting waits for
+    rate-limit tokens, and retried, as are transient errors (see
+    is_transient); calls made inside deadline() raise
+    FetchTimeout once it passes. With hedging
+    on, an attempt still running after the hedge_percentile latency gets a
+    duplicate request and the first answer wins.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, rate_per_sec=DEFAULT_RATE_PER_SEC,
+                 max_retries=DEFAULT_MAX_RETRIES, timeout=DEFAULT_TIMEOUT_SECONDS,
+                 hedge=False, hedge_percentile=DEFAULT_HEDGE_PERCENTILE):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.latency = LatencyTracker()
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.timeouts = 0
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='fetch-worker', initializer=self._mark_worker)
+        # Nested calls get their own threads; their parents are blocked on them
+        self._nested_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency * 2, thread_name_prefix='fetch-nested', initializer=self._mark_worker)
+        self._jobs = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='fetch-job', initializer=self._mark_job)
+        self._background = concurrent.futures.ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix='fetch-task')
+        self._worker = threading.local()
+        self._attempt_local = threading.local()
+        self._priority = threading.local()
+        self._deadline = threading.local()
+        self._foreground = 0
+        self._idle = None
+        self._cancel_on_foreground = set()
+        self._cancel_lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='fetch-engine', daemon=True)
+        self._thread.start()
+        self._semaphore = None
+        self._limiter = RateLimiter(rate_per_sec)
+        asyncio.run_coroutine_threadsafe(self._init(), self._loop).result()
+
+    async def _init(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def _mark_worker(self):
+        self._worker.active = True
+
+    def _mark_job(self):
+        self._worker.job = True
+
+    def _in_worker(self) -> bool:
+        return getattr(self._worker, 'active', False)
+
+    def _check_not_loop(self):
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Blocking FetchEngine methods cannot be used on the engine's own loop")
+
+    @contextlib.contextmanager
+    def low_priority(self, cancel: Optional[threading.Event] = None):
+        """
+        Mark engine calls made by the current thread as background work.
+        If cancel is given it is set as soon as a foreground call arrives, and
+        calls that have not started yet raise FetchCancelled once it is set.
+        """
+        previous = (getattr(self._priority, 'low', False), getattr(self._priority, 'cancel', None))
+        self._priority.low = True
+        self._priority.cancel = cancel
+        if cancel is not None:
+            with self._cancel_lock:
+                self._cancel_on_foreground.add(cancel)
+        try:
+            yield
+        finally:
+            if cancel is not None:
+                with self._cancel_lock:
+                    self._cancel_on_foreground.discard(cancel)
+            self._priority.low, self._priority.cancel = previous
+
+    @contextlib.contextmanager
+    def deadline(self, seconds: float):
+        """
+        Bound every engine call made by the current thread to finish within
+        seconds from now; calls still running then raise FetchTimeout.
+        Nested deadlines keep the earlier of the two.
+        """
+        previous = getattr(self._deadline, 'at', None)
+        at = time.monotonic() + seconds
+        self._deadline.at = at if previous is None else min(previous, at)
+        try:
+            yield
+        finally:
+            self._deadline.at = previous
+
+    def _priority_args(self):
+        return (getattr(self._priority, 'low', False), getattr(self._priority, 'cancel', None),
+                getattr(self._deadline, 'at', None))
+
+    def _set_priority_args(self, low_priority, cancel, deadline):
+        self._priority.low, self._priority.cancel, self._deadline.at = low_priority, cancel, deadline
+
+    def time_left(self) -> Optional[float]:
+        """Seconds left before the current thread's deadline (<= 0 once passed), or None without one."""
+        at = getattr(self._deadline, 'at', None)
+        return None if at is None else at - time.monotonic()
+
+    def before_request(self):
+        """
+        Wait for a rate-limit token before one upstream HTTP request. Raises
+        FetchTimeout once the caller's deadline has passed or the attempt
+        making the request has been abandoned.
+        """
+        attempt = getattr(self._attempt_local, 'current', None)
+        started = time.monotonic()
+        try:
+            while True:
+                if attempt is not None and attempt.abandoned:
+                    raise FetchTimeout("Fetch attempt was abandoned")
+                self._remaining(getattr(self._deadline, 'at', None))
+                wait = self._limiter.try_acquire()
+                if not wait:
+                    return
+                time.sleep(min(wait, TOKEN_POLL_SECONDS))
+        finally:
+            if attempt is not None:
+                attempt.waited += time.monotonic() - started
+
+    def after_response(self, status_code: int):
+        """Feed an upstream HTTP status back into the adaptive rate."""
+        if status_code == 429:
+            self._limiter.backoff()
+        elif status_code < 400:
+            self._limiter.recover()
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long a call may run before it is hedged, or None while hedging is off or untuned."""
+        if not self.hedge or len(self.latency) < MIN_HEDGE_SAMPLES:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    def latency_stats(self) -> Dict:
+        """p50/p95/p99 latency of recent successful calls in seconds, plus hedge and timeout counts."""
+        return {
+            'count': len(self.latency),
+            'p50': self.latency.percentile(50),
+            'p95': self.latency.percentile(95),
+            'p99': self.latency.percentile(99),
+            'hedge_delay': self.hedge_delay(),
+            'hedges_fired': self.hedges_fired,
+            'hedges_won': self.hedges_won,
+            'timeouts': self.timeouts,
+        }
+
+    def reset_latency_stats(self):
+        self.latency.reset()
+        self.hedges_fired = self.hedges_won = self.timeouts = 0
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run fn(*args, **kwargs) under the concurrency and rate limits, retrying on errors."""
+        return await self._run(functools.partial(fn, *args, **kwargs), False, None, getattr(self._deadline, 'at', None))
+
+    async def _run(self, call: Callable, low_priority: bool, cancel: Optional[threading.Event] = None,
+                   deadline: Optional[float] = None, nested: bool = False):
+        try:
+            if nested:
+                # The parent already waited its turn and holds a slot
+                return await self._retry(call, False, cancel, deadline, nested=True)
+            if low_priority:
+                return await self._retry(call, low_priority, cancel, deadline)
+            return await self._foreground_retry(call, cancel, deadline)
+        except FetchTimeout:
+            self.timeouts += 1
+            raise
+
+    async def _foreground_retry(self, call: Callable, cancel: Optional[threading.Event],
+                                deadline: Optional[float]):
+        with self._cancel_lock:
+            for event in self._cancel_on_foreground:
+                event.set()
+        self._foreground += 1
+        self._idle.clear()
+        try:
+            return await self._retry(call, False, cancel, deadline)
+        finally:
+            self._foreground -= 1
+            if self._foreground == 0:
+                self._idle.set()
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise FetchTimeout("Fetch did not finish before its deadline")
+        return remaining
+
+    async def _within(self, awaitable, deadline: Optional[float]):
+        try:
+            return await asyncio.wait_for(awaitable, self._remaining(deadline))
+        except asyncio.TimeoutError:
+            raise FetchTimeout("Fetch did not finish before its deadline")
+
+    async def _wait_idle(self, cancel: Optional[threading.Event]):
+        """Wait until no foreground call is in flight, or until cancel is set."""
+        while not self._idle.is_set():
+            if cancel is not None and cancel.is_set():
+                return
+            try:
+                await asyncio.wait_for(self._idle.wait(), TOKEN_POLL_SECONDS if cancel is not None else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _retry(self, call: Callable, low_priority: bool, cancel: Optional[threading.Event],
+                     deadline: Optional[float], nested: bool = False):
+        executor = self._nested_executor if nested else self._executor
+        attempt = 0
+        while True:
+            if low_priority:
+                await self._within(self._wait_idle(cancel), deadline)
+            if cancel is not None and cancel.is_set():
+                raise FetchCancelled()
+            async with contextlib.nullcontext() if nested else self._semaphore:
+                try:
+                    return await self._attempt(call, executor, deadline)
+                except Exception as e:
+                    if isinstance(e, FetchTimeout):
+                        # Past the caller's deadline there is no time left to retry
+                        self._remaining(deadline)
+                    if is_throttled(e):
+                        self._limiter.backoff()
+                    if attempt >= self.max_retries or not is_transient(e):
+                        raise
+                    error = e
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+            remaining = self._remaining(deadline)
+            if remaining is not None and delay >= remaining:
+                raise error
+            print(f"Fetch failed ({error}), retrying in {delay:.1f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def _run_attempt(self, call: Callable, attempt: Attempt):
+        """Worker-thread side of an attempt: nested calls and requests see its deadline."""
+        self._attempt_local.current = attempt
+        self._set_priority_args(False, None, attempt.deadline)
+        try:
+            return call()
+        finally:
+            self._attempt_local.current = None
+            self._set_priority_args(False, None, None)
+
+    async def _wait(self, pending, attempt: Attempt, budget: Optional[float], deadline: Optional[float]):
+        """
+        Wait for the first of pending to finish, giving up (with an empty set)
+        once attempt has been busy for budget seconds.
+        """
+        while True:
+            timeout = self._remaining(deadline)
+            if budget is not None:
+                left = budget - attempt.busy_time()
+                if left <= 0:
+                    return set()
+                timeout = left if timeout is None else min(timeout, left)
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if done:
+                return done
+
+    async def _attempt(self, call: Callable, executor, deadline: Optional[float]):
+        """
+        Run one attempt of call, hedged with a duplicate if it outlives the hedge
+        delay. Returns the first successful result; an attempt still running
+        after timeout seconds or past the deadline is abandoned (its thread
+        finishes in the background, and its next request raises FetchTimeout).
+        """
+        primary = Attempt(deadline)
+        attempts = {self._loop.run_in_executor(executor, self._run_attempt, call, primary): primary}
+        error = None
+        try:
+            hedge_delay = self.hedge_delay()
+            if hedge_delay is not None and (not self.timeout or hedge_delay < self.timeout):
+                if not await self._wait(set(attempts), primary, hedge_delay, deadline):
+                    self.hedges_fired += 1
+                    hedge = Attempt(deadline)
+                    attempts[self._loop.run_in_executor(executor, self._run_attempt, call, hedge)] = hedge
+            pending = set(attempts)
+            while pending:
+                done = await self._wait(pending, primary, self.timeout or None, deadline)
+                if not done:
+                    raise FetchTimeout(f"Fetch attempt did not finish within {self.timeout:.0f}s")
+                pending -= done
+                for future in done:
+                    if future.exception() is None:
+                        self.latency.record(attempts[future].busy_time())
+                        if attempts[future] is not primary:
+                            self.hedges_won += 1
+                        return future.result()
+                    error = future.exception()
+            raise error
+        finally:
+            # Losers and abandoned attempts keep running; drop their outcome quietly
+            for future, attempt in attempts.items():
+                if not future.done():
+                    attempt.abandoned = True
+                    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def submit(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Schedule fn on the engine and return a concurrent.futures.Future."""
+        call = functools.partial(fn, *args, **kwargs)
+        return asyncio.run_coroutine_threadsafe(self._run(call, *self._priority_args(), nested=self._in_worker()),
+                                                self._loop)
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn on the engine and wait for its result; raises FetchTimeout past the deadline."""
+        self._check_not_loop()
+        return self.submit(fn, *args, **kwargs).result()
+
+    def map(self, fn: Callable, items: Iterable, return_exceptions=True) -> List:
+        """Run fn(item) for every item concurrently and return results in order."""
+        self._check_not_loop()
+        items = list(items)
+        low_priority, cancel, deadline = self._priority_args()
+        nested = self._in_worker()
+
+        async def gather():
+            return await asyncio.gather(*(self._run(functools.partial(fn, item), low_priority, cancel, deadline,
+                                                    nested)
+                                          for item in items),
+                                        return_exceptions=return_exceptions)
+
+        return asyncio.run_coroutine_threadsafe(gather(), self._loop).result()
+
+    def _run_job(self, job: Callable, low_priority, cancel, deadline):
+        previous = self._priority_args()
+        self._set_priority_args(low_priority, cancel, deadline)
+        try:
+            return job()
+        finally:
+            self._set_priority_args(*previous)
+
+    def submit_job(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Run a blocking job that makes its own engine calls, such as a batch
+        that claims, downloads and stores symbols. Jobs are not engine calls:
+        they get no retries or timeouts, hold no concurrency slot, and their
+        calls keep the caller's priority and deadline.
+        """
+        job = functools.partial(fn, *args, **kwargs)
+        if getattr(self._worker, 'job', False) or self._in_worker():
+            # Waiting on the job pool from inside it could exhaust it; run here instead
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(job())
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._jobs.submit(self._run_job, job, *self._priority_args())
+
+    def map_jobs(self, fn: Callable, items: Iterable, return_exceptions=True) -> List:
+        """Run the job fn(item) for every item concurrently and return results in order."""
+        futures = [self.submit_job(fn, item) for item in items]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    def run_in_background(self, fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Run a blocking job (that may itself use the engine) off the caller's thread."""
+        return self._background.submit(fn, *args, **kwargs)
+
+    @property
+    def rate(self) -> float:
+        return self._limiter.rate
+
+    def shutdown(self):
+        """
+        Stop the loop thread and the worker pools. Calls still waiting on the
+        engine are cancelled; attempts already running on a worker finish in
+        the background. The engine cannot be used afterwards.
+        """
+        if self._loop.is_closed():
+            return
+        self._check_not_loop()
+        asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        for executor in (self._executor, self._nested_executor, self._jobs, self._background):
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _cancel_tasks(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+_engine: Optional[FetchEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> FetchEngine:
+    """Return the process-wide fetch engine, configured from config.json."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            config = load_config()
+            _engine = FetchEngine(
+                concurrency=int(config.get("fetch_concurrency", DEFAULT_CONCURRENCY)),
+                rate_per_sec=float(config.get("fetch_rate_per_sec", DEFAULT_RATE_PER_SEC)),
+                timeout=float(config.get("fetch_timeout_sec", DEFAULT_TIMEOUT_SECONDS)),
+                hedge=bool(config.get("hedge_requests", False)),
+                hedge_percentile=float(config.get("hedge_percentile", DEFAULT_HEDGE_PERCENTILE)),
+            )
+        return _engine
+
+
+def set_engine(engine: Optional[FetchEngine]):
+    """
+    Replace the process-wide engine, e.g. to run a load test with different
+    limits, and shut the previous one down. None goes back to the config.
+    """
+    global _engine
+    with _engine_lock:
+        previous, _engine = _engine, engine
+    if previous is not None and previous is not engine:
+        previous.shutdown()
@@ -0,0 +1,121 @@
+import contextlib
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# How often a waiting process re-checks a lock it could not take
+LOCK_POLL_SECONDS = 0.05
+
+
+class FileLock:
+    """
+    Exclusive lock shared between threads and processes through a lock file.
+    Reentrant within a process: the thread holding it may acquire it again,
+    and only the outermost release() unlocks the file. Use one FileLock
+    object per path per process (see cache_manager.cache_lock).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def _try_lock_file(self) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _lock_file(self, blocking, timeout) -> bool:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        if blocking and timeout is None and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_lock_file():
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                os.close(self._fd)
+                self._fd = None
+                return False
+            time.sleep(LOCK_POLL_SECONDS)
+        return True
+
+    def _unlock_file(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def acquire(self, blocking=True, timeout=None) -> bool:
+        """Take the lock; returns False if not blocking (or timed out) and it is held elsewhere."""
+        if not blocking:
+            acquired = self._thread_lock.acquire(False)
+        elif timeout is None:
+            acquired = self._thread_lock.acquire()
+        else:
+            acquired = self._thread_lock.acquire(True, timeout)
+        if not acquired:
+            return False
+        if self._depth == 0:
+            try:
+                locked = self._lock_file(blocking, timeout)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            if not locked:
+                self._thread_lock.release()
+                return False
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                self._unlock_file()
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='wb'):
+    """
+    Open a temporary file next to path and move it over path on success.
+    Readers in other processes see either the old file or the complete new
+    one, never a partial write. On error the temporary file is removed.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,322 @@
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy is not installed. Please install it with 'pip install numpy'.")
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
+import json
+import os
+import threading
+import time
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+from stock_analyzer.data.cache_manager import cache_lock, get_cache_dir
+from stock_analyzer.data.columnar_store import remove_stale_files
+from stock_analyzer.data.fetch_engine import get_engine
+from stock_analyzer.data.file_lock import atomic_write
+from stock_analyzer.data.metadata_cache import get_ticker_entry
+from stock_analyzer.data.stock_fetcher import get_exchange_for_symbol, normalize_symbol
+
+# On-disk layout of the snapshot, in cache/fundamentals:
+#   meta.json            row count, generation, symbols in row order and the
+#                        category list of every text column
+#   <column>.<gen>.f64   one float64 array per numeric column (NaN = unknown)
+#   <column>.<gen>.i32   one int32 array of category codes per text column (-1 = unknown)
+# Like bar tables, a refresh writes a new generation and then atomically
+# replaces meta.json, so readers never see a half-written snapshot.
+
+NUMERIC_COLUMNS = ['price', 'market_cap', 'volume', 'pe_ratio', 'dividend_yield', 'fetched_at']
+TEXT_COLUMNS = ['exchange', 'currency', 'sector', 'industry']
+
+META_FILE = 'meta.json'
+SNAPSHOT_KEY = 'fundamentals'
+
+_FILTER_OPS = {
+    '==': np.equal, '!=': np.not_equal, '<': np.less, '<=': np.less_equal,
+    '>': np.greater, '>=': np.greater_equal,
+}
+
+
+def get_fundamentals_dir():
+    directory = os.path.join(get_cache_dir(), 'fundamentals')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _array_file(column, generation):
+    return f"{column}.{generation}.{'i32' if column in TEXT_COLUMNS else 'f64'}"
+
+
+def _row_from_entry(symbol, entry: Dict) -> Dict:
+    info = entry['info']
+    return {
+        'symbol': symbol,
+        'exchange': get_exchange_for_symbol(symbol),
+        'currency': info.get('currency'),
+        'price': info.get('regularMarketPrice') or info.get('currentPrice'),
+        'market_cap': info.get('marketCap'),
+        'volume': info.get('volume'),
+        'pe_ratio': info.get('trailingPE'),
+        'dividend_yield': info.get('dividendYield'),
+        'sector': info.get('sector'),
+        'industry': info.get('industry'),
+        'fetched_at': entry['fetched_at'],
+    }
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value) if value is not None else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class FundamentalsSnapshot:
+    """
+    One column array per field for every symbol in the snapshot. Text columns
+    are dictionary-encoded, so filters and group-bys compare integer codes.
+    query() and group_by() only build a DataFrame for the rows they return.
+    """
+
+    def __init__(self, symbols: List[str], numeric: Dict[str, np.ndarray],
+                 codes: Dict[str, np.ndarray], categories: Dict[str, List[str]]):
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.numeric = numeric
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict]) -> 'FundamentalsSnapshot':
+        numeric = {column: np.array([_to_float(row.get(column)) for row in rows], dtype=np.float64)
+                   for column in NUMERIC_COLUMNS}
+        codes = {}
+        categories = {}
+        for column in TEXT_COLUMNS:
+            values = [row.get(column) or None for row in rows]
+            categories[column] = sorted({value for value in values if value is not None})
+            lookup = {value: i for i, value in enumerate(categories[column])}
+            codes[column] = np.array([lookup.get(value, -1) for value in values], dtype=np.int32)
+        return cls([row['symbol'] for row in rows], numeric, codes, categories)
+
+    def rows(self) -> List[Dict]:
+        """Every row as a dict, e.g. to merge a refresh into the snapshot."""
+        text = {column: [self.categories[column][code] if code >= 0 else None for code in self.codes[column]]
+                for column in TEXT_COLUMNS}
+        rows = []
+        for i, symbol in enumerate(self.symbols):
+            row = {'symbol': symbol}
+            for column in NUMERIC_COLUMNS:
+                value = self.numeric[column][i]
+                row[column] = None if np.isnan(value) else float(value)
+            for column in TEXT_COLUMNS:
+                row[column] = text[column][i]
+            rows.append(row)
+        return rows
+
+    def _codes_for(self, column, values) -> np.ndarray:
+        lookup = {value: i for i, value in enumerate(self.categories[column])}
+        return np.array([lookup[value] for value in values if value in lookup], dtype=np.int32)
+
+    def mask(self, filters: Optional[Sequence[Tuple]] = None) -> np.ndarray:
+        """
+        Boolean row mask for filters, a list of (column, op, value) tuples that
+        must all hold. op is one of ==, !=, <, <=, >, >= or 'in' (value is a
+        list). Rows with an unknown value never match.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for column, op, value in filters or []:
+            if column in TEXT_COLUMNS:
+                codes = self.codes[column]
+                if op == 'in':
+                    matched = np.isin(codes, self._codes_for(column, value))
+                elif op in ('==', '!='):
+                    wanted = self._codes_for(column, [value])
+                    matched = np.isin(codes, wanted)
+                    if op == '!=':
+                        matched = ~matched & (codes >= 0)
+                else:
+                    raise ValueError(f"Unsupported filter on text column {column}: {op}")
+            elif column in NUMERIC_COLUMNS:
+                values = self.numeric[column]
+                if op == 'in':
+                    matched = np.isin(values, np.asarray(value, dtype=np.float64))
+                elif op in _FILTER_OPS:
+                    with np.errstate(invalid='ignore'):
+                        matched = _FILTER_OPS[op](values, value) & ~np.isnan(values)
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+            elif column == 'symbol':
+                if op not in ('==', 'in'):
+                    raise ValueError(f"Unsupported filter on symbol: {op}")
+                matched = np.isin(self.symbols, list(value) if op == 'in' else [value])
+            else:
+                raise ValueError(f"Unknown column: {column}")
+            mask &= matched
+        return mask
+
+    def _frame(self, rows: np.ndarray, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        columns = columns or TEXT_COLUMNS[:2] + NUMERIC_COLUMNS[:-1] + TEXT_COLUMNS[2:]
+        data = {}
+        for column in columns:
+            if column in NUMERIC_COLUMNS:
+                data[column] = self.numeric[column][rows]
+            else:
+                categories = np.asarray(self.categories[column] + [None], dtype=object)
+                # Code -1 indexes the trailing None
+                data[column] = categories[self.codes[column][rows]]
+        return pd.DataFrame(data, index=pd.Index(self.symbols[rows], name='symbol'))
+
+    def query(self, filters: Optional[Sequence[Tuple]] = None, sort_by: Optional[str] = None,
+              descending: bool = False, limit: Optional[int] = None,
+              columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Rows matching filters (see mask()), optionally sorted by one numeric
+        column with unknown values last, and cut to limit rows.
+        """
+        rows = np.flatnonzero(self.mask(filters))
+        if sort_by is not None:
+            if sort_by not in NUMERIC_COLUMNS:
+                raise ValueError(f"Can only sort by a numeric column, not {sort_by}")
+            values = self.numeric[sort_by][rows]
+            keys = -values if descending else values
+            # NaN sorts to the end either way
+            rows = rows[np.argsort(keys, kind='stable')]
+        if limit is not None:
+            rows = rows[:limit]
+        return self._frame(rows, columns)
+
+    def group_by(self, column: str = 'sector', value: str = 'market_cap', how: str = 'sum',
+                 filters: Optional[Sequence[Tuple]] = None) -> pd.Series:
+        """
+        Aggregate a numeric column per category of a text column: how is one of
+        count, sum, mean, median, min or max. Unknown values are left out.
+        """
+        if column not in TEXT_COLUMNS or value not in NUMERIC_COLUMNS:
+            raise ValueError(f"Can only group a numeric column by a text column, not {value} by {column}")
+        codes = self.codes[column]
+        values = self.numeric[value]
+        keep = self.mask(filters) & (codes >= 0) & ~np.isnan(values)
+        codes = codes[keep]
+        values = values[keep]
+        groups = len(self.categories[column])
+        counts = np.bincount(codes, minlength=groups)
+        if how == 'count':
+            result = counts.astype(np.float64)
+        elif how in ('sum', 'mean'):
+            result = np.bincount(codes, weights=values, minlength=groups)
+            if how == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = result / counts
+        elif how in ('min', 'max'):
+            result = np.full(groups, np.inf if how == 'min' else -np.inf)
+            (np.minimum if how == 'min' else np.maximum).at(result, codes, values)
+        elif how == 'median':
+            order = np.lexsort((values, codes))
+            sorted_values = values[order]
+            ends = np.cumsum(counts)
+            starts = ends - counts
+            result = np.full(groups, np.nan)
+            present = counts > 0
+            lower = sorted_values[(starts + (counts - 1) // 2)[present]]
+            upper = sorted_values[(starts + counts // 2)[present]]
+            result[present] = (lower + upper) / 2
+        else:
+            raise ValueError(f"Unsupported aggregation: {how}")
+        present = counts > 0
+        return pd.Series(result[present], index=pd.Index(np.asarray(self.categories[column], dtype=object)[present],
+                                                         name=column), name=f"{value}_{how}")
+
+
+def write_snapshot(snapshot: FundamentalsSnapshot, directory=None):
+    """Store a snapshot as a new generation. Callers serialize writers (see refresh_fundamentals)."""
+    directory = directory or get_fundamentals_dir()
+    previous = read_snapshot_meta(directory) or {}
+    generation = previous.get('generation', 0) + 1
+    for column in NUMERIC_COLUMNS:
+        snapshot.numeric[column].astype(np.float64).tofile(os.path.join(directory, _array_file(column, generation)))
+    for column in TEXT_COLUMNS:
+        snapshot.codes[column].astype(np.int32).tofile(os.path.join(directory, _array_file(column, generation)))
+    meta = {'rows': len(snapshot), 'generation': generation, 'refreshed_at': time.time(),
+            'symbols': list(snapshot.symbols), 'categories': snapshot.categories}
+    with atomic_write(os.path.join(directory, META_FILE), 'w') as f:
+        json.dump(meta, f)
+    remove_stale_files(directory, {META_FILE} | {_array_file(column, generation)
+                                                 for column in NUMERIC_COLUMNS + TEXT_COLUMNS})
+
+
+def read_snapshot_meta(directory=None) -> Optional[Dict]:
+    filepath = os.path.join(directory or get_fundamentals_dir(), META_FILE)
+    try:
+        if os.path.exists(filepath):
+            with open(filepath, 'r') as f:
+                return json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error reading fundamentals snapshot metadata: {e}")
+    return None
+
+
+_snapshot: Optional[FundamentalsSnapshot] = None
+_snapshot_generation = None
+_snapshot_lock = threading.Lock()
+
+
+def load_fundamentals(directory=None) -> Optional[FundamentalsSnapshot]:
+    """
+    Return the stored snapshot, or None if none was built yet. Arrays are read
+    once per generation and kept in memory, so repeated queries do no I/O
+    beyond checking meta.json.
+    """
+    global _snapshot, _snapshot_generation
+    directory = directory or get_fundamentals_dir()
+    meta = read_snapshot_meta(directory)
+    if meta is None:
+        return None
+    with _snapshot_lock:
+        if _snapshot is not None and _snapshot_generation == (directory, meta['generation']):
+            return _snapshot
+        generation = meta['generation']
+        try:
+            numeric = {column: np.fromfile(os.path.join(directory, _array_file(column, generation)),
+                                           dtype=np.float64) for column in NUMERIC_COLUMNS}
+            codes = {column: np.fromfile(os.path.join(directory, _array_file(column, generation)),
+                                         dtype=np.int32) for column in TEXT_COLUMNS}
+        except (IOError, ValueError) as e:
+            print(f"Error reading fundamentals snapshot: {e}")
+            return None
+        _snapshot = FundamentalsSnapshot(meta['symbols'], numeric, codes, meta['categories'])
+        _snapshot_generation = (directory, generation)
+        return _snapshot
+
+
+def refresh_fundamentals(symbols: List[str], max_age: float = 0) -> Dict:
+    """
+    Look up the symbols concurrently and merge them into the stored snapshot.
+    Prices and volumes move daily, so by default every symbol is fetched
+    again; max_age (seconds) lets metadata cached more recently than that be
+    reused instead. Each row's fetched_at is when its data was fetched.
+    Symbols whose lookup fails keep their previous row.
+    Returns a summary dict: rows in the snapshot, symbols refreshed and failed.
+    """
+    tickers = list(dict.fromkeys(normalize_symbol(symbol) for symbol in symbols))
+    entries = get_engine().map_jobs(partial(get_ticker_entry, max_age=max_age), tickers)
+    fresh = {}
+    failed = 0
+    for ticker, entry in zip(tickers, entries):
+        # An entry without a single field (e.g. cached before empty answers were
+        # rejected) would only overwrite the symbol's row with unknowns
+        if isinstance(entry, dict) and any(value is not None for value in entry['info'].values()):
+            fresh[ticker] = _row_from_entry(ticker, entry)
+        else:
+            failed += 1
+    with cache_lock(SNAPSHOT_KEY):
+        current = load_fundamentals()
+        rows = {row['symbol']: row for row in (current.rows() if current is not None else [])}
+        rows.update(fresh)
+        snapshot = FundamentalsSnapshot.from_rows([rows[symbol] for symbol in sorted(rows)])
+        write_snapshot(snapshot)
+    return {'rows': len(snapshot), 'refreshed': len(fresh), 'failed': failed}
@@ -0,0 +1,182 @@
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
+import datetime
+import threading
+import time
+from typing import Dict, List, Optional
+from stock_analyzer.data.providers import get_provider
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# Minor currency units Yahoo quotes some exchanges in: (major currency, scale)
+MINOR_CURRENCY_UNITS = {
+    'GBp': ('GBP', 0.01),
+}
+
+# Earliest date fetched for a currency when nothing older is requested
+DEFAULT_HISTORY_START = datetime.date(2000, 1, 1)
+
+# A currency whose download failed is not asked for again for this long, so
+# every conversion in a batch does not repeat the same failing request
+FAILED_CURRENCY_RETRY_SECONDS = 300
+
+# Session-wide table of "units of currency per 1 USD", one series per currency
+_usd_series: Dict[str, pd.Series] = {}
+_series_start: Dict[str, datetime.date] = {}
+_fetched_on: Dict[str, datetime.date] = {}
+_failed_at: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def split_currency(currency: str):
+    """Return (major currency, scale) for a currency code, handling minor units like GBp."""
+    return MINOR_CURRENCY_UNITS.get(currency, (currency, 1.0))
+
+
+def _to_date(value) -> datetime.date:
+    return pd.Timestamp(value).date()
+
+
+def _needs_fetch(currency: str, start: datetime.date) -> bool:
+    if currency == 'USD':
+        return False
+    failed_at = _failed_at.get(currency)
+    if failed_at is not None and time.monotonic() - failed_at < FAILED_CURRENCY_RETRY_SECONDS:
+        return False
+    if currency not in _usd_series:
+        return True
+    if start < _series_start[currency]:
+        return True
+    # Pick up new daily closes once per day
+    return _fetched_on[currency] < datetime.date.today()
+
+
+def ensure_currencies(currencies: List[str], start_date=None):
+    """
+    Make sure a USD series is loaded for every currency in `currencies`.
+    Missing currencies are downloaded together in one bulk request.
+    Currencies that failed are skipped for FAILED_CURRENCY_RETRY_SECONDS.
+    """
+    start = min(_to_date(start_date), DEFAULT_HISTORY_START) if start_date else DEFAULT_HISTORY_START
+    majors = sorted({split_currency(c)[0] for c in currencies if c})
+    with _lock:
+        missing = [c for c in majors if _needs_fetch(c, start)]
+        if not missing:
+            return
+        for currency in missing:
+            start = min(start, _series_start.get(currency, start))
+        try:
+            fetched = get_provider().fx_history(missing, start)
+        except Exception as e:
+            print(f"Error fetching exchange rates for {missing}: {e}")
+            _failed_at.update(dict.fromkeys(missing, time.monotonic()))
+            return
+        for currency in missing:
+            series = fetched.get(currency)
+            if series is None or series.empty:
+                print(f"Could not get exchange rate series for USD{currency}=X")
+                _failed_at[currency] = time.monotonic()
+                continue
+            _failed_at.pop(currency, None)
+            _usd_series[currency] = _clean_series(series)
+            _series_start[currency] = start
+            _fetched_on[currency] = datetime.date.today()
+
+
+def _clean_series(close) -> pd.Series:
+    close = close.dropna()
+    close.index = to_naive_dates(close.index)
+    return close[~close.index.duplicated(keep='last')].astype(float)
+
+
+def to_naive_dates(index) -> pd.DatetimeIndex:
+    """Normalize an index to tz-naive midnight dates in the exchange's local time."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.normalize()
+
+
+def _aligned_usd_rates(currency: str, dates: pd.DatetimeIndex) -> Optional[pd.Series]:
+    """
+    Units of `currency` per USD for each date, carrying the last known rate
+    forward. dates may repeat, e.g. the days of intraday bars.
+    """
+    if currency == 'USD':
+        return pd.Series(1.0, index=dates)
+    series = _usd_series.get(currency)
+    if series is None:
+        return None
+    days = dates.unique()
+    aligned = series.reindex(series.index.union(days)).ffill().bfill().reindex(days)
+    return pd.Series(aligned.reindex(dates).to_numpy(), index=dates)
+
+
+def get_rate_table(currencies: List[str], start_date, end_date) -> pd.DataFrame:
+    """Return a daily table of units-per-USD with one column per currency."""
+    ensure_currencies(currencies, start_date)
+    dates = pd.date_range(start_date, end_date, freq='D')
+    table = {}
+    for currency in currencies:
+        major, scale = split_currency(currency)
+        rates = _aligned_usd_rates(major, dates)
+        if rates is not None:
+            table[currency] = rates / scale
+    return pd.DataFrame(table, index=dates)
+
+
+def get_cross_rates(from_currency: str, to_currency: str, index) -> Optional[pd.Series]:
+    """
+    Per-date rate converting `from_currency` into `to_currency`, triangulated
+    through USD and aligned to `index`. Returns None if a series is unavailable.
+    """
+    if from_currency == to_currency:
+        return pd.Series(1.0, index=index)
+    from_major, from_scale = split_currency(from_currency)
+    to_major, to_scale = split_currency(to_currency)
+    if len(index) > 0:
+        ensure_currencies([from_major, to_major], index[0])
+    dates = to_naive_dates(index)
+    from_rates = _aligned_usd_rates(from_major, dates)
+    to_rates = _aligned_usd_rates(to_major, dates)
+    if from_rates is None or to_rates is None:
+        return None
+    cross = (to_rates.values / from_rates.values) * (from_scale / to_scale)
+    return pd.Series(cross, index=index)
+
+
+def convert_ohlc(df: pd.DataFrame, from_currency: str, to_currency: str) -> pd.DataFrame:
+    """
+    Convert the OHLC columns of `df` with one vectorized per-date multiply.
+    Returns a new DataFrame; falls back to the unconverted data if rates are missing.
+    """
+    if df is None or df.empty or from_currency == to_currency:
+        return df
+    rates = get_cross_rates(from_currency, to_currency, df.index)
+    if rates is None:
+        print(f"Could not get exchange rates for {from_currency} to {to_currency}, using {from_currency}")
+        return df
+    columns = [col for col in PRICE_COLUMNS if col in df.columns]
+    converted = df.copy()
+    converted[columns] = df[columns].mul(rates, axis=0)
+    return converted
+
+
+def get_latest_rate(from_currency: str, to_currency: str) -> Optional[float]:
+    """Latest known rate converting `from_currency` into `to_currency`."""
+    today = pd.DatetimeIndex([pd.Timestamp(datetime.date.today())])
+    rates = get_cross_rates(from_currency, to_currency, today)
+    if rates is None:
+        return None
+    return float(rates.iloc[-1])
+
+
+def clear_rates():
+    """Drop all loaded FX series so the next request refetches them."""
+    with _lock:
+        _usd_series.clear()
+        _series_start.clear()
+        _fetched_on.clear()
+        _failed_at.clear()
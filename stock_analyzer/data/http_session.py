@@ -0,0 +1,160 @@
+import contextlib
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+from stock_analyzer.data.fetch_engine import get_engine
+from stock_analyzer.utils.helpers import load_config
+
+# yfinance needs curl_cffi sessions (browser TLS fingerprint); it is installed with yfinance
+try:
+    from curl_cffi import CurlInfo, CurlOpt
+    from curl_cffi import requests as curl_requests
+except ImportError:
+    curl_requests = None
+
+# Keep-alive connections each fetch worker keeps open
+DEFAULT_HTTP_POOL_SIZE = 8
+
+
+class ConnectionStats:
+    """Counts requests and whether each one opened a new connection or reused a pooled one."""
+
+    def __init__(self):
+        self.requests = 0
+        self.opened = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def record(self, new_connections):
+        with self._lock:
+            self.requests += 1
+            if new_connections:
+                self.opened += new_connections
+            else:
+                self.reused += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'opened': self.opened,
+                'reused': self.reused,
+                'reuse_ratio': self.reused / self.requests if self.requests else 0.0,
+            }
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.opened = self.reused = 0
+
+
+_stats = ConnectionStats()
+
+# Per-thread list the statuses of requests are appended to, see record_statuses()
+_recording = threading.local()
+
+# Base URL that replaces Yahoo's hosts, e.g. the fake_yahoo test server
+_upstream: Optional[str] = None
+
+
+def set_upstream(base_url: Optional[str]):
+    """Send every Yahoo request to base_url (scheme://host:port) instead; None restores Yahoo."""
+    global _upstream
+    _upstream = base_url.rstrip('/') if base_url else None
+
+
+def _route(url):
+    if _upstream is None or not isinstance(url, str):
+        return url
+    parts = urlsplit(url)
+    if not (parts.hostname or '').endswith('yahoo.com'):
+        return url
+    return _upstream + parts.path + (f"?{parts.query}" if parts.query else '')
+
+
+@contextlib.contextmanager
+def record_statuses():
+    """
+    Collect the HTTP status of every request this thread makes through the
+    shared session inside the block, with None for requests that raised.
+    yfinance hides failed requests, so this tells an outage from a real answer.
+    """
+    statuses = []
+    previous = getattr(_recording, 'statuses', None)
+    _recording.statuses = statuses
+    try:
+        yield statuses
+    finally:
+        _recording.statuses = previous
+
+
+def _record_status(status):
+    statuses = getattr(_recording, 'statuses', None)
+    if statuses is not None:
+        statuses.append(status)
+
+
+if curl_requests is not None:
+    class PooledSession(curl_requests.Session):
+        """
+        curl_cffi session that records connection reuse for every request.
+        Each request takes a token from the fetch engine's rate limiter, and
+        429 answers slow the limiter down, whichever thread makes the request.
+        """
+
+        def request(self, method, url, *args, **kwargs):
+            engine = get_engine()
+            engine.before_request()
+            try:
+                response = super().request(method, _route(url), *args, **kwargs)
+            except Exception:
+                _record_status(None)
+                raise
+            _stats.record(response.infos.get(CurlInfo.NUM_CONNECTS, 0))
+            _record_status(response.status_code)
+            engine.after_response(response.status_code)
+            return response
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_pool_size() -> int:
+    return max(1, int(load_config().get("http_pool_size", DEFAULT_HTTP_POOL_SIZE)))
+
+
+def get_session():
+    """
+    Return the process-wide keep-alive session every yfinance call shares, so
+    TLS handshakes and cookies are reused instead of redone per call.
+    Each fetch worker thread keeps up to 'http_pool_size' connections open.
+    Returns None if curl_cffi is unavailable; yfinance then uses its own.
+    """
+    global _session
+    with _session_lock:
+        if _session is None and curl_requests is not None:
+            pool_size = get_pool_size()
+            _session = PooledSession(
+                impersonate="chrome",
+                curl_options={CurlOpt.MAXCONNECTS: pool_size},
+                curl_infos=[CurlInfo.NUM_CONNECTS],
+            )
+        return _session
+
+
+def get_connection_stats() -> Dict:
+    """Requests made through the shared session and how many connections they opened vs reused."""
+    return _stats.snapshot()
+
+
+def reset_connection_stats():
+    _stats.reset()
+
+
+def close_session():
+    """Close the shared session and its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Small key-value server for sharing one warm cache between machines.
+
+    python -m stock_analyzer.data.kv_server --host 0.0.0.0 --port 7878 --max-mb 2048
+
+Values live in memory with least-recently-used eviction beyond --max-mb.
+Clients connect with cache_backends.NetworkBackend.
+
+Protocol: every message is a 4-byte big-endian length followed by the body.
+A request body is one op byte and a 4-byte item count, then the items:
+    G  multi-get   keys                 -> per key: found flag byte, value
+    S  multi-set   key, value pairs     -> count of items stored
+    D  delete      keys                 -> count of keys deleted
+    P  ping        (no items)           -> count 0
+Keys and values are 4-byte length-prefixed byte strings; keys are UTF-8.
+"""
+
+import argparse
+import socket
+import socketserver
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+DEFAULT_PORT = 7878
+DEFAULT_MAX_MB = 1024
+
+# Upper bound on one message, so a corrupt length cannot exhaust memory
+MAX_MESSAGE_BYTES = 1024 * 1024 * 1024
+
+_LENGTH = struct.Struct('>I')
+
+
+def recv_exact(sock, size) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("Connection closed")
+        received += count
+    return bytes(buffer)
+
+
+def recv_message(sock) -> bytes:
+    size = _LENGTH.unpack(recv_exact(sock, 4))[0]
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes is too large")
+    return recv_exact(sock, size)
+
+
+def send_message(sock, parts: List[bytes]):
+    body = b''.join(parts)
+    sock.sendall(_LENGTH.pack(len(body)) + body)
+
+
+def pack_item(data: bytes) -> bytes:
+    return _LENGTH.pack(len(data)) + data
+
+
+def unpack_items(body, offset, count) -> Tuple[List[bytes], int]:
+    items = []
+    for _ in range(count):
+        size = _LENGTH.unpack_from(body, offset)[0]
+        offset += 4
+        items.append(body[offset:offset + size])
+        offset += size
+    return items, offset
+
+
+class KeyValueStore:
+    """Thread-safe byte store with LRU eviction over a byte budget."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._values: "OrderedDict[bytes, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys) -> List[Optional[bytes]]:
+        with self._lock:
+            values = []
+            for key in keys:
+                value = self._values.get(key)
+                if value is not None:
+                    self._values.move_to_end(key)
+                values.append(value)
+            return values
+
+    def set_many(self, items) -> int:
+        with self._lock:
+            for key, value in items:
+                previous = self._values.pop(key, None)
+                if previous is not None:
+                    self._bytes -= len(key) + len(previous)
+                self._values[key] = value
+                self._bytes += len(key) + len(value)
+            while self._bytes > self.max_bytes and self._values:
+                key, value = self._values.popitem(last=False)
+                self._bytes -= len(key) + len(value)
+            return len(items)
+
+    def delete_many(self, keys) -> int:
+        with self._lock:
+            deleted = 0
+            for key in keys:
+                value = self._values.pop(key, None)
+                if value is not None:
+                    self._bytes -= len(key) + len(value)
+                    deleted += 1
+            return deleted
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        store = self.server.store
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                body = recv_message(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+            op = body[:1]
+            count = _LENGTH.unpack_from(body, 1)[0] if len(body) >= 5 else 0
+            if op == b'G':
+                keys, _ = unpack_items(body, 5, count)
+                parts = [_LENGTH.pack(count)]
+                for value in store.get_many(keys):
+                    parts.append(b'\x00' if value is None else b'\x01' + pack_item(value))
+                send_message(self.request, parts)
+            elif op == b'S':
+                items, _ = unpack_items(body, 5, count * 2)
+                stored = store.set_many(list(zip(items[0::2], items[1::2])))
+                send_message(self.request, [_LENGTH.pack(stored)])
+            elif op == b'D':
+                keys, _ = unpack_items(body, 5, count)
+                send_message(self.request, [_LENGTH.pack(store.delete_many(keys))])
+            elif op == b'P':
+                send_message(self.request, [_LENGTH.pack(0)])
+            else:
+                return
+
+
+class KeyValueServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.store = KeyValueStore(max_bytes)
+        super().__init__(address, _Handler)
+
+
+def start_server(host='127.0.0.1', port=0, max_mb=DEFAULT_MAX_MB) -> KeyValueServer:
+    """Serve in a daemon thread of this process; port 0 picks a free port (see server.server_address)."""
+    server = KeyValueServer((host, port), int(max_mb * 1024 * 1024))
+    threading.Thread(target=server.serve_forever, name='kv-server', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared cache key-value server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_MB)
+    args = parser.parse_args()
+    server = KeyValueServer((args.host, args.port), int(args.max_mb * 1024 * 1024))
+    print(f"Cache server listening on {args.host}:{args.port} ({args.max_mb:g} MB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
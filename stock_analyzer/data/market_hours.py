@@ -0,0 +1,84 @@
+import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+from stock_analyzer.data.symbol_registry import exchange_for_suffix
+
+# Regular trading session of each exchange: (time zone, open, close), local time
+EXCHANGE_SESSIONS = {
+    'NYSE': ('America/New_York', datetime.time(9, 30), datetime.time(16, 0)),
+    'NASDAQ': ('America/New_York', datetime.time(9, 30), datetime.time(16, 0)),
+    'LSE': ('Europe/London', datetime.time(8, 0), datetime.time(16, 30)),
+    'TSE': ('Asia/Tokyo', datetime.time(9, 0), datetime.time(15, 30)),
+    'NSE': ('Asia/Kolkata', datetime.time(9, 15), datetime.time(15, 30)),
+    'BSE': ('Asia/Kolkata', datetime.time(9, 15), datetime.time(15, 30)),
+}
+
+# Yahoo keeps revising a daily bar for a short while after the close
+SETTLE_MINUTES = 30
+
+# How long a bar from a session that is still open is reused before refetching
+LIVE_BAR_TTL_SECONDS = 15 * 60
+
+
+def exchange_for_symbol(normalized_symbol: str) -> str:
+    # Bare symbols trade in the US
+    return exchange_for_suffix(normalized_symbol) or 'NYSE'
+
+
+def _session_bounds(exchange, day: datetime.date):
+    """(open, settled) datetimes of the exchange's session on day, or None on weekends."""
+    if day.weekday() >= 5:
+        return None
+    tz_name, open_time, close_time = EXCHANGE_SESSIONS.get(exchange, EXCHANGE_SESSIONS['NYSE'])
+    tz = ZoneInfo(tz_name)
+    opened = datetime.datetime.combine(day, open_time, tzinfo=tz)
+    settled = datetime.datetime.combine(day, close_time, tzinfo=tz) + datetime.timedelta(minutes=SETTLE_MINUTES)
+    return opened, settled
+
+
+def _local_now(exchange, now: Optional[float] = None) -> datetime.datetime:
+    tz_name = EXCHANGE_SESSIONS.get(exchange, EXCHANGE_SESSIONS['NYSE'])[0]
+    if now is None:
+        return datetime.datetime.now(ZoneInfo(tz_name))
+    return datetime.datetime.fromtimestamp(now, ZoneInfo(tz_name))
+
+
+def final_bars_end(exchange, now: Optional[float] = None) -> datetime.date:
+    """
+    Exclusive exchange-local date before which every daily bar is final.
+    Bars for earlier sessions can never change; the bar of a session that has
+    not closed (and settled) yet may. Holidays are not modelled: a holiday
+    simply looks like a closed session without a bar.
+    """
+    local = _local_now(exchange, now)
+    today = local.date()
+    bounds = _session_bounds(exchange, today)
+    if bounds is not None and local < bounds[1]:
+        return today
+    return today + datetime.timedelta(days=1)
+
+
+def is_session_open(exchange, now: Optional[float] = None) -> bool:
+    local = _local_now(exchange, now)
+    bounds = _session_bounds(exchange, local.date())
+    return bounds is not None and bounds[0] <= local < bounds[1]
+
+
+def next_refresh_time(exchange, fetched_at: float) -> float:
+    """
+    Epoch time until which data for the current session fetched at fetched_at
+    stays fresh: the next open while the market is closed, a short TTL while
+    it is trading, and never past the moment the session's bar settles.
+    """
+    local = _local_now(exchange, fetched_at)
+    day = local.date()
+    for _ in range(7):
+        bounds = _session_bounds(exchange, day)
+        if bounds is not None:
+            opened, settled = bounds
+            if local < opened:
+                return opened.timestamp()
+            if local < settled:
+                return min(fetched_at + LIVE_BAR_TTL_SECONDS, settled.timestamp())
+        day += datetime.timedelta(days=1)
+    return fetched_at + LIVE_BAR_TTL_SECONDS
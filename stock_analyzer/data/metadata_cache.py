@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+from stock_analyzer.data.cache_backends import get_cache_backend, get_local_backend
+from stock_analyzer.data.cache_manager import cache_lock
+from stock_analyzer.data.providers import get_provider
+
+# Ticker metadata changes rarely, so keep it cached for a week
+METADATA_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Subset of ticker.info the app actually uses
+METADATA_FIELDS = [
+    'longName', 'shortName', 'name', 'currency', 'exchange', 'sector', 'industry',
+    'regularMarketPrice', 'currentPrice', 'marketCap', 'volume', 'trailingPE', 'dividendYield',
+]
+
+_metadata: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+
+def _cache_key(normalized_symbol):
+    return f"metadata/{normalized_symbol}.json"
+
+
+def _is_fresh(entry, max_age=METADATA_TTL_SECONDS) -> bool:
+    return time.time() - entry.get('fetched_at', 0) < max_age
+
+
+def _decode_entry(normalized_symbol, blob) -> Optional[Dict]:
+    if blob is None:
+        return None
+    try:
+        return json.loads(blob.decode('utf-8'))
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        print(f"Error reading metadata cache for {normalized_symbol}: {e}")
+        return None
+
+
+def _read_local_entry(normalized_symbol) -> Optional[Dict]:
+    """Entry from this machine's own cache backend (the cache directory by default)."""
+    return _decode_entry(normalized_symbol, get_local_backend().get(_cache_key(normalized_symbol)))
+
+
+def _write_local_entry(normalized_symbol, entry):
+    get_local_backend().set(_cache_key(normalized_symbol), json.dumps(entry).encode('utf-8'))
+
+
+def _read_shared_entry(normalized_symbol) -> Optional[Dict]:
+    """Entry from a cache backend shared with other machines, if one is configured."""
+    backend = get_cache_backend()
+    if not backend.shared:
+        return None
+    return _decode_entry(normalized_symbol, backend.get(_cache_key(normalized_symbol)))
+
+
+def _write_shared_entry(normalized_symbol, entry):
+    backend = get_cache_backend()
+    if backend.shared:
+        backend.set(_cache_key(normalized_symbol), json.dumps(entry).encode('utf-8'))
+
+
+def get_ticker_info(normalized_symbol: str) -> Optional[Dict]:
+    """
+    Return the cached subset of ticker.info for a symbol.
+    Served from memory, then the local cache backend, then a shared one if
+    configured, and only fetched from Yahoo when all are missing or older
+    than METADATA_TTL_SECONDS. Only one thread or
+    process fetches a given symbol; the others wait and read its result.
+    Returns None on error or an empty answer; neither is cached.
+    """
+    entry = get_ticker_entry(normalized_symbol)
+    return entry['info'] if entry is not None else None
+
+
+def get_ticker_entry(normalized_symbol: str, max_age=METADATA_TTL_SECONDS) -> Optional[Dict]:
+    """
+    Like get_ticker_info, but returns the whole {'fetched_at', 'info'} entry
+    and only reuses cached metadata younger than max_age seconds; max_age=0
+    always fetches from Yahoo.
+    """
+    entry = _metadata.get(normalized_symbol)
+    if entry is None or not _is_fresh(entry, max_age):
+        entry = _read_local_entry(normalized_symbol)
+        if entry is None or not _is_fresh(entry, max_age):
+            with cache_lock(_cache_key(normalized_symbol)):
+                entry = _read_local_entry(normalized_symbol)
+                if entry is None or not _is_fresh(entry, max_age):
+                    shared = _read_shared_entry(normalized_symbol)
+                    if shared is not None and _is_fresh(shared, max_age):
+                        entry = shared
+                        _write_local_entry(normalized_symbol, entry)
+                if entry is None or not _is_fresh(entry, max_age):
+                    try:
+                        info = get_provider().info(normalized_symbol) or {}
+                    except Exception as e:
+                        print(f"Error fetching info for {normalized_symbol}: {e}")
+                        return None
+                    entry = {
+                        'fetched_at': time.time(),
+                        'info': {field: info.get(field) for field in METADATA_FIELDS},
+                    }
+                    if all(value is None for value in entry['info'].values()):
+                        # An empty answer is a failed lookup, not metadata worth keeping for a week
+                        print(f"No info returned for {normalized_symbol}")
+                        return None
+                    _write_local_entry(normalized_symbol, entry)
+                    _write_shared_entry(normalized_symbol, entry)
+        _metadata[normalized_symbol] = entry
+    return entry
+
+
+def list_cached_symbols() -> List[str]:
+    """Symbols with metadata stored in the local cache backend."""
+    prefix = _cache_key('')[:-len('.json')]
+    return [key[len(prefix):-len('.json')] for key in get_local_backend().keys(prefix) if key.endswith('.json')]
+
+
+def read_cached_entry(normalized_symbol) -> Optional[Dict]:
+    """Return the stored {'fetched_at', 'info'} entry for a symbol without fetching."""
+    with cache_lock(_cache_key(normalized_symbol)):
+        return _read_local_entry(normalized_symbol)
+
+
+def import_entry(normalized_symbol, entry) -> bool:
+    """Store a metadata entry from another cache unless ours is newer. Returns whether it was stored."""
+    if not isinstance(entry, dict) or not isinstance(entry.get('info'), dict) or 'fetched_at' not in entry:
+        return False
+    with cache_lock(_cache_key(normalized_symbol)):
+        current = _read_local_entry(normalized_symbol)
+        if current is not None and current.get('fetched_at', 0) >= entry['fetched_at']:
+            return False
+        entry = {'fetched_at': float(entry['fetched_at']),
+                 'info': {field: entry['info'].get(field) for field in METADATA_FIELDS}}
+        _write_local_entry(normalized_symbol, entry)
+        _metadata.pop(normalized_symbol, None)
+        return True
+
+
+def clear_metadata():
+    """Forget in-memory metadata."""
+    with _lock:
+        _metadata.clear()
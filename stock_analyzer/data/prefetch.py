@@ -0,0 +1,108 @@
+import concurrent.futures
+import datetime
+import threading
+from typing import List, Optional
+from stock_analyzer.data.bar_store import get_bars
+from stock_analyzer.data.fetch_engine import FetchCancelled, get_engine
+from stock_analyzer.data.fx_rates import ensure_currencies
+from stock_analyzer.data.providers import get_provider
+from stock_analyzer.data.stock_fetcher import (
+    fetch_many, get_available_currencies, get_company_name, get_symbol_currency, normalize_symbol
+)
+from stock_analyzer.utils.helpers import load_config
+
+# Prefetch the longest range the main window offers, so any range choice is warm
+PREFETCH_DAYS = 1825
+
+
+def get_watchlist() -> List[str]:
+    """Symbols from the 'watchlist' config setting, upper-cased and de-duplicated."""
+    watchlist = load_config().get("watchlist") or []
+    if isinstance(watchlist, str):
+        watchlist = watchlist.split(',')
+    symbols = []
+    for symbol in watchlist:
+        symbol = str(symbol).upper().strip()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+_speculative_cancel: Optional[threading.Event] = None
+_speculative_lock = threading.Lock()
+
+
+def _prefetch_range():
+    """[start, end) date strings of the longest range the main window requests."""
+    end = datetime.date.today() + datetime.timedelta(days=1)
+    start = end - datetime.timedelta(days=PREFETCH_DAYS + 1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def prefetch_symbols(symbols: List[str]):
+    """
+    Bring symbols' bars, metadata and FX rates into the cache at low priority.
+    Runs on the calling thread; engine calls it makes yield to foreground fetches.
+    """
+    if not symbols:
+        return
+    start, end = _prefetch_range()
+    with get_engine().low_priority():
+        try:
+            data, failures = fetch_many(symbols, start, end)
+            for symbol in data:
+                # Warm the metadata the main window shows for a symbol
+                get_symbol_currency(symbol)
+                get_company_name(symbol)
+            print(f"Prefetched {len(data)} watchlist symbols"
+                  + (f", {len(failures)} failed: {', '.join(sorted(failures))}" if failures else ""))
+        except Exception as e:
+            print(f"Error prefetching watchlist: {e}")
+
+
+def start_watchlist_prefetch() -> Optional[concurrent.futures.Future]:
+    """Refresh the configured watchlist in the background; returns the job's future, or None."""
+    symbols = get_watchlist()
+    if not symbols:
+        return None
+    return get_engine().run_in_background(prefetch_symbols, symbols)
+
+
+def _speculate(symbol, cancel: threading.Event):
+    start, end = _prefetch_range()
+    with get_engine().low_priority(cancel=cancel):
+        try:
+            normalized_symbol = normalize_symbol(symbol)
+            provider = get_provider()
+            # Only the part of the longest range not stored yet is downloaded
+            get_bars(normalized_symbol, start, end,
+                     lambda gap_start, gap_end: provider.history(normalized_symbol, gap_start, gap_end))
+            if not cancel.is_set():
+                ensure_currencies(list(get_available_currencies()), start)
+        except FetchCancelled:
+            pass
+        except Exception as e:
+            print(f"Error prefetching {symbol}: {e}")
+
+
+def start_speculative_prefetch(symbol) -> concurrent.futures.Future:
+    """
+    After an analysis, use idle bandwidth to fetch what the user is likely to
+    ask for next: the symbol's longest range and every display currency's FX
+    series. Any earlier speculative prefetch is cancelled, and this one is
+    cancelled as soon as a foreground fetch arrives.
+    """
+    global _speculative_cancel
+    cancel = threading.Event()
+    with _speculative_lock:
+        if _speculative_cancel is not None:
+            _speculative_cancel.set()
+        _speculative_cancel = cancel
+    return get_engine().run_in_background(_speculate, symbol, cancel)
+
+
+def cancel_speculative_prefetch():
+    """Stop the running speculative prefetch, if any, before its next request."""
+    with _speculative_lock:
+        if _speculative_cancel is not None:
+            _speculative_cancel.set()
@@ -0,0 +1,323 @@
+try:
+    import yfinance as yf
+except ImportError:
+    raise ImportError("yfinance is not installed. Please install it with 'pip install yfinance'.")
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
+import ast
+import contextlib
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from stock_analyzer.data.fetch_engine import get_engine
+from stock_analyzer.data.http_session import get_session, record_statuses
+from stock_analyzer.utils.helpers import load_config
+
+
+# ticker.info fields, any of which shows a lookup found the symbol
+QUOTE_FIELDS = ['quoteType', 'regularMarketPrice', 'currentPrice', 'longName', 'shortName', 'currency']
+
+
+class SymbolNotFound(LookupError):
+    """The data source answered that it does not list the symbol."""
+
+
+def has_quote(info) -> bool:
+    """Whether a ticker.info-style dict describes a listed symbol, rather than an empty answer."""
+    return bool(info) and any(info.get(field) is not None for field in QUOTE_FIELDS)
+
+
+class DataProvider:
+    """
+    Interface every market-data source implements.
+
+    history() returns native-currency daily OHLCV bars for [start, end) and an
+    empty DataFrame when there are none; intraday() does the same for bars of
+    an intraday interval such as '5m'. fx_history() returns, per currency, a
+    Close series of units of that currency per 1 USD. info() raises
+    SymbolNotFound for symbols the source does not list, and another
+    exception when the lookup itself failed.
+    """
+
+    name = "base"
+
+    def history(self, symbol: str, start_date, end_date) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def history_many(self, symbols: List[str], start_date, end_date) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """Fetch several symbols; returns (frames, errors). Override for bulk endpoints."""
+        frames = {}
+        errors = {}
+        for symbol in symbols:
+            try:
+                df = self.history(symbol, start_date, end_date)
+            except Exception as e:
+                errors[symbol] = str(e)
+                continue
+            if df is None or df.empty:
+                errors[symbol] = "No data returned"
+            else:
+                frames[symbol] = df
+        return frames, errors
+
+    def intraday(self, symbol: str, interval: str, start_date, end_date) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def info(self, symbol: str) -> Dict:
+        raise NotImplementedError
+
+    def fx_history(self, currencies: List[str], start_date) -> Dict[str, pd.Series]:
+        raise NotImplementedError
+
+
+# After a download yfinance logs each failure reason once, for all symbols
+# that failed with it: "['AAA', 'BBB']: possibly delisted; no timezone found"
+_FAILED_DOWNLOAD = re.compile(r"^\s*(\[[^\]]*\]):\s*(.+)$", re.S)
+
+
+class DownloadErrorCapture(logging.Filter):
+    """
+    Collects the per-symbol failure reasons yf.download logs, for downloads
+    run inside capture() on the same thread. Records are passed on unchanged.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def capture(self):
+        reasons = {}
+        self._local.reasons = reasons
+        try:
+            yield reasons
+        finally:
+            self._local.reasons = None
+
+    def filter(self, record):
+        reasons = getattr(self._local, 'reasons', None)
+        if reasons is not None and record.levelno >= logging.ERROR:
+            match = _FAILED_DOWNLOAD.match(record.getMessage())
+            if match:
+                try:
+                    symbols = ast.literal_eval(match.group(1))
+                except (ValueError, SyntaxError):
+                    symbols = []
+                for symbol in symbols:
+                    reasons[str(symbol).upper()] = match.group(2).strip()
+        return True
+
+
+_download_errors = DownloadErrorCapture()
+logging.getLogger('yfinance').addFilter(_download_errors)
+
+
+def extract_ticker_frame(raw, ticker) -> Optional[pd.DataFrame]:
+    """Pull one ticker's frame out of a grouped yf.download result."""
+    if raw is None or raw.empty:
+        return None
+    if isinstance(raw.columns, pd.MultiIndex):
+        if ticker not in raw.columns.get_level_values(0):
+            return None
+        df = raw[ticker]
+    else:
+        df = raw
+    df = df.dropna(how='all')
+    if 'Close' in df.columns:
+        df = df[df['Close'].notna()]
+    return df.copy()
+
+
+class YFinanceProvider(DataProvider):
+    """
+    Yahoo Finance through yfinance, with calls scheduled on the fetch engine.
+    Every call goes through the shared keep-alive session from http_session.
+    """
+
+    name = "yfinance"
+
+    def __init__(self):
+        self._tickers: Dict[str, "yf.Ticker"] = {}
+        self._lock = threading.Lock()
+
+    def get_ticker(self, symbol: str):
+        """Return a shared yf.Ticker for the symbol, creating it on first use."""
+        with self._lock:
+            ticker = self._tickers.get(symbol)
+            if ticker is None:
+                ticker = yf.Ticker(symbol, session=get_session())
+                self._tickers[symbol] = ticker
+            return ticker
+
+    def history(self, symbol, start_date, end_date):
+        ticker = self.get_ticker(symbol)
+        return get_engine().call(ticker.history, start=start_date, end=end_date)
+
+    def intraday(self, symbol, interval, start_date, end_date):
+        ticker = self.get_ticker(symbol)
+        return get_engine().call(ticker.history, start=start_date, end=end_date, interval=interval)
+
+    def _download(self, symbols, start_date, end_date):
+        """One yf.download of symbols; returns (raw frame, symbol -> failure reason)."""
+        # threads=False keeps every request of the batch on the engine worker
+        # running the attempt, so they all see its deadline and abandonment,
+        # and yfinance logs the failures on this thread
+        with _download_errors.capture() as reasons:
+            raw = yf.download(symbols, start=start_date, end=end_date, group_by='ticker', actions=True,
+                              auto_adjust=True, threads=False, progress=False, session=get_session())
+        return raw, reasons
+
+    def history_many(self, symbols, start_date, end_date):
+        raw, reasons = get_engine().call(self._download, symbols, start_date, end_date)
+        frames = {}
+        errors = {}
+        for symbol in symbols:
+            df = extract_ticker_frame(raw, symbol)
+            if df is None or df.empty:
+                errors[symbol] = reasons.get(symbol.upper(), "No data returned")
+            else:
+                frames[symbol] = df
+        return frames, errors
+
+    def info(self, symbol):
+        return get_engine().call(self._info, symbol)
+
+    def _info(self, symbol):
+        # Not the pooled Ticker: it keeps its first info, failed or not, for
+        # good; reusing info is the metadata cache's job
+        with record_statuses() as statuses:
+            info = yf.Ticker(symbol, session=get_session()).info or {}
+        if not has_quote(info):
+            # yfinance returns an empty info instead of raising on HTTP errors
+            failed = [status for status in statuses if status is None or status == 429 or status >= 500]
+            if failed:
+                raise ConnectionError(f"Yahoo lookup for {symbol} failed (HTTP {failed[-1] or 'error'})")
+            if 404 in statuses:
+                raise SymbolNotFound(symbol)
+        return info
+
+    def fx_history(self, currencies, start_date):
+        pairs = [f"USD{currency}=X" for currency in currencies]
+        raw = get_engine().call(yf.download, pairs, start=pd.Timestamp(start_date).strftime("%Y-%m-%d"),
+                                group_by='ticker', auto_adjust=True, threads=False, progress=False,
+                                session=get_session())
+        series = {}
+        for currency, pair in zip(currencies, pairs):
+            df = extract_ticker_frame(raw, pair)
+            if df is not None and not df.empty:
+                series[currency] = df['Close']
+        return series
+
+
+class LocalFilesProvider(DataProvider):
+    """
+    Reads archived data from a local directory, with no network access.
+
+    Layout:
+        <SYMBOL>.csv or <SYMBOL>.parquet   daily bars with a Date index/column
+                                           and Open, High, Low, Close, Volume
+        <SYMBOL>@<interval>.csv / .parquet intraday bars, e.g. AAPL@5m.csv,
+                                           with a Datetime index/column
+        USD<CUR>=X.csv / .parquet          FX bars, same format
+        info.json                          optional {symbol: ticker.info-style dict}
+    """
+
+    name = "local"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._info = None
+
+    def _find_file(self, symbol) -> Optional[str]:
+        for extension in ('.parquet', '.csv'):
+            filepath = os.path.join(self.directory, f"{symbol}{extension}")
+            if os.path.exists(filepath):
+                return filepath
+        return None
+
+    def _read_bars(self, symbol) -> pd.DataFrame:
+        filepath = self._find_file(symbol)
+        if filepath is None:
+            return pd.DataFrame()
+        if filepath.endswith('.parquet'):
+            try:
+                df = pd.read_parquet(filepath)
+            except ImportError:
+                raise ImportError("Reading parquet files needs pyarrow. Please install it with 'pip install pyarrow'.")
+        else:
+            df = pd.read_csv(filepath)
+        for column in ('Date', 'Datetime'):
+            if column in df.columns:
+                df = df.set_index(column)
+                break
+        try:
+            df.index = pd.to_datetime(df.index)
+        except ValueError:
+            # Intraday files spanning a DST change carry two UTC offsets
+            df.index = pd.to_datetime(df.index, utc=True)
+        return df.sort_index()
+
+    def _read_range(self, name, start_date, end_date) -> pd.DataFrame:
+        df = self._read_bars(name)
+        if df.empty:
+            return df
+        dates = df.index.tz_localize(None) if df.index.tz is not None else df.index
+        return df[(dates >= pd.Timestamp(start_date)) & (dates < pd.Timestamp(end_date))]
+
+    def history(self, symbol, start_date, end_date):
+        return self._read_range(symbol, start_date, end_date)
+
+    def intraday(self, symbol, interval, start_date, end_date):
+        return self._read_range(f"{symbol}@{interval}", start_date, end_date)
+
+    def info(self, symbol):
+        if self._info is None:
+            filepath = os.path.join(self.directory, 'info.json')
+            try:
+                with open(filepath, 'r') as f:
+                    self._info = json.load(f)
+            except (IOError, json.JSONDecodeError):
+                self._info = {}
+        if symbol not in self._info and self._find_file(symbol) is None:
+            raise SymbolNotFound(symbol)
+        return dict(self._info.get(symbol, {}))
+
+    def fx_history(self, currencies, start_date):
+        series = {}
+        for currency in currencies:
+            df = self._read_bars(f"USD{currency}=X")
+            if not df.empty:
+                series[currency] = df['Close']
+        return series
+
+
+_provider: Optional[DataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> DataProvider:
+    """
+    Return the active provider. Chosen by the 'data_provider' config setting
+    ('yfinance' or 'local'; 'local' reads from 'local_data_dir').
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            config = load_config()
+            if config.get("data_provider", "yfinance") == "local":
+                _provider = LocalFilesProvider(config.get("local_data_dir", "data"))
+            else:
+                _provider = YFinanceProvider()
+        return _provider
+
+
+def set_provider(provider: DataProvider):
+    """Replace the active provider, e.g. for batch jobs against archived data."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,154 @@
+try:
+    import pandas as pd
+except ImportError:
+    raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
+import re
+from typing import Dict, Tuple
+import numpy as np
+
+# Vectorized OHLCV resampling. Every bar gets an int64 bucket code computed
+# from its local wall-clock time; bars are sorted, so each bucket is one run
+# of equal codes and a single reduceat per column aggregates all of them.
+#
+# Buckets are labelled with their start (or their last bar), in the bars'
+# own time zone:
+#   '<n>min', '<n>h', '<n>D'  fixed widths counted from local midnight
+#   '<n>W'                    weeks starting Monday
+#   '<n>M'                    calendar months
+
+MINUTE_NS = 60 * 1_000_000_000
+HOUR_NS = 60 * MINUTE_NS
+DAY_NS = 24 * HOUR_NS
+QUARTER_NS = 15 * MINUTE_NS
+
+_FIXED_UNITS = {'min': MINUTE_NS, 'h': HOUR_NS, 'D': DAY_NS}
+_RULE_PATTERN = re.compile(r'^(\d*)(min|h|D|W|M)$')
+
+# How each column is aggregated; other columns keep their last value
+_AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'Volume': 'sum',
+    'Dividends': 'sum',
+    'Stock Splits': 'max',
+}
+
+
+def parse_rule(rule: str) -> Tuple[int, str]:
+    """Split a rule such as '30min', '1h', 'W' or '3M' into (count, unit)."""
+    match = _RULE_PATTERN.match(str(rule).strip())
+    if match is None:
+        raise ValueError(f"Unsupported resample rule: {rule!r}")
+    count = int(match.group(1) or 1)
+    if count < 1:
+        raise ValueError(f"Unsupported resample rule: {rule!r}")
+    return count, match.group(2)
+
+
+def _run_starts(values: np.ndarray) -> np.ndarray:
+    """Positions where a run of equal consecutive values begins."""
+    return np.concatenate(([0], np.flatnonzero(np.diff(values)) + 1))
+
+
+def _expand_runs(run_values: np.ndarray, starts: np.ndarray, length: int) -> np.ndarray:
+    return np.repeat(run_values, np.diff(np.append(starts, length)))
+
+
+def local_times(index) -> np.ndarray:
+    """Local wall-clock times of a DatetimeIndex as int64 nanoseconds."""
+    index = pd.DatetimeIndex(index)
+    # .values is UTC for tz-aware indexes
+    utc = index.values.astype('datetime64[ns]').view(np.int64)
+    if index.tz is None or len(utc) == 0:
+        return utc
+    # UTC offsets only change on quarter-hour boundaries, so converting one
+    # probe per quarter hour present is exact and far cheaper than every bar
+    quarters = utc // QUARTER_NS
+    starts = _run_starts(quarters)
+    probes = quarters[starts] * QUARTER_NS
+    local = pd.DatetimeIndex(probes.view('datetime64[ns]')).tz_localize('UTC').tz_convert(index.tz).tz_localize(None)
+    offsets = local.values.astype('datetime64[ns]').view(np.int64) - probes
+    return utc + _expand_runs(offsets, starts, len(utc))
+
+
+def bucket_codes(local_ns: np.ndarray, rule: str) -> np.ndarray:
+    """Bucket code of each local timestamp; equal codes share a bucket."""
+    count, unit = parse_rule(rule)
+    if unit in _FIXED_UNITS:
+        return local_ns // (_FIXED_UNITS[unit] * count)
+    if unit == 'W':
+        # 1970-01-01 was a Thursday; shifting by three days starts weeks on Monday
+        return (local_ns // DAY_NS + 3) // (7 * count)
+    # Calendar months are only worked out once per distinct day
+    days = local_ns // DAY_NS
+    if len(days) == 0:
+        return days
+    starts = _run_starts(days)
+    months = (days[starts] * DAY_NS).view('datetime64[ns]').astype('datetime64[M]').view(np.int64)
+    return _expand_runs(months, starts, len(days)) // count
+
+
+def bucket_starts(codes: np.ndarray, rule: str) -> np.ndarray:
+    """Local start time (int64 ns) of each bucket code."""
+    count, unit = parse_rule(rule)
+    if unit in _FIXED_UNITS:
+        return codes * (_FIXED_UNITS[unit] * count)
+    if unit == 'W':
+        return (codes * 7 * count - 3) * DAY_NS
+    return (codes * count).view('datetime64[M]').astype('datetime64[ns]').view(np.int64)
+
+
+def aggregate(codes: np.ndarray, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Aggregate sorted rows into buckets of equal code.
+    Returns (first row of each bucket, dict of column -> aggregated values).
+    """
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.int64), {name: np.empty(0) for name in columns}
+    starts = _run_starts(codes)
+    ends = np.append(starts[1:], len(codes)) - 1
+    result = {}
+    for name, values in columns.items():
+        how = _AGGREGATIONS.get(name, 'last')
+        values = np.asarray(values)
+        if how == 'first':
+            result[name] = values[starts]
+        elif how == 'last':
+            result[name] = values[ends]
+        elif how == 'max':
+            result[name] = np.maximum.reduceat(values, starts)
+        elif how == 'min':
+            result[name] = np.minimum.reduceat(values, starts)
+        else:
+            result[name] = np.add.reduceat(values, starts)
+    return starts, result
+
+
+def resample_ohlcv(df: pd.DataFrame, rule: str, label: str = 'start') -> pd.DataFrame:
+    """
+    Resample OHLCV bars to a coarser timeframe, e.g. 1m bars to '30min' or
+    daily bars to 'W'. Bars without a Close are dropped first; buckets with
+    no bars are left out rather than filled. label='last' stamps each bucket
+    with the time of its last bar (the Close's) instead of the bucket start.
+    """
+    if df is None or df.empty:
+        return df
+    if 'Close' in df.columns:
+        df = df[df['Close'].notna()]
+        if df.empty:
+            return df
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+    index = pd.DatetimeIndex(df.index)
+    codes = bucket_codes(local_times(index), rule)
+    starts, values = aggregate(codes, {col: df[col].values for col in df.columns})
+    if label == 'last':
+        return pd.DataFrame(values, index=index[np.append(starts[1:], len(index)) - 1], columns=df.columns)
+    labels = pd.DatetimeIndex(bucket_starts(codes[starts], rule).view('datetime64[ns]'), name=index.name)
+    if index.tz is not None:
+        # Bucket starts fall outside trading hours, so DST edge cases take standard time
+        labels = labels.tz_localize(index.tz, ambiguous=np.zeros(len(labels), dtype=bool),
+                                    nonexistent='shift_forward')
+    return pd.DataFrame(values, index=labels, columns=df.columns)
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tarfile
+import time
+import zlib
+from typing import Dict, List, Optional
+from stock_analyzer.data import bar_store, metadata_cache
+from stock_analyzer.data.cache_manager import get_cache_dir
+
+# A snapshot bundle is a gzip-compressed tar stream of
+#   bars/<SYMBOL>/<file>       the files of one bar store table
+#   metadata/<SYMBOL>.json     one metadata cache entry
+#   SNAPSHOT.json              last member: format version and the SHA-256
+#                              and size of every other member
+# so it can be written and verified in one sequential pass.
+
+SNAPSHOT_FORMAT = 1
+MANIFEST_NAME = 'SNAPSHOT.json'
+CHUNK_SIZE = 1024 * 1024
+
+# Member names are checked before anything is written to disk
+_SAFE_NAME = r'[A-Za-z0-9^=&._-]+'
+_MEMBER_PATTERN = re.compile(rf'^(bars/{_SAFE_NAME}/{_SAFE_NAME}|metadata/{_SAFE_NAME}\.json)$')
+
+
+class _HashingReader:
+    """File wrapper that hashes everything read through it."""
+
+    def __init__(self, f):
+        self._f = f
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.sha256.update(data)
+        return data
+
+
+def _add_member(tar, name, f, size, checksums):
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(time.time())
+    reader = _HashingReader(f)
+    tar.addfile(info, reader)
+    checksums[name] = {'sha256': reader.sha256.hexdigest(), 'size': size}
+
+
+def export_snapshot(path, symbols: Optional[List[str]] = None) -> Dict:
+    """
+    Write the bar store and metadata cache to a compressed bundle at path.
+    symbols limits the bundle to those normalized symbols. Each table is read
+    under its lock, so the export can run while other processes use the cache.
+    Returns a summary dict with the symbol counts and bundle size.
+    """
+    bar_symbols = bar_store.list_symbols()
+    metadata_symbols = metadata_cache.list_cached_symbols()
+    if symbols is not None:
+        wanted = set(symbols)
+        bar_symbols = [symbol for symbol in bar_symbols if symbol in wanted]
+        metadata_symbols = [symbol for symbol in metadata_symbols if symbol in wanted]
+
+    checksums = {}
+    exported_bars = 0
+    exported_metadata = 0
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with tarfile.open(tmp_path, 'w:gz') as tar:
+            for symbol in bar_symbols:
+                def add_file(name, filepath, symbol=symbol):
+                    with open(filepath, 'rb') as f:
+                        _add_member(tar, f"bars/{symbol}/{name}", f, os.fstat(f.fileno()).st_size, checksums)
+
+                if bar_store.export_table(symbol, add_file):
+                    exported_bars += 1
+            for symbol in metadata_symbols:
+                entry = metadata_cache.read_cached_entry(symbol)
+                if entry is None:
+                    continue
+                data = json.dumps(entry).encode('utf-8')
+                _add_member(tar, f"metadata/{symbol}.json", io.BytesIO(data), len(data), checksums)
+                exported_metadata += 1
+            manifest = json.dumps({'format': SNAPSHOT_FORMAT, 'created': time.time(), 'files': checksums},
+                                  indent=1).encode('utf-8')
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(manifest)
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(manifest))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {'bars': exported_bars, 'metadata': exported_metadata, 'bytes': os.path.getsize(path)}
+
+
+def _stage_member(tar, member, staging_dir):
+    """Stream one member to the staging directory; returns its SHA-256 and size."""
+    target = os.path.join(staging_dir, *member.name.split('/'))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+    source = tar.extractfile(member)
+    with open(target, 'wb') as f:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sha256.update(chunk)
+            size += len(chunk)
+            f.write(chunk)
+    return {'sha256': sha256.hexdigest(), 'size': size}
+
+
+def import_snapshot(path) -> Dict:
+    """
+    Merge a bundle written by export_snapshot into this machine's cache.
+    The bundle is read as a stream, one member at a time, into a staging
+    directory. Nothing is merged unless every checksum matches the bundle's
+    manifest, otherwise ValueError is raised. Bars are merged into existing
+    timelines and metadata only replaces older entries.
+    Returns a summary dict with the number of symbols imported.
+    """
+    staging_dir = os.path.join(get_cache_dir(), f"import-{os.getpid()}")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    try:
+        staged = {}
+        manifest = None
+        try:
+            with tarfile.open(path, 'r|gz') as tar:
+                for member in tar:
+                    if manifest is not None:
+                        raise ValueError(f"Unexpected member after the snapshot manifest: {member.name}")
+                    if not member.isfile():
+                        raise ValueError(f"Unexpected member in snapshot: {member.name}")
+                    if member.name == MANIFEST_NAME:
+                        manifest = json.load(tar.extractfile(member))
+                        continue
+                    if not _MEMBER_PATTERN.match(member.name) or '..' in member.name:
+                        raise ValueError(f"Unexpected member in snapshot: {member.name}")
+                    staged[member.name] = _stage_member(tar, member, staging_dir)
+        except (tarfile.TarError, EOFError, zlib.error, json.JSONDecodeError) as e:
+            raise ValueError(f"Snapshot is corrupt or truncated: {e}")
+
+        if manifest is None:
+            raise ValueError("Snapshot is incomplete: no manifest found")
+        if manifest.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format: {manifest.get('format')}")
+        expected = manifest.get('files') or {}
+        bad = sorted(name for name in set(staged) | set(expected) if staged.get(name) != expected.get(name))
+        if bad:
+            raise ValueError(f"Snapshot checksum mismatch for {len(bad)} files: {', '.join(bad[:5])}")
+
+        imported_bars = 0
+        imported_metadata = 0
+        bars_dir = os.path.join(staging_dir, 'bars')
+        if os.path.isdir(bars_dir):
+            for symbol in sorted(os.listdir(bars_dir)):
+                if bar_store.import_table(symbol, os.path.join(bars_dir, symbol)):
+                    imported_bars += 1
+        metadata_dir = os.path.join(staging_dir, 'metadata')
+        if os.path.isdir(metadata_dir):
+            for name in sorted(os.listdir(metadata_dir)):
+                try:
+                    with open(os.path.join(metadata_dir, name), 'r') as f:
+                        entry = json.load(f)
+                except (json.JSONDecodeError, IOError) as e:
+                    print(f"Skipping metadata {name} from snapshot: {e}")
+                    continue
+                if metadata_cache.import_entry(name[:-len('.json')], entry):
+                    imported_metadata += 1
+        return {'bars': imported_bars, 'metadata': imported_metadata}
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
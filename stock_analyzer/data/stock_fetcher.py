@@ -1,72 +1,257 @@
-try:
-    import yfinance as yf
-except ImportError:
-    raise ImportError("yfinance is not installed. Please install it with 'pip install yfinance'.")
 try:
     import pandas as pd
 except ImportError:
     raise ImportError("pandas is not installed. Please install it with 'pip install pandas'.")
-import requests
+import datetime
+import functools
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import time
+from stock_analyzer.data.fx_rates import convert_ohlc, ensure_currencies, get_latest_rate
+from stock_analyzer.data.metadata_cache import get_ticker_info, import_entry, read_cached_entry
+from stock_analyzer.data.bar_store import (
+    DAILY_INTERVAL, claim_symbol, get_bars, get_bars_at_resolution, pull_shared_tables, push_shared_tables,
+    read_bars, store_bars
+)
+from stock_analyzer.data.fetch_engine import FetchTimeout, get_engine
+from stock_analyzer.data.providers import SymbolNotFound, get_provider, has_quote
+from stock_analyzer.data.symbol_registry import SUFFIX_EXCHANGES, currency_for_suffix, exchange_for_suffix, get_registry
+from stock_analyzer.data.validation_cache import get_cached_results, record_results
+
+# Symbols per bulk download request in fetch_many and bulk downloads
+BATCH_SIZE = 50
+
+# Intraday intervals Yahoo serves, with how many days back each one reaches
+# and the longest range one request may cover
+INTRADAY_LOOKBACK_DAYS = {'1m': 29, '5m': 59, '15m': 59}
+INTRADAY_REQUEST_DAYS = {'1m': 7, '5m': 59, '15m': 59}
+DEFAULT_INTRADAY_INTERVAL = '5m'
 
 def fetch_stock_data(symbol, start_date, end_date, currency='USD'):
     """Fetch stock data with currency conversion support."""
+    df, native_currency = fetch_native_data(symbol, start_date, end_date)
+    if df is None:
+        return None
+    try:
+        # Convert each bar with that day's rate, triangulated through USD
+        return convert_ohlc(df, native_currency, currency)
+    except Exception as e:
+        print(f"Error converting data for {symbol} to {currency}: {e}")
+        return None
+
+def fetch_native_data(symbol, start_date, end_date):
+    """
+    Fetch stock data in the stock's native currency.
+    Returns (df, native_currency); df is None if no data is available.
+    Bars are cached once per symbol regardless of display currency, so
+    callers convert on read with fx_rates.convert_ohlc.
+    """
     try:
         normalized_symbol = normalize_symbol(symbol)
-        ticker = yf.Ticker(normalized_symbol)
+        provider = get_provider()
         
-        # Get data in the stock's native currency first
-        df = ticker.history(start=start_date, end=end_date)
+        # Fetch only the dates the bar store does not already hold
+        df = get_bars(normalized_symbol, start_date, end_date,
+                      lambda start, end: provider.history(normalized_symbol, start, end))
         
-        if df.empty:
-            return None
+        if df is None or df.empty:
+            return None, None
         
-        # Get the stock's native currency
-        stock_info = ticker.info
-        native_currency = stock_info.get('currency', 'USD')
-
-        # Step 1: Convert to USD if needed
-        if native_currency != 'USD':
-            try:
-                currency_pair = f"{native_currency}USD=X"
-                exchange_ticker = yf.Ticker(currency_pair)
-                exchange_data = exchange_ticker.history(start=start_date, end=end_date)
-                if not exchange_data.empty:
-                    latest_rate = exchange_data['Close'].iloc[-1]
-                    price_columns = ['Open', 'High', 'Low', 'Close']
-                    for col in price_columns:
-                        if col in df.columns:
-                            df[col] = df[col] * latest_rate
-                    print(f"Converted {native_currency} to USD using rate: {latest_rate:.4f}")
-                else:
-                    print(f"Could not get exchange rate for {currency_pair}, using native currency")
-            except Exception as e:
-                print(f"Currency conversion error (to USD): {e}, using native currency")
-
-        # Step 2: If user selected a different currency, convert from USD to that currency
-        if currency != 'USD':
-            try:
-                currency_pair = f"USD{currency}=X"
-                exchange_ticker = yf.Ticker(currency_pair)
-                exchange_data = exchange_ticker.history(start=start_date, end=end_date)
-                if not exchange_data.empty:
-                    latest_rate = exchange_data['Close'].iloc[-1]
-                    price_columns = ['Open', 'High', 'Low', 'Close']
-                    for col in price_columns:
-                        if col in df.columns:
-                            df[col] = df[col] * latest_rate
-                    print(f"Converted USD to {currency} using rate: {latest_rate:.4f}")
-                else:
-                    print(f"Could not get exchange rate for {currency_pair}, using USD")
-            except Exception as e:
-                print(f"Currency conversion error (to {currency}): {e}, using USD")
-        return df
+        return df, get_symbol_currency(symbol)
+    except FetchTimeout:
+        # Let callers with a deadline tell a timeout apart from missing data
+        raise
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
-        return None
+        return None, None
+
+def fetch_range_data(symbol, start_date, end_date, min_points):
+    """
+    Fetch [start_date, end_date) in the native currency as monthly, weekly or
+    daily bars: the coarsest that still gives at least min_points bars.
+    Returns (df, native_currency, interval); df is None if no data is available.
+    """
+    try:
+        normalized_symbol = normalize_symbol(symbol)
+        provider = get_provider()
+        df, interval = get_bars_at_resolution(normalized_symbol, start_date, end_date,
+                                              lambda start, end: provider.history(normalized_symbol, start, end),
+                                              min_points=min_points)
+        if df is None or df.empty:
+            return None, None, DAILY_INTERVAL
+        return df, get_symbol_currency(symbol), interval
+    except FetchTimeout:
+        raise
+    except Exception as e:
+        print(f"Error fetching data for {symbol}: {e}")
+        return None, None, DAILY_INTERVAL
+
+def _fetch_intraday_range(provider, symbol, interval, start_date, end_date) -> pd.DataFrame:
+    """Request [start_date, end_date) in pieces no longer than one request may cover."""
+    step = datetime.timedelta(days=INTRADAY_REQUEST_DAYS[interval])
+    end = pd.Timestamp(end_date).date()
+    chunk_start = pd.Timestamp(start_date).date()
+    frames = []
+    while chunk_start < end:
+        chunk_end = min(end, chunk_start + step)
+        df = provider.intraday(symbol, interval, chunk_start.strftime("%Y-%m-%d"), chunk_end.strftime("%Y-%m-%d"))
+        if df is not None and not df.empty:
+            frames.append(df)
+        chunk_start = chunk_end
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames) if len(frames) > 1 else frames[0]
+    return df[~df.index.duplicated(keep='last')]
+
+def fetch_intraday_data(symbol, start_date, end_date, interval=DEFAULT_INTRADAY_INTERVAL):
+    """
+    Fetch intraday bars ('1m', '5m' or '15m') in the stock's native currency.
+    Returns (df, native_currency) like fetch_native_data. The start is moved
+    up to the oldest day Yahoo still serves for the interval.
+    """
+    if interval not in INTRADAY_LOOKBACK_DAYS:
+        raise ValueError(f"Unsupported intraday interval: {interval}")
+    try:
+        normalized_symbol = normalize_symbol(symbol)
+        provider = get_provider()
+        earliest = datetime.date.today() - datetime.timedelta(days=INTRADAY_LOOKBACK_DAYS[interval])
+        start = max(pd.Timestamp(start_date).date(), earliest)
+        df = get_bars(normalized_symbol, start, end_date,
+                      lambda start, end: _fetch_intraday_range(provider, normalized_symbol, interval, start, end),
+                      interval=interval)
+        if df is None or df.empty:
+            return None, None
+        return df, get_symbol_currency(symbol)
+    except FetchTimeout:
+        raise
+    except Exception as e:
+        print(f"Error fetching {interval} data for {symbol}: {e}")
+        return None, None
+
+def get_symbol_currency(symbol: str) -> str:
+    """Get a stock's native currency from cached metadata, falling back to its exchange suffix."""
+    info = get_ticker_info(normalize_symbol(symbol)) or {}
+    return info.get('currency') or get_native_currency(symbol)
+
+def download_batch(tickers: List[str], start_date, end_date) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str], List[str]]:
+    """
+    Claim, download and store one batch of normalized tickers in the bar store.
+    Tickers another thread or process is already fetching are returned as
+    waiting rather than downloaded. Returns (frames, errors, waiting).
+    Run it as an engine job (FetchEngine.submit_job/map_jobs), not as an
+    engine call: only the download inside is retried or abandoned, so the
+    claims are always released by the thread that took them.
+    """
+    provider = get_provider()
+    claimed = {}
+    frames = {}
+    waiting = []
+    try:
+        for ticker in tickers:
+            lock = claim_symbol(ticker)
+            if lock is None:
+                waiting.append(ticker)
+                continue
+            claimed[ticker] = lock
+            # A previous holder of the lock may have stored it meanwhile
+            df = read_bars(ticker, start_date, end_date)
+            if df is not None and not df.empty:
+                frames[ticker] = df
+        to_download = [ticker for ticker in claimed if ticker not in frames]
+        errors = {}
+        if to_download:
+            downloaded, errors = provider.history_many(to_download, start_date, end_date)
+            for ticker, df in downloaded.items():
+                store_bars(ticker, df, start_date, end_date)
+                frames[ticker] = df
+            push_shared_tables(list(downloaded))
+        return frames, errors, waiting
+    finally:
+        for lock in claimed.values():
+            lock.release()
+
+def fetch_many(symbols: List[str], start_date, end_date, currency='USD',
+               batch_size: int = BATCH_SIZE) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+    """
+    Fetch history for many symbols using bulk downloads.
+    Symbols are downloaded batch_size at a time and every FX pair needed
+    for the conversion is fetched once for the whole call.
+    Returns (data, failures): a dict of symbol -> DataFrame converted to
+    `currency`, and a dict of symbol -> reason for every symbol that failed.
+    """
+    data = {}
+    failures = {}
+
+    # Map normalized tickers back to the symbols the caller passed in
+    requested = {}
+    for symbol in symbols:
+        requested.setdefault(normalize_symbol(symbol), symbol)
+
+    # Serve fully stored symbols from the bar store, download the rest
+    tickers = []
+    for ticker in requested:
+        df = read_bars(ticker, start_date, end_date)
+        if df is not None and not df.empty:
+            data[requested[ticker]] = df
+        else:
+            tickers.append(ticker)
+
+    # Machines sharing a remote cache may already have fetched the rest
+    if pull_shared_tables(tickers):
+        remaining = []
+        for ticker in tickers:
+            df = read_bars(ticker, start_date, end_date)
+            if df is not None and not df.empty:
+                data[requested[ticker]] = df
+            else:
+                remaining.append(ticker)
+        tickers = remaining
+
+    provider = get_provider()
+
+    # Batches run concurrently as engine jobs; their downloads share its rate limit
+    batches = [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+    results = get_engine().map_jobs(functools.partial(download_batch, start_date=start_date, end_date=end_date),
+                                    batches)
+    waiting = []
+    for batch, result in zip(batches, results):
+        if isinstance(result, Exception):
+            for ticker in batch:
+                failures[requested[ticker]] = f"Bulk download failed: {result}"
+            continue
+        frames, errors, batch_waiting = result
+        waiting.extend(batch_waiting)
+        for ticker in batch:
+            if ticker in frames:
+                data[requested[ticker]] = frames[ticker]
+            elif ticker not in batch_waiting:
+                failures[requested[ticker]] = errors.get(ticker, "No data returned")
+
+    # Wait for the other fetchers; get_bars only goes to the network if they failed
+    for ticker in waiting:
+        df = get_bars(ticker, start_date, end_date,
+                      lambda start, end, ticker=ticker: provider.history(ticker, start, end))
+        if df is None or df.empty:
+            failures[requested[ticker]] = "No data returned"
+        else:
+            data[requested[ticker]] = df
+
+    if not data:
+        return data, failures
+
+    # Load every currency involved once, then convert each frame per date
+    fetched = list(data)
+    native_currencies = {symbol: native if isinstance(native, str) else get_native_currency(symbol)
+                         for symbol, native in zip(fetched, get_engine().map_jobs(get_symbol_currency, fetched))}
+    ensure_currencies(list(native_currencies.values()) + [currency], start_date)
+    for symbol, df in data.items():
+        data[symbol] = convert_ohlc(df, native_currencies[symbol], currency)
+    return data, failures
+
+def get_native_currency(symbol: str) -> str:
+    """Infer a symbol's quote currency from its exchange suffix; get_symbol_currency falls back to this."""
+    return currency_for_suffix(normalize_symbol(symbol))
 
 def normalize_symbol(symbol: str) -> str:
     """
@@ -75,38 +260,14 @@ def normalize_symbol(symbol: str) -> str:
     """
     symbol = symbol.upper().strip()
     
-    # Exchange-specific symbol mappings
-    exchange_mappings = {
-        # Indian exchanges
-        'NSE': '.NS',  # National Stock Exchange
-        'BSE': '.BO',  # Bombay Stock Exchange
-        
-        # London Stock Exchange
-        'LSE': '.L',
-        
-        # Tokyo Stock Exchange
-        'TSE': '.T',
-        
-        # US exchanges (default, no suffix needed)
-        'NYSE': '',
-        'NASDAQ': '',
-    }
-    
     # Check if symbol already has exchange suffix
-    if any(symbol.endswith(suffix) for suffix in ['.NS', '.BO', '.L', '.T']):
+    if any(symbol.endswith(suffix) for suffix in SUFFIX_EXCHANGES):
         return symbol
     
-    # For Indian stocks without suffix, default to NSE
-    if symbol in get_indian_stocks():
-        return symbol + '.NS'
-    
-    # For London stocks without suffix, add .L
-    if symbol in get_london_stocks():
-        return symbol + '.L'
-    
-    # For Tokyo stocks without suffix, add .T
-    if symbol in get_tokyo_stocks():
-        return symbol + '.T'
+    # Known symbols get their exchange's suffix (Indian stocks default to NSE)
+    entry = get_registry().lookup(symbol)
+    if entry is not None:
+        return symbol + entry.suffix
     
     # US stocks (default)
     return symbol
@@ -115,8 +276,7 @@ def get_company_name(symbol):
     """Get company name with enhanced multi-exchange support."""
     try:
         normalized_symbol = normalize_symbol(symbol)
-        ticker = yf.Ticker(normalized_symbol)
-        info = ticker.info
+        info = get_ticker_info(normalized_symbol) or {}
         
         # Try different name fields
         name = info.get('longName') or info.get('shortName') or info.get('name')
@@ -150,95 +310,88 @@ def get_exchange_for_symbol(symbol: str) -> str:
     """Determine which exchange a symbol belongs to."""
     symbol = symbol.upper().strip()
     
-    # Check for exchange suffixes
-    if symbol.endswith('.NS') or symbol.endswith('.BO'):
-        return 'NSE' if symbol.endswith('.NS') else 'BSE'
-    elif symbol.endswith('.L'):
-        return 'LSE'
-    elif symbol.endswith('.T'):
-        return 'TSE'
-    else:
-        # Check against known stock lists
-        if symbol in get_us_stocks():
-            return 'NYSE' if symbol in get_nyse_stocks() else 'NASDAQ'
-        elif symbol in get_indian_stocks():
-            return 'NSE'
-        elif symbol in get_london_stocks():
-            return 'LSE'
-        elif symbol in get_tokyo_stocks():
-            return 'TSE'
-        else:
-            return 'NYSE'  # Default to NYSE
+    # Check for exchange suffixes, then against the symbol registry
+    exchange = exchange_for_suffix(symbol)
+    if exchange is not None:
+        return exchange
+    entry = get_registry().lookup(symbol)
+    return entry.exchange if entry is not None else 'NYSE'  # Default to NYSE
 
 def get_us_stocks() -> List[str]:
     """Get major US stocks."""
-    return [
-        # NYSE
-        "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "BRK-B", "JPM", "JNJ",
-        "V", "PG", "UNH", "HD", "MA", "DIS", "PYPL", "BAC", "CRM", "NFLX", "CMCSA", 
-        "PFE", "ABT", "KO", "PEP", "TMO", "AVGO", "T", "ABBV", "WMT", "COST", "LLY",
-        # NASDAQ
-        "INTC", "AMD", "CSCO", "QCOM", "INTU", "ORCL", "TXN", "MU", "ADP", "ISRG", 
-        "REGN", "GILD", "VRTX", "MDLZ", "KLAC", "SNPS", "MELI", "ZM", "PTON", "BYND"
-    ]
+    return get_registry().symbols_for_exchange('NYSE') + get_registry().symbols_for_exchange('NASDAQ')
 
 def get_nyse_stocks() -> List[str]:
     """Get major NYSE stocks."""
-    return [
-        "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA", "META", "NVDA", "BRK-B", "JPM", "JNJ",
-        "V", "PG", "UNH", "HD", "MA", "DIS", "PYPL", "BAC", "CRM", "NFLX", "CMCSA", 
-        "PFE", "ABT", "KO", "PEP", "TMO", "AVGO", "T", "ABBV", "WMT", "COST", "LLY"
-    ]
+    return get_registry().symbols_for_exchange('NYSE')
 
 def get_indian_stocks() -> List[str]:
     """Get major Indian stocks (NSE)."""
-    return [
-        "RELIANCE", "TCS", "HDFCBANK", "INFY", "ICICIBANK", "HINDUNILVR", "ITC", "SBIN", 
-        "BHARTIARTL", "KOTAKBANK", "AXISBANK", "ASIANPAINT", "MARUTI", "HCLTECH", 
-        "SUNPHARMA", "TATAMOTORS", "WIPRO", "ULTRACEMCO", "TITAN", "BAJFINANCE",
-        "NESTLEIND", "POWERGRID", "BAJAJFINSV", "NTPC", "ONGC", "COALINDIA", 
-        "JSWSTEEL", "TECHM", "ADANIENT", "HINDALCO", "ADANIPORTS", "TATASTEEL",
-        "BRITANNIA", "SHREECEM", "HEROMOTOCO", "INDUSINDBK", "DIVISLAB", "EICHERMOT",
-        "DRREDDY", "CIPLA", "BPCL", "HCLTECH", "TATACONSUM", "VEDL", "GRASIM"
-    ]
+    return get_registry().symbols_for_exchange('NSE')
 
 def get_london_stocks() -> List[str]:
     """Get major London Stock Exchange stocks."""
-    return [
-        "HSBA", "GSK", "ULVR", "BHP", "RIO", "REL", "LSEG", "CRH", "PRU", "MB",
-        "SHEL", "BP", "VOD", "BT-A", "BARC", "LLOY", "RKT", "WPP", "AAL", "GE",
-        "CNA", "SGE", "IMB", "RKT", "WPP", "AAL", "SGE", "CNA", "RKT", "WPP"
-    ]
+    return get_registry().symbols_for_exchange('LSE')
 
 def get_tokyo_stocks() -> List[str]:
     """Get major Tokyo Stock Exchange stocks."""
-    return [
-        "7203", "6758", "6861", "9984", "7974", "6954", "836", "9433", "4502",
-        "4519", "6501", "6594", "7733", "4911", "7269", "6098", "4063", "4568",
-        "4661", "4755", "4689", "474", "4543", "4578", "4689", "474", "4543"
-    ]
+    return get_registry().symbols_for_exchange('TSE')
 
 def get_exchange_stocks(exchange: str) -> List[str]:
     """Get stocks for a specific exchange."""
-    exchange_stocks = {
-        "NYSE": get_nyse_stocks(),
-        "NASDAQ": [stock for stock in get_us_stocks() if stock not in get_nyse_stocks()],
-        "LSE": get_london_stocks(),
-        "TSE": get_tokyo_stocks(),
-        "NSE": get_indian_stocks(),
-        "BSE": get_indian_stocks()  # Same stocks, different exchange
-    }
-    return exchange_stocks.get(exchange, [])
+    if exchange == "BSE":
+        # Same stocks as NSE, different exchange
+        exchange = "NSE"
+    return get_registry().symbols_for_exchange(exchange)
+
+def _has_price(info: Dict) -> bool:
+    return info.get('regularMarketPrice') is not None or info.get('currentPrice') is not None
+
+def _check_symbol(normalized_symbol: str) -> Optional[bool]:
+    """
+    Look a symbol up; None if the lookup itself failed, or came back empty,
+    and so says nothing about the symbol.
+    """
+    entry = read_cached_entry(normalized_symbol)
+    if entry is not None and _has_price(entry.get('info') or {}):
+        return True
+    try:
+        info = get_provider().info(normalized_symbol) or {}
+    except SymbolNotFound:
+        return False
+    except Exception as e:
+        print(f"Validation error for {normalized_symbol}: {e}")
+        return None
+    if not has_quote(info):
+        return None
+    import_entry(normalized_symbol, {'fetched_at': time.time(), 'info': info})
+    return _has_price(info)
+
+def validate_symbols(symbols: List[str]) -> Dict[str, bool]:
+    """
+    Validate many symbols concurrently; returns symbol -> whether it exists and has data.
+    Results are cached on disk, valid and invalid ones with separate TTLs, so
+    known-bad symbols are rejected without a network round-trip. Symbols
+    whose lookup fails (network errors, server errors, throttling) or comes
+    back empty count as invalid but are not cached.
+    """
+    requested = {}
+    for symbol in symbols:
+        requested.setdefault(symbol, normalize_symbol(symbol))
+    tickers = list(dict.fromkeys(requested.values()))
+    results = get_cached_results(tickers)
+    pending = [ticker for ticker in tickers if ticker not in results]
+    if pending:
+        checked = get_engine().map_jobs(_check_symbol, pending)
+        fresh = {ticker: result for ticker, result in zip(pending, checked) if isinstance(result, bool)}
+        record_results(fresh)
+        results.update(fresh)
+    return {symbol: results.get(ticker, False) for symbol, ticker in requested.items()}
 
 def validate_symbol(symbol: str) -> bool:
     """Validate if a symbol exists and has data."""
     try:
-        normalized_symbol = normalize_symbol(symbol)
-        ticker = yf.Ticker(normalized_symbol)
-        info = ticker.info
-        
-        # Check if we can get basic info
-        return info.get('regularMarketPrice') is not None or info.get('currentPrice') is not None
+        return validate_symbols([symbol])[symbol]
     except Exception as e:
         print(f"Validation error for {symbol}: {e}")
         return False
@@ -259,8 +412,9 @@ def get_stock_info(symbol: str) -> Dict:
     """Get comprehensive stock information."""
     try:
         normalized_symbol = normalize_symbol(symbol)
-        ticker = yf.Ticker(normalized_symbol)
-        info = ticker.info
+        info = get_ticker_info(normalized_symbol)
+        if info is None:
+            raise ValueError("no metadata available")
         
         return {
             'symbol': symbol,
@@ -293,17 +447,15 @@ def get_stock_info(symbol: str) -> Dict:
 
 def get_usd_to_currency_rate(currency_code):
     """
-    Fetch the latest USD to selected currency rate using yfinance.
+    Get the latest USD to selected currency rate from the shared FX rate table.
     Returns 1.0 if currency_code is USD or on error.
     """
     if currency_code == 'USD':
         return 1.0
     try:
-        currency_pair = f"USD{currency_code}=X"
-        ticker = yf.Ticker(currency_pair)
-        data = ticker.history(period="1d")
-        if not data.empty:
-            return float(data['Close'].iloc[-1])
+        rate = get_latest_rate('USD', currency_code)
+        if rate is not None:
+            return rate
     except Exception as e:
         print(f"Error fetching USD to {currency_code} rate: {e}")
     return 1.0
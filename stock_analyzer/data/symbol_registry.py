@@ -0,0 +1,170 @@
+import csv
+import os
+import threading
+from collections import deque, namedtuple
+from typing import Dict, List, Optional
+from stock_analyzer.utils.helpers import load_config
+
+# Yahoo symbol suffix for each exchange
+EXCHANGE_SUFFIXES = {
+    'NYSE': '',
+    'NASDAQ': '',
+    'NSE': '.NS',
+    'BSE': '.BO',
+    'LSE': '.L',
+    'TSE': '.T',
+}
+
+# Currency each exchange quotes in; LSE quotes in pence
+EXCHANGE_CURRENCIES = {
+    'NYSE': 'USD',
+    'NASDAQ': 'USD',
+    'NSE': 'INR',
+    'BSE': 'INR',
+    'LSE': 'GBp',
+    'TSE': 'JPY',
+}
+
+# Exchange implied by a Yahoo symbol suffix; bare symbols trade in the US
+SUFFIX_EXCHANGES = {suffix: exchange for exchange, suffix in EXCHANGE_SUFFIXES.items() if suffix}
+
+SymbolEntry = namedtuple('SymbolEntry', ['symbol', 'exchange', 'name', 'suffix'])
+
+
+def exchange_for_suffix(symbol: str) -> Optional[str]:
+    """Exchange named by a symbol's Yahoo suffix, or None for a bare symbol."""
+    for suffix, exchange in SUFFIX_EXCHANGES.items():
+        if symbol.endswith(suffix):
+            return exchange
+    return None
+
+
+def currency_for_suffix(symbol: str) -> str:
+    """Quote currency implied by a symbol's Yahoo suffix; USD for bare symbols."""
+    exchange = exchange_for_suffix(symbol)
+    return EXCHANGE_CURRENCIES[exchange] if exchange is not None else 'USD'
+
+
+def get_default_registry_path():
+    return os.path.join(os.path.dirname(__file__), 'symbols.csv')
+
+
+class _TrieNode:
+    __slots__ = ('children', 'ids')
+
+    def __init__(self):
+        self.children = {}
+        self.ids = []
+
+
+class SymbolRegistry:
+    """
+    In-memory symbol index.
+    Symbols are looked up through a dict, and tickers, company names and
+    each word of a company name are inserted into a prefix trie for
+    autocomplete.
+    """
+
+    def __init__(self, entries: List[SymbolEntry]):
+        self.entries: List[SymbolEntry] = []
+        self._by_symbol: Dict[str, int] = {}
+        self._by_exchange: Dict[str, List[str]] = {}
+        self._trie = _TrieNode()
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry: SymbolEntry):
+        """Add an entry; the first entry seen for a symbol wins."""
+        if entry.symbol in self._by_symbol:
+            return
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        self._by_symbol[entry.symbol] = entry_id
+        self._by_exchange.setdefault(entry.exchange, []).append(entry.symbol)
+        keys = {entry.symbol.lower()}
+        if entry.name:
+            name = entry.name.lower()
+            keys.add(name)
+            keys.update(name.split())
+        for key in keys:
+            self._insert(key, entry_id)
+
+    def _insert(self, key, entry_id):
+        node = self._trie
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+        if entry_id not in node.ids:
+            node.ids.append(entry_id)
+
+    def lookup(self, symbol: str) -> Optional[SymbolEntry]:
+        """Return the entry for a bare symbol (no exchange suffix), or None."""
+        entry_id = self._by_symbol.get(symbol.upper().strip())
+        return self.entries[entry_id] if entry_id is not None else None
+
+    def symbols_for_exchange(self, exchange: str) -> List[str]:
+        return list(self._by_exchange.get(exchange, []))
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[SymbolEntry]:
+        """
+        Return up to `limit` entries whose ticker, name or a name word starts
+        with `prefix`. Shorter completions come first and an exact ticker
+        match is always first.
+        """
+        prefix = prefix.lower().strip()
+        if not prefix:
+            return []
+        node = self._trie
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        results = []
+        seen = set()
+        exact = self._by_symbol.get(prefix.upper())
+        if exact is not None:
+            results.append(self.entries[exact])
+            seen.add(exact)
+        # Breadth-first so the shortest completions are returned first
+        queue = deque([node])
+        while queue and len(results) < limit:
+            current = queue.popleft()
+            for entry_id in current.ids:
+                if entry_id not in seen:
+                    seen.add(entry_id)
+                    results.append(self.entries[entry_id])
+                    if len(results) >= limit:
+                        break
+            for char in sorted(current.children):
+                queue.append(current.children[char])
+        return results
+
+
+def load_registry(path=None) -> SymbolRegistry:
+    """Build a registry from a CSV file with symbol, exchange and name columns."""
+    path = path or get_default_registry_path()
+    entries = []
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                symbol = (row.get('symbol') or '').upper().strip()
+                exchange = (row.get('exchange') or '').upper().strip()
+                if not symbol or exchange not in EXCHANGE_SUFFIXES:
+                    continue
+                entries.append(SymbolEntry(symbol, exchange, (row.get('name') or '').strip(),
+                                           EXCHANGE_SUFFIXES[exchange]))
+    except IOError as e:
+        print(f"Error loading symbol registry from {path}: {e}")
+    return SymbolRegistry(entries)
+
+
+_registry: Optional[SymbolRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> SymbolRegistry:
+    """Return the process-wide registry, loaded once from 'symbol_registry_file' or the bundled list."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = load_registry(load_config().get("symbol_registry_file"))
+        return _registry
@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from stock_analyzer.data.cache_manager import cache_lock, get_cache_dir
+from stock_analyzer.data.file_lock import atomic_write
+from stock_analyzer.utils.helpers import load_config
+
+VALIDATION_FILE = 'validation.json'
+
+# Symbols that resolved stay trusted for a week; rejected ones are rechecked
+# sooner in case a listing was only briefly missing
+DEFAULT_VALID_TTL_HOURS = 7 * 24
+DEFAULT_INVALID_TTL_HOURS = 24
+
+_results: Optional[Dict[str, Dict]] = None
+_lock = threading.Lock()
+
+
+def _validation_path():
+    return os.path.join(get_cache_dir(), VALIDATION_FILE)
+
+
+def _read_file() -> Dict[str, Dict]:
+    try:
+        with open(_validation_path(), 'r') as f:
+            results = json.load(f)
+        return results if isinstance(results, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error reading symbol validation cache: {e}")
+        return {}
+
+
+def get_ttls():
+    """(valid, invalid) result lifetimes in seconds, from config."""
+    config = load_config()
+    valid_hours = float(config.get("symbol_valid_ttl_hours", DEFAULT_VALID_TTL_HOURS))
+    invalid_hours = float(config.get("symbol_invalid_ttl_hours", DEFAULT_INVALID_TTL_HOURS))
+    return valid_hours * 3600, invalid_hours * 3600
+
+
+def get_cached_results(normalized_symbols: Iterable[str]) -> Dict[str, bool]:
+    """Unexpired validation results for the symbols that have one."""
+    global _results
+    with _lock:
+        if _results is None:
+            _results = _read_file()
+        results = _results
+    valid_ttl, invalid_ttl = get_ttls()
+    now = time.time()
+    found = {}
+    for symbol in normalized_symbols:
+        result = results.get(symbol)
+        if result is None:
+            continue
+        ttl = valid_ttl if result.get('valid') else invalid_ttl
+        if now - result.get('checked_at', 0) < ttl:
+            found[symbol] = bool(result.get('valid'))
+    return found
+
+
+def record_results(results: Dict[str, bool]):
+    """Persist validation outcomes, merged with what other processes recorded meanwhile."""
+    global _results
+    if not results:
+        return
+    now = time.time()
+    with _lock, cache_lock(VALIDATION_FILE):
+        merged = _read_file()
+        for symbol, valid in results.items():
+            merged[symbol] = {'valid': bool(valid), 'checked_at': now}
+        try:
+            with atomic_write(_validation_path(), 'w') as f:
+                json.dump(merged, f)
+        except IOError as e:
+            print(f"Error writing symbol validation cache: {e}")
+        _results = merged
+
+
+def clear_validation_cache():
+    """Forget every validation result, in memory and on disk."""
+    global _results
+    with _lock, cache_lock(VALIDATION_FILE):
+        _results = {}
+        try:
+            os.remove(_validation_path())
+        except FileNotFoundError:
+            pass
@@ -20,6 +20,10 @@ except ImportError:
             return '$'
 
 class ChartWidget(ttk.Frame):
+    # Fewest bars a chart should show; longer ranges are drawn from weekly or
+    # monthly bars as long as they still give at least this many
+    MIN_POINTS = 120
+
     def __init__(self, master):
         super().__init__(master)
         self.current_chart_type = "line"
@@ -261,7 +265,8 @@ class ChartWidget(ttk.Frame):
             tick_dates = [dates[i] for i in tick_indices]
             
             self.ax.set_xticks(tick_indices)
-            self.ax.set_xticklabels([date.strftime('%m/%d') for date in tick_dates], rotation=45, ha='right')
+            date_format = '%m/%d' if (dates[-1] - dates[0]).days <= 366 else '%b %Y'
+            self.ax.set_xticklabels([date.strftime(date_format) for date in tick_dates], rotation=45, ha='right')
             
             # Grid and styling
             self.ax.grid(True, linestyle='-', alpha=0.3, color=grid_color, linewidth=0.5)
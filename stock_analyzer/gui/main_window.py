@@ -3,10 +3,15 @@ from tkinter import ttk
 from stock_analyzer.gui.chart_widget import ChartWidget
 from stock_analyzer.gui.stats_panel import StatsPanel
 from stock_analyzer.gui.settings_dialog import SettingsDialog
-from stock_analyzer.data.stock_fetcher import fetch_stock_data, get_company_name, get_available_currencies, get_currency_symbol, get_usd_to_currency_rate
-from stock_analyzer.data.cache_manager import get_cached_data, set_cached_data
+from stock_analyzer.data.stock_fetcher import (
+    DEFAULT_INTRADAY_INTERVAL, fetch_intraday_data, fetch_native_data, fetch_range_data, get_company_name,
+    get_available_currencies, get_currency_symbol
+)
+from stock_analyzer.data.fx_rates import convert_ohlc
+from stock_analyzer.data.fetch_engine import FetchTimeout, get_engine
+from stock_analyzer.data.prefetch import cancel_speculative_prefetch, start_speculative_prefetch, start_watchlist_prefetch
+from stock_analyzer.data.symbol_registry import get_registry
 from stock_analyzer.utils.helpers import load_config
-import threading
 import datetime
 from stock_analyzer.analysis.statistics import (
     mean_price, median_price, price_volatility, daily_returns, cumulative_returns, 
@@ -15,6 +20,12 @@ from stock_analyzer.analysis.statistics import (
 from stock_analyzer.analysis.risk_metrics import max_drawdown
 from stock_analyzer.analysis.recommendations import analyze_timeframe, generate_recommendation, get_timeframe_data
 
+# Analyses that take longer than this give up instead of showing "Loading..." forever
+DEFAULT_FETCH_DEADLINE_SECONDS = 45
+# Calendar days of intraday bars for the 1D and 5D timeframes: five
+# sessions plus a weekend and a holiday
+INTRADAY_HISTORY_DAYS = 9
+
 class MainWindow(ttk.Frame):
     def __init__(self, master):
         super().__init__(master)
@@ -27,6 +38,10 @@ class MainWindow(ttk.Frame):
         self.current_currency = 'USD'
         self.conversion_rate = 1.0
         
+        # Last fetched bars in their native currency: (symbol, df, native_currency, end_str).
+        # Currency switches convert these instead of refetching.
+        self.native_data = None
+        
         # Configure modern style
         self.setup_modern_style()
         
@@ -210,6 +225,17 @@ class MainWindow(ttk.Frame):
         
         # Bind Enter key to analyze function
         self.symbol_entry.bind('<Return>', lambda event: self.on_analyze())
+        
+        # Autocomplete suggestions from the local symbol registry
+        self.suggestion_entries = []
+        self.suggestion_box = tk.Listbox(self.winfo_toplevel(), height=6, activestyle="none",
+                                         relief="flat", bd=1, font=(font_family[1], 10))
+        self.symbol_entry.bind('<KeyRelease>', self._on_symbol_typed)
+        self.symbol_entry.bind('<Down>', self._focus_suggestions)
+        self.symbol_entry.bind('<Escape>', lambda event: self._hide_suggestions())
+        self.suggestion_box.bind('<Return>', self._accept_suggestion)
+        self.suggestion_box.bind('<ButtonRelease-1>', self._accept_suggestion)
+        self.suggestion_box.bind('<Escape>', lambda event: self._hide_suggestions())
 
 
         
@@ -378,11 +404,64 @@ class MainWindow(ttk.Frame):
         # Apply new chart type
         self.apply_chart_type()
         
+        # Warm any symbols just added to the watchlist
+        start_watchlist_prefetch()
+        
         # Update date range if changed
         if self.range_var.get() != new_config.get("default_date_range", "6M"):
             self.range_var.set(new_config.get("default_date_range", "6M"))
 
+    def _on_symbol_typed(self, event=None):
+        """Show registry matches for the text typed so far."""
+        if event is not None and event.keysym in ("Return", "Escape", "Down", "Up", "Tab"):
+            return
+        text = self.symbol_var.get().strip()
+        self.suggestion_entries = get_registry().suggest(text, limit=8) if text else []
+        if not self.suggestion_entries:
+            self._hide_suggestions()
+            return
+        self.suggestion_box.delete(0, tk.END)
+        for entry in self.suggestion_entries:
+            label = f"{entry.symbol}  {entry.name}" if entry.name else entry.symbol
+            self.suggestion_box.insert(tk.END, f"{label}  ({entry.exchange})")
+        if self.theme_mode == "dark":
+            self.suggestion_box.config(bg="#2C2C2E", fg="#FFFFFF", selectbackground="#0A84FF")
+        else:
+            self.suggestion_box.config(bg="white", fg="#1D1D1F", selectbackground="#007AFF")
+        # Place the list just under the entry, relative to the top-level window
+        root = self.winfo_toplevel()
+        x = self.symbol_entry.winfo_rootx() - root.winfo_rootx()
+        y = self.symbol_entry.winfo_rooty() - root.winfo_rooty() + self.symbol_entry.winfo_height()
+        self.suggestion_box.config(height=len(self.suggestion_entries))
+        self.suggestion_box.place(x=x, y=y, width=max(320, self.symbol_entry.winfo_width()))
+        self.suggestion_box.lift()
+
+    def _focus_suggestions(self, event=None):
+        if self.suggestion_entries:
+            self.suggestion_box.focus_set()
+            self.suggestion_box.selection_clear(0, tk.END)
+            self.suggestion_box.selection_set(0)
+            self.suggestion_box.activate(0)
+        return "break"
+
+    def _accept_suggestion(self, event=None):
+        selection = self.suggestion_box.curselection()
+        if not selection:
+            return
+        self.symbol_var.set(self.suggestion_entries[selection[0]].symbol)
+        self._hide_suggestions()
+        self.symbol_entry.focus_set()
+        self.symbol_entry.icursor(tk.END)
+        self.on_analyze()
+
+    def _hide_suggestions(self):
+        self.suggestion_entries = []
+        self.suggestion_box.place_forget()
+
     def on_analyze(self):
+        self._hide_suggestions()
+        # The user is waiting on this fetch; stop guessing what they want next
+        cancel_speculative_prefetch()
         symbol = self.symbol_var.get().strip().upper()
         range_str = self.range_var.get()
         
@@ -396,8 +475,8 @@ class MainWindow(ttk.Frame):
         self.loading_var.set("Loading...")
         self.analyze_btn.config(state=tk.DISABLED)
         self.status.config(text="Status: Connecting...")
-        # Run data fetch in a thread to avoid blocking UI
-        threading.Thread(target=self._fetch_and_update, args=(symbol, range_str), daemon=True).start()
+        # Run data fetch on the fetch engine's background pool to avoid blocking UI
+        get_engine().run_in_background(self._fetch_and_update, symbol, range_str)
 
     def on_timeframe_changed(self, event=None):
         """Handle timeframe change - automatically analyze if symbol is entered."""
@@ -407,16 +486,27 @@ class MainWindow(ttk.Frame):
             self.on_analyze()
 
     def on_currency_changed(self, event=None):
-        """Handle currency change - update display immediately if data is available."""
+        """Handle currency change - reconvert the cached native bars without refetching."""
         currency_selection = self.currency_var.get()
         self.current_currency = currency_selection.split(' - ')[0] if ' - ' in currency_selection else 'USD'
-        # Fetch conversion rate from USD to selected currency
-        self.conversion_rate = get_usd_to_currency_rate(self.current_currency)
-        # Update chart and stats panel with new currency and conversion rate
-        self.chart_panel.set_currency(self.current_currency)
-        self.chart_panel.set_conversion_rate(self.conversion_rate)
-        self.stats_panel.set_currency(self.current_currency)
-        self.stats_panel.set_conversion_rate(self.conversion_rate)
+        if self.native_data is None:
+            return
+        cancel_speculative_prefetch()
+        symbol, native_df, native_intraday, native_chart, native_currency, end_str = self.native_data
+        self.status.config(text="Status: Converting...")
+        # The first switch to a currency may need its FX series, so convert off the UI thread
+        get_engine().run_in_background(self._convert_and_update, symbol, native_df, native_intraday, native_chart,
+                                       native_currency, self.current_currency, end_str)
+
+    def _convert_and_update(self, symbol, native_df, native_intraday, native_chart, native_currency, currency,
+                            end_str):
+        try:
+            df = convert_ohlc(native_df, native_currency, currency)
+            intraday_df = convert_ohlc(native_intraday, native_currency, currency)
+            chart_df = convert_ohlc(native_chart, native_currency, currency)
+            self.after(0, self._update_ui_after_fetch, symbol, df, end_str, intraday_df, chart_df)
+        except Exception as e:
+            self.after(0, self._handle_fetch_error, str(e))
 
     def _fetch_and_update(self, symbol, range_str):
         try:
@@ -438,18 +528,46 @@ class MainWindow(ttk.Frame):
                 start = end - datetime.timedelta(days=182)
             start_str = start.strftime("%Y-%m-%d")
             end_str = end.strftime("%Y-%m-%d")
-            # Try cache first (now with currency)
-            df = get_cached_data(symbol, start_str, end_str, self.current_currency)
-            if df is None:
-                df = fetch_stock_data(symbol, start_str, end_str, self.current_currency)
-                if df is not None:
-                    set_cached_data(symbol, start_str, end_str, df, self.current_currency)
+            # The end date is exclusive; include today's session bar, which the
+            # bar store refreshes on a market-hours schedule while it is trading
+            fetch_end_str = (end + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+            deadline = float(load_config().get("fetch_deadline_sec", DEFAULT_FETCH_DEADLINE_SECONDS))
+            with get_engine().deadline(deadline):
+                # Bars are cached once in the native currency and converted on read
+                native_df, native_currency = fetch_native_data(symbol, start_str, fetch_end_str)
+                df = None
+                intraday_df = None
+                chart_df = None
+                if native_df is not None:
+                    native_intraday = self._fetch_intraday(symbol, end, fetch_end_str)
+                    # Long ranges are charted and judged long-term on weekly or monthly bars
+                    native_chart, _, interval = fetch_range_data(symbol, start_str, fetch_end_str,
+                                                                 ChartWidget.MIN_POINTS)
+                    if interval == '1d':
+                        native_chart = None
+                    self.native_data = (symbol, native_df, native_intraday, native_chart, native_currency, end_str)
+                    df = convert_ohlc(native_df, native_currency, self.current_currency)
+                    intraday_df = convert_ohlc(native_intraday, native_currency, self.current_currency)
+                    chart_df = convert_ohlc(native_chart, native_currency, self.current_currency)
             # Update UI in main thread
-            self.after(0, self._update_ui_after_fetch, symbol, df, end_str)
+            self.after(0, self._update_ui_after_fetch, symbol, df, end_str, intraday_df, chart_df)
+        except FetchTimeout:
+            self.after(0, self._handle_fetch_error, f"Yahoo Finance did not respond within {deadline:g}s")
         except Exception as e:
             # Handle any exceptions and re-enable the button
             self.after(0, self._handle_fetch_error, str(e))
     
+    def _fetch_intraday(self, symbol, end, fetch_end_str):
+        """Intraday bars for the short timeframes, or None; daily bars are used without them."""
+        interval = load_config().get("intraday_interval", DEFAULT_INTRADAY_INTERVAL)
+        start_str = (end - datetime.timedelta(days=INTRADAY_HISTORY_DAYS)).strftime("%Y-%m-%d")
+        try:
+            intraday_df, _ = fetch_intraday_data(symbol, start_str, fetch_end_str, interval)
+            return intraday_df
+        except (FetchTimeout, ValueError) as e:
+            print(f"Skipping intraday bars for {symbol}: {e}")
+            return None
+
     def _handle_fetch_error(self, error_message):
         """Handle fetch errors and re-enable the analyze button."""
         self.analyze_btn.config(state=tk.NORMAL)
@@ -480,7 +598,7 @@ class MainWindow(ttk.Frame):
         }
         return stats
 
-    def _update_ui_after_fetch(self, symbol, df, end_str):
+    def _update_ui_after_fetch(self, symbol, df, end_str, intraday_df=None, chart_df=None):
         """Update UI with fetched data."""
         # Always re-enable the analyze button
         self.analyze_btn.config(state=tk.NORMAL)
@@ -501,7 +619,7 @@ class MainWindow(ttk.Frame):
         self.chart_panel.set_conversion_rate(self.conversion_rate)
         
         # Update chart
-        self.chart_panel.plot_data(df, symbol)
+        self.chart_panel.plot_data(chart_df if chart_df is not None else df, symbol)
         
         # Calculate statistics
         stats_dict = self._calculate_statistics(df)
@@ -509,7 +627,7 @@ class MainWindow(ttk.Frame):
         # Generate recommendations for both timeframes
         timeframes_data = {}
         for timeframe in ['1D', '5D', '15D', '1M']:
-            timeframe_df = get_timeframe_data(df, timeframe)
+            timeframe_df = get_timeframe_data(df, timeframe, intraday_df)
             if timeframe_df is not None:
                 timeframes_data[timeframe] = analyze_timeframe(timeframe_df, timeframe)
         
@@ -519,12 +637,16 @@ class MainWindow(ttk.Frame):
         # Update stats panel with currency and conversion rate
         self.stats_panel.set_currency(self.current_currency)
         self.stats_panel.set_conversion_rate(self.conversion_rate)
-        self.stats_panel.update_stats(stats_dict, recommendation, timeframes_data, df, symbol)
+        self.stats_panel.update_stats(stats_dict, recommendation, timeframes_data, df, symbol, chart_df)
         
         # Update footer
         self.updated.config(text=f"Last updated: {end_str}")
         self.loading_var.set("")
         self.status.config(text="Status: Connected")
+        
+        # While the user reads the results, fetch the longest range and the
+        # other currencies' rates so the next range or currency switch is instant
+        start_speculative_prefetch(symbol)
 
     def toggle_theme(self):
         """Toggle between light and dark theme."""
@@ -7,7 +7,7 @@ class SettingsDialog(tk.Toplevel):
     def __init__(self, master, on_settings_changed=None):
         super().__init__(master)
         self.title("Settings")
-        self.geometry("400x200")
+        self.geometry("400x360")
         self.resizable(False, False)
         self.on_settings_changed = on_settings_changed
         
@@ -48,6 +48,22 @@ class SettingsDialog(tk.Toplevel):
         chart_type_combo.pack(anchor=tk.W, pady=(0, 10))
         chart_type_combo.bind("<<ComboboxSelected>>", self.on_chart_type_changed)
         
+        # Cache section
+        cache_frame = ttk.LabelFrame(main_frame, text="Cache", padding="10")
+        cache_frame.pack(fill=tk.X, pady=(0, 15))
+        
+        self.persistent_cache_var = tk.BooleanVar(value=self.config.get("persistent_cache", False))
+        persistent_check = ttk.Checkbutton(cache_frame, text="Keep cached data between sessions",
+                                           variable=self.persistent_cache_var)
+        persistent_check.pack(anchor=tk.W, pady=(0, 10))
+        
+        watchlist_label = ttk.Label(cache_frame, text="Watchlist (prefetched at startup, comma separated):")
+        watchlist_label.pack(anchor=tk.W, pady=(0, 5))
+        
+        self.watchlist_var = tk.StringVar(value=", ".join(self.config.get("watchlist") or []))
+        watchlist_entry = ttk.Entry(cache_frame, textvariable=self.watchlist_var)
+        watchlist_entry.pack(fill=tk.X)
+        
         # Buttons
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=(20, 0))
@@ -69,6 +85,10 @@ class SettingsDialog(tk.Toplevel):
         
     def on_ok(self):
         """Save settings and close dialog."""
+        self.config["persistent_cache"] = self.persistent_cache_var.get()
+        self.config["watchlist"] = [symbol.strip().upper() for symbol in self.watchlist_var.get().split(',')
+                                    if symbol.strip()]
+        
         # Save config
         save_config(self.config)
         
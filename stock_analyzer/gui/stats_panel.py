@@ -20,6 +20,7 @@ class StatsPanel(ttk.Frame):
         self.current_recommendation = None
         self.current_timeframes_data = None
         self.current_df = None
+        self.current_long_term_bars = None
         self.current_symbol = None
         self.current_currency = 'USD'
         self.conversion_rate = 1.0
@@ -212,7 +213,8 @@ class StatsPanel(ttk.Frame):
                                justify=tk.CENTER)
         placeholder.pack(expand=True, fill=tk.BOTH, pady=50)
 
-    def update_stats(self, stats_dict, recommendation=None, timeframes_data=None, df=None, symbol=None):
+    def update_stats(self, stats_dict, recommendation=None, timeframes_data=None, df=None, symbol=None,
+                     long_term_bars=None):
         for widget in self.scrollable_frame.winfo_children():
             widget.destroy()
         
@@ -224,6 +226,8 @@ class StatsPanel(ttk.Frame):
         self.current_df = df
         self.current_symbol = symbol
         self.current_timeframes_data = timeframes_data
+        # Weekly/monthly bars over the whole range for the long-term targets
+        self.current_long_term_bars = long_term_bars
         self.last_stats_dict = stats_dict  # <--- Store the stats dict
         
         # Generate recommendation based on last selected timeframe
@@ -237,9 +241,11 @@ class StatsPanel(ttk.Frame):
                     # If import fails, use the provided recommendation
                     self.current_recommendation = recommendation
                 else:
-                    self.current_recommendation = generate_recommendation(symbol, df, timeframes_data, self.last_timeframe_type)
+                    self.current_recommendation = generate_recommendation(
+                        symbol, df, timeframes_data, self.last_timeframe_type, long_term_bars)
             else:
-                self.current_recommendation = generate_recommendation(symbol, df, timeframes_data, self.last_timeframe_type)
+                self.current_recommendation = generate_recommendation(
+                    symbol, df, timeframes_data, self.last_timeframe_type, long_term_bars)
         else:
             self.current_recommendation = recommendation
         
@@ -418,7 +424,8 @@ class StatsPanel(ttk.Frame):
             self.current_symbol, 
             self.current_df, 
             self.current_timeframes_data, 
-            self.last_timeframe_type
+            self.last_timeframe_type,
+            self.current_long_term_bars
         )
         
         if new_recommendation:
@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk
 from stock_analyzer.gui.main_window import MainWindow
 from stock_analyzer.data.cache_manager import clear_cache
+from stock_analyzer.data.prefetch import start_watchlist_prefetch
+from stock_analyzer.utils.helpers import load_config
 import sys
 
 
@@ -17,8 +19,13 @@ def main():
     app = MainWindow(root)
     app.pack(fill=tk.BOTH, expand=True)
 
+    # Warm the bar store with the watchlist while the user is still typing
+    start_watchlist_prefetch()
+
     def on_close():
-        clear_cache()
+        # In persistent mode the cache is kept so the next session starts warm
+        if not load_config().get("persistent_cache", False):
+            clear_cache()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_close)
@@ -1,6 +1,22 @@
 default_config = {
     "default_date_range": "6M",
-    "chart_type": "line"
+    "chart_type": "line",
+    "cache_max_mb": 500,
+    "memory_cache_mb": 64,
+    "cache_backend": "directory",
+    "cache_server": "127.0.0.1:7878",
+    "fetch_concurrency": 8,
+    "fetch_rate_per_sec": 4,
+    "fetch_timeout_sec": 30,
+    "fetch_deadline_sec": 45,
+    "hedge_requests": False,
+    "hedge_percentile": 95,
+    "http_pool_size": 8,
+    "symbol_valid_ttl_hours": 168,
+    "symbol_invalid_ttl_hours": 24,
+    "intraday_interval": "5m",
+    "persistent_cache": False,
+    "watchlist": []
 }
 
 chart_types = ["line", "candlestick"]
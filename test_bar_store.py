@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import datetime
+import numpy as np
+import pandas as pd
+from stock_analyzer.analysis.recommendations import LONG_TERM_TIMEFRAME, generate_recommendation
+from stock_analyzer.data import bar_store
+from stock_analyzer.data.bar_store import get_bars, get_bars_at_resolution, read_bars, store_bars
+from stock_analyzer.data.columnar_store import read_frame, write_frame
+from stock_analyzer.data.resample import resample_ohlcv
+
+TZ = 'America/New_York'
+
+
+def make_bars(start, end, base=100.0):
+    """Daily bars on weekdays in [start, end), with prices rising one per day."""
+    index = pd.date_range(start, pd.Timestamp(end) - pd.Timedelta(days=1), freq='B', tz=TZ).as_unit('ns')
+    close = base + np.arange(len(index), dtype=np.float64)
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(len(index), 1000.0)}, index=index)
+
+
+def no_fetch(start, end):
+    raise AssertionError(f"unexpected fetch of {start} to {end}")
+
+
+def freeze_session(monkeypatch, final_end):
+    """Pretend the session before final_end has closed and the one on it is still trading."""
+    monkeypatch.setattr(bar_store, 'final_bars_end', lambda exchange, now=None: final_end)
+    monkeypatch.setattr(bar_store, 'next_refresh_time', lambda exchange, now: now + 60)
+
+
+def test_merge_replaces_live_bar_once_session_closes(cache_dir, monkeypatch):
+    day = datetime.date(2024, 3, 6)
+    freeze_session(monkeypatch, day)
+    live = make_bars('2024-03-01', '2024-03-07')
+    live.loc[live.index[-1], 'Close'] = 1.0
+    store_bars('AAA', live, '2024-03-01', '2024-03-07')
+    entry = bar_store._load_entry('AAA')
+    assert entry['end'] == day and entry['live_end'] == datetime.date(2024, 3, 7)
+
+    freeze_session(monkeypatch, datetime.date(2024, 3, 7))
+    final = make_bars('2024-03-06', '2024-03-07')
+    store_bars('AAA', final, '2024-03-06', '2024-03-07')
+    entry = bar_store._load_entry('AAA')
+    assert entry['end'] == datetime.date(2024, 3, 7) and entry['live_end'] is None
+    bars = read_bars('AAA', '2024-03-01', '2024-03-07')
+    assert len(bars) == 4 and not bars.index.duplicated().any()
+    assert bars['Close'].iloc[-1] == final['Close'].iloc[-1]
+
+
+def test_empty_trailing_gap_is_trusted_only_when_short(cache_dir, monkeypatch):
+    freeze_session(monkeypatch, datetime.date(2030, 1, 1))
+    store_bars('AAA', make_bars('2024-01-01', '2024-03-01'), '2024-01-01', '2024-03-01')
+    calls = []
+
+    def empty(start, end):
+        calls.append((start, end))
+        return make_bars(start, start)
+
+    # A weekend's worth of nothing is believed and stored
+    assert get_bars('AAA', '2024-01-01', '2024-03-04', empty) is not None
+    assert calls == [('2024-03-01', '2024-03-04')]
+    get_bars('AAA', '2024-01-01', '2024-03-04', no_fetch)
+
+    # Two weeks of nothing looks like a failed request and is asked for again
+    calls.clear()
+    get_bars('AAA', '2024-01-01', '2024-03-18', empty)
+    get_bars('AAA', '2024-01-01', '2024-03-18', empty)
+    assert calls == [('2024-03-04', '2024-03-18')] * 2
+
+
+def test_pyramid_splice_matches_full_resample(cache_dir, monkeypatch):
+    freeze_session(monkeypatch, datetime.date(2030, 1, 1))
+    full = make_bars('2023-01-01', '2024-07-01')
+    store_bars('AAA', full[full.index < pd.Timestamp('2024-02-14', tz=TZ)], '2023-01-01', '2024-02-14')
+    store_bars('AAA', full[full.index >= pd.Timestamp('2024-02-14', tz=TZ)], '2024-02-14', '2024-07-01')
+    for interval, rule in bar_store.PYRAMID_LEVELS:
+        stored = read_bars('AAA', '2023-01-01', '2024-07-01', interval)
+        expected = resample_ohlcv(full, rule, label='last')
+        pd.testing.assert_frame_equal(stored, expected[stored.columns], check_freq=False)
+
+
+def test_pyramid_read_is_clipped_to_range(cache_dir, monkeypatch):
+    freeze_session(monkeypatch, datetime.date(2030, 1, 1))
+    store_bars('AAA', make_bars('2020-01-01', '2024-07-01'), '2020-01-01', '2024-07-01')
+    bars, interval = get_bars_at_resolution('AAA', '2021-03-17', '2024-05-15', no_fetch, min_points=30)
+    assert interval == '1mo'
+    daily = read_bars('AAA', '2021-03-17', '2024-05-15')
+    # First bucket starts at start and the partial last month is included
+    assert bars['Open'].iloc[0] == daily['Open'].iloc[0]
+    assert bars.index[-1] == daily.index[-1]
+    assert bars['Volume'].sum() == daily['Volume'].sum()
+    assert bars['High'].max() == daily['High'].max()
+
+
+def test_long_term_recommendation_analyzes_long_term_bars(cache_dir, monkeypatch):
+    freeze_session(monkeypatch, datetime.date(2030, 1, 1))
+    store_bars('AAA', make_bars('2019-01-01', '2024-07-01'), '2019-01-01', '2024-07-01')
+    df = read_bars('AAA', '2024-05-01', '2024-07-01')
+    monthly, _ = get_bars_at_resolution('AAA', '2019-07-01', '2024-07-01', no_fetch, min_points=30)
+
+    long_term = generate_recommendation('AAA', df, {}, "long_term", monthly)
+    assert f"{LONG_TERM_TIMEFRAME}:" in long_term.reasoning
+    short_term = generate_recommendation('AAA', df, {}, "short_term", monthly)
+    assert f"{LONG_TERM_TIMEFRAME}:" not in short_term.reasoning
+
+
+def test_read_frame_maps_columns_without_copying(tmp_path):
+    table_dir = str(tmp_path / 'AAA')
+    bars = make_bars('2024-01-01', '2024-07-01')
+    write_frame(table_dir, bars)
+    df = read_frame(table_dir, '2024-03-01', '2024-04-01')
+    assert len(df) == 21 and str(df.index.tz) == TZ
+    assert all(isinstance(block.values, np.memmap) for block in df._mgr.blocks)
+
+    # Modifying a frame never writes through to the table
+    df.loc[df.index[0], 'Close'] = -1.0
+    assert read_frame(table_dir)['Close'].min() == bars['Close'].min()
+
+
+def test_read_frame_reuses_index_until_table_is_rewritten(tmp_path):
+    table_dir = str(tmp_path / 'AAA')
+    write_frame(table_dir, make_bars('2024-01-01', '2024-07-01'))
+    first = read_frame(table_dir, '2024-02-01', '2024-03-01')
+    second = read_frame(table_dir, '2024-02-01', '2024-03-01')
+    assert first.index.values.base is not None and first.index.values.base is second.index.values.base
+
+    write_frame(table_dir, make_bars('2024-01-02', '2024-07-01'))
+    assert read_frame(table_dir).index[0] == pd.Timestamp('2024-01-02', tz=TZ)
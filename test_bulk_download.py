@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from stock_analyzer.data.bar_store import _cache_key, read_bars
+from stock_analyzer.data.bulk_download import get_journal_path, read_journal, run_bulk_download
+from stock_analyzer.data.cache_manager import get_cache_dir, remove_cache_entry
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+
+
+def test_journal_is_kept_outside_the_cache(cache_dir):
+    journal = os.path.abspath(get_journal_path())
+    assert not journal.startswith(os.path.abspath(get_cache_dir()) + os.sep)
+
+
+def test_resume_skips_done_symbols(fake_yahoo, tmp_path):
+    journal = str(tmp_path / 'job.journal')
+    first = run_bulk_download(SYMBOLS, '2020-01-01', '2020-03-01', journal, batch_size=2)
+    assert first['done'] == 3 and first['failed'] == 0
+    requests = fake_yahoo.stats.snapshot()['requests']
+
+    second = run_bulk_download(SYMBOLS, '2020-01-01', '2020-03-01', journal, batch_size=2)
+    assert second['skipped'] == 3 and second['done'] == 0 and second['evicted'] == 0
+    assert fake_yahoo.stats.snapshot()['requests'] == requests
+
+
+def test_resume_downloads_symbols_evicted_since(fake_yahoo, tmp_path):
+    journal = str(tmp_path / 'job.journal')
+    run_bulk_download(SYMBOLS, '2020-01-01', '2020-03-01', journal, batch_size=2)
+    assert remove_cache_entry(_cache_key('BBB'))
+    assert read_bars('BBB', '2020-01-01', '2020-03-01') is None
+
+    stats = run_bulk_download(SYMBOLS, '2020-01-01', '2020-03-01', journal, batch_size=2)
+    assert stats['evicted'] == 1 and stats['skipped'] == 2 and stats['done'] == 1
+    assert read_bars('BBB', '2020-01-01', '2020-03-01') is not None
+    _, records = read_journal(journal)
+    assert records['BBB']['status'] == 'done'
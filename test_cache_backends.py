@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import socket
+import time
+import pytest
+from stock_analyzer.data import cache_backends
+from stock_analyzer.data.cache_backends import (
+    DirectoryBackend, MemoryBackend, NetworkBackend, get_local_backend, set_cache_backend
+)
+from stock_analyzer.data.cache_manager import get_cache_entry
+from stock_analyzer.data.fetch_engine import get_engine
+from stock_analyzer.data.kv_server import start_server
+from stock_analyzer.data.metadata_cache import (
+    clear_metadata, get_ticker_info, import_entry, list_cached_symbols, read_cached_entry
+)
+
+
+@pytest.fixture
+def kv_server():
+    server = start_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def blackhole():
+    """A listening socket that accepts connections but never answers."""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(16)
+    yield sock.getsockname()
+    sock.close()
+
+
+@pytest.fixture
+def backend_reset():
+    yield
+    set_cache_backend(None)
+
+
+def test_directory_backend_tracks_entries_in_cache_manifest(cache_dir):
+    backend = DirectoryBackend()
+    backend.set_many({'metadata/AAA.json': b'{}', 'metadata/BBB.json': b'[1]'})
+    assert os.path.exists(os.path.join(cache_dir, 'metadata', 'AAA.json'))
+    assert get_cache_entry('metadata/BBB.json')['size'] == 3
+    assert backend.get_many(['metadata/AAA.json', 'metadata/ZZZ.json']) == {'metadata/AAA.json': b'{}'}
+    assert get_cache_entry('metadata/AAA.json')['hits'] == 1
+    assert backend.keys('metadata/') == ['metadata/AAA.json', 'metadata/BBB.json']
+    backend.delete('metadata/AAA.json')
+    assert backend.get('metadata/AAA.json') is None and get_cache_entry('metadata/AAA.json') is None
+
+
+def test_directory_backend_keeps_keys_inside_its_directory(tmp_path):
+    backend = DirectoryBackend(str(tmp_path / 'entries'))
+    backend.set('../../escape', b'x')
+    assert backend.get('escape') == b'x'
+    assert not os.path.exists(tmp_path.parent / 'escape')
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_bytes=10)
+    backend.set_many({'a': b'1234', 'b': b'1234'})
+    backend.get('a')
+    backend.set('c', b'1234')
+    assert backend.keys('') == ['a', 'c']
+    backend.delete('a')
+    assert backend.get_many(['a', 'b', 'c']) == {'c': b'1234'}
+
+
+def test_metadata_goes_through_memory_backend(cache_dir, backend_reset):
+    set_cache_backend(MemoryBackend())
+    assert get_local_backend().name == "memory"
+    assert import_entry('AAA', {'fetched_at': time.time(), 'info': {'currency': 'USD'}})
+    assert not os.path.exists(os.path.join(cache_dir, 'metadata'))
+    assert list_cached_symbols() == ['AAA']
+    assert read_cached_entry('AAA')['info']['currency'] == 'USD'
+
+
+def test_shared_backend_keeps_local_copy_on_disk(cache_dir, kv_server, backend_reset):
+    shared = NetworkBackend(*kv_server.server_address)
+    set_cache_backend(shared)
+    assert get_local_backend().name == "directory"
+    # Written by another machine
+    shared.set('metadata/AAA.json', json.dumps({'fetched_at': time.time(), 'info': {'currency': 'USD'}}).encode())
+    assert get_ticker_info('AAA')['currency'] == 'USD'
+    assert os.path.exists(os.path.join(cache_dir, 'metadata', 'AAA.json'))
+    clear_metadata()
+    assert list_cached_symbols() == ['AAA']
+
+
+def test_kv_server_round_trip(kv_server):
+    backend = NetworkBackend(*kv_server.server_address)
+    assert backend.ping()
+    backend.set_many({'bars/AAA': b'one', 'bars/BBB': b'', 'meta/AAA': b'\x00' * 100000})
+    assert backend.get_many(['bars/AAA', 'bars/BBB', 'meta/AAA', 'bars/ZZZ']) == {
+        'bars/AAA': b'one', 'bars/BBB': b'', 'meta/AAA': b'\x00' * 100000}
+    backend.delete('bars/AAA')
+    assert backend.get('bars/AAA') is None
+    assert backend.get_many([]) == {}
+
+
+def test_stale_pooled_connection_is_reopened(kv_server):
+    backend = NetworkBackend(*kv_server.server_address)
+    backend.set('k', b'v')
+    backend._local.sock.close()
+    assert backend.get('k') == b'v'
+
+
+def test_dead_server_is_skipped_after_first_timeout(blackhole, monkeypatch):
+    monkeypatch.setattr(cache_backends, 'CIRCUIT_BACKOFF_SECONDS', 0.5)
+    backend = NetworkBackend(*blackhole, timeout=0.3)
+
+    started = time.monotonic()
+    assert backend.get_many(['bars/AAA']) == {}
+    assert 0.25 < time.monotonic() - started < 1.0
+    assert not backend.available()
+
+    started = time.monotonic()
+    for _ in range(20):
+        assert backend.get_many(['bars/AAA']) == {}
+        backend.set('bars/AAA', b'x')
+    assert time.monotonic() - started < 0.1
+
+    # Once the backoff has passed a probe goes out again, and failing doubles the backoff
+    time.sleep(0.6)
+    assert backend.available()
+    backend.get_many(['bars/AAA'])
+    assert backend._backoff == 1.0
+
+
+def test_circuit_closes_when_server_answers_again(kv_server, monkeypatch):
+    monkeypatch.setattr(cache_backends, 'CIRCUIT_BACKOFF_SECONDS', 0.2)
+    backend = NetworkBackend(*kv_server.server_address)
+    backend._failed()
+    assert backend.get('k') is None and not backend.available()
+    time.sleep(0.3)
+    backend.set('k', b'v')
+    assert backend.get('k') == b'v'
+    assert backend.available() and backend._backoff == 0.0
+
+
+def test_requests_stop_at_fetch_deadline(blackhole):
+    backend = NetworkBackend(*blackhole, timeout=5.0)
+    started = time.monotonic()
+    with get_engine().deadline(0.3):
+        assert backend.get_many(['bars/AAA']) == {}
+    assert time.monotonic() - started < 1.0
+    # A deadline running out is not held against the server
+    assert backend.available()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import concurrent.futures
+import threading
+import time
+import pytest
+from stock_analyzer.data import fetch_engine
+from stock_analyzer.data.fetch_engine import (
+    MIN_RATE_PER_SEC, FetchEngine, FetchTimeout, RateLimiter, get_engine, is_transient, set_engine
+)
+from stock_analyzer.data.providers import SymbolNotFound
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def simulate(limiter, clock, upstream_rps, seconds, step=0.01):
+    """
+    Send requests as fast as the limiter allows against an upstream that
+    throttles everything past upstream_rps per one-second window, like
+    fake_yahoo. Returns (sent, throttled) per second.
+    """
+    sent = [0] * seconds
+    throttled = [0] * seconds
+    while clock.now < seconds:
+        second = int(clock.now)
+        while limiter.try_acquire() == 0.0:
+            sent[second] += 1
+            if sent[second] > upstream_rps:
+                throttled[second] += 1
+                limiter.backoff()
+            else:
+                limiter.recover()
+        clock.now += step
+    return sent, throttled
+
+
+def test_rate_limiter_converges_under_upstream_limit():
+    """Starting 5x over the upstream limit, throttling dies down and throughput stays near the limit."""
+    clock = FakeClock()
+    limiter = RateLimiter(50, clock=clock)
+    sent, throttled = simulate(limiter, clock, upstream_rps=10, seconds=120)
+
+    settled_sent = sum(sent[60:])
+    settled_throttled = sum(throttled[60:])
+    assert settled_throttled / settled_sent < 0.05
+    assert settled_sent - settled_throttled > 0.6 * 10 * 60
+    assert MIN_RATE_PER_SEC < limiter.rate < 15
+
+
+def test_rate_limiter_backs_off_once_per_burst():
+    clock = FakeClock()
+    limiter = RateLimiter(16, clock=clock)
+    for _ in range(8):
+        limiter.backoff()
+    assert limiter.rate == 8
+    clock.now += 1.5
+    limiter.backoff()
+    assert limiter.rate == 4
+
+
+def test_rate_limiter_recovers_only_after_clean_window():
+    clock = FakeClock()
+    limiter = RateLimiter(10, clock=clock)
+    limiter.backoff()
+    assert limiter.rate == 5
+    for _ in range(40):
+        clock.now += 0.1
+        limiter.recover()
+    assert limiter.rate == 5
+    for _ in range(30):
+        clock.now += 0.1
+        limiter.recover()
+    assert 5 < limiter.rate <= 5 * 1.1 ** 2 + 1e-9
+    clock.now += 60
+    for _ in range(60):
+        clock.now += 1
+        limiter.recover()
+    assert limiter.rate == 10
+
+
+def test_nested_call_is_scheduled_with_parent_deadline():
+    """A call made inside a call runs as its own engine call, even with every slot taken."""
+    engine = FetchEngine(concurrency=1, rate_per_sec=100)
+    seen = {}
+
+    def inner():
+        seen['thread'] = threading.current_thread().name
+        seen['deadline'] = engine._priority_args()[2]
+        return 'inner'
+
+    with engine.deadline(5):
+        assert engine.call(lambda: engine.call(inner)) == 'inner'
+    assert seen['thread'].startswith('fetch-nested')
+    assert seen['deadline'] is not None
+
+
+def test_nested_call_times_out_with_parent_deadline():
+    engine = FetchEngine(concurrency=2, rate_per_sec=100, max_retries=0)
+    started = time.monotonic()
+    with pytest.raises(FetchTimeout):
+        with engine.deadline(0.3):
+            engine.call(lambda: engine.call(time.sleep, 2))
+    assert time.monotonic() - started < 1.5
+
+
+def test_retries_until_success(monkeypatch):
+    monkeypatch.setattr(fetch_engine, 'RETRY_BASE_DELAY', 0.01)
+    engine = FetchEngine(rate_per_sec=100, max_retries=3)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("connection reset")
+        return 'ok'
+
+    assert engine.call(flaky) == 'ok'
+    assert len(calls) == 3
+
+
+class HTTPError(OSError):
+    """Shaped like the HTTP clients' errors, which carry the response."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type('Response', (), {'status_code': status_code})()
+
+
+@pytest.mark.parametrize('error, transient', [
+    (ConnectionError("connection reset"), True),
+    (TimeoutError("read timed out"), True),
+    (FetchTimeout("too slow"), True),
+    (HTTPError(503), True),
+    (Exception("429 Too Many Requests"), True),
+    (HTTPError(404), False),
+    (FileNotFoundError("bars.csv"), False),
+    (SymbolNotFound("ZZZZ"), False),
+    (ValueError("bad date"), False),
+    (KeyError("Close"), False),
+])
+def test_only_transient_errors_are_retried(monkeypatch, error, transient):
+    monkeypatch.setattr(fetch_engine, 'RETRY_BASE_DELAY', 0.01)
+    engine = FetchEngine(rate_per_sec=100, max_retries=2)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise error
+
+    assert is_transient(error) == transient
+    with pytest.raises(type(error)):
+        engine.call(failing)
+    assert len(calls) == (3 if transient else 1)
+    engine.shutdown()
+
+
+def test_set_engine_shuts_down_previous_engine():
+    previous = FetchEngine(rate_per_sec=100)
+    set_engine(previous)
+    waiting = previous.submit(time.sleep, 1)
+    try:
+        set_engine(FetchEngine(rate_per_sec=100))
+        with pytest.raises(concurrent.futures.CancelledError):
+            waiting.result(timeout=0.5)
+        assert not previous._thread.is_alive() and previous._loop.is_closed()
+        assert get_engine() is not previous and get_engine().call(lambda: 'ok') == 'ok'
+    finally:
+        set_engine(None)
+
+
+def test_abandoned_attempt_stops_at_next_request(monkeypatch):
+    """A timed-out attempt is retried, and the abandoned one is stopped before its next request."""
+    monkeypatch.setattr(fetch_engine, 'RETRY_BASE_DELAY', 0.01)
+    engine = FetchEngine(rate_per_sec=100, timeout=0.2, max_retries=2)
+    calls = []
+    outcome = {}
+    first_done = threading.Event()
+
+    def hangs_once():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            try:
+                engine.before_request()
+                outcome['first'] = 'requested'
+            except FetchTimeout:
+                outcome['first'] = 'stopped'
+            first_done.set()
+            return 'late'
+        return 'ok'
+
+    assert engine.call(hangs_once) == 'ok'
+    assert first_done.wait(2)
+    assert outcome['first'] == 'stopped'
+
+
+def test_token_waits_do_not_count_towards_timeout():
+    engine = FetchEngine(rate_per_sec=5, timeout=0.5, max_retries=0)
+
+    def many_requests():
+        for _ in range(8):
+            engine.before_request()
+        return 'ok'
+
+    started = time.monotonic()
+    assert engine.call(many_requests) == 'ok'
+    assert time.monotonic() - started > 0.5
+
+
+def test_throttled_response_backs_off_rate():
+    engine = FetchEngine(rate_per_sec=8)
+    engine.after_response(200)
+    assert engine.rate == 8
+    engine.after_response(429)
+    assert engine.rate == 4
+
+
+def test_slow_attempt_is_hedged():
+    engine = FetchEngine(rate_per_sec=100, hedge=True, hedge_percentile=95)
+    for _ in range(fetch_engine.MIN_HEDGE_SAMPLES):
+        engine.latency.record(0.02)
+    calls = []
+
+    def slow_first():
+        calls.append(1)
+        if len(calls) == 1:
+            time.sleep(1)
+            return 'primary'
+        return 'hedge'
+
+    assert engine.call(slow_first) == 'hedge'
+    assert engine.hedges_fired == 1 and engine.hedges_won == 1
+
+
+def test_jobs_run_concurrently_and_keep_caller_deadline():
+    engine = FetchEngine(concurrency=4, rate_per_sec=100)
+    deadlines = []
+
+    def job(item):
+        deadlines.append(engine._priority_args()[2])
+        time.sleep(0.2)
+        return item * 2
+
+    started = time.monotonic()
+    with engine.deadline(5):
+        assert engine.map_jobs(job, [1, 2, 3, 4]) == [2, 4, 6, 8]
+    assert time.monotonic() - started < 0.6
+    assert all(deadline is not None for deadline in deadlines)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import datetime
+import gc
+import multiprocessing
+import threading
+import time
+from stock_analyzer.data import bar_store, cache_manager
+from stock_analyzer.data.bar_store import get_bars
+from stock_analyzer.data.cache_manager import cache_lock
+from stock_analyzer.data.file_lock import FileLock
+from test_bar_store import freeze_session, make_bars
+
+WORKERS = 4
+
+
+def hold_lock(path, locked, release):
+    lock = FileLock(path)
+    with lock:
+        locked.set()
+        release.wait(10)
+
+
+def slow_fetch(log_path):
+    def fetch(start, end):
+        with open(log_path, 'a') as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.3)
+        return make_bars(start, end)
+    return fetch
+
+
+def fetch_in_process(cache_dir, log_path, start, results):
+    os.environ['STOCK_ANALYZER_CACHE_DIR'] = cache_dir
+    bar_store.final_bars_end = lambda exchange, now=None: datetime.date(2030, 1, 1)
+    start.wait(10)
+    bars = get_bars('AAA', '2024-01-01', '2024-03-01', slow_fetch(log_path))
+    results.put(len(bars))
+
+
+def test_lock_file_excludes_other_processes(tmp_path):
+    context = multiprocessing.get_context('spawn')
+    path = str(tmp_path / 'locks' / 'AAA.lock')
+    locked, release = context.Event(), context.Event()
+    holder = context.Process(target=hold_lock, args=(path, locked, release))
+    holder.start()
+    try:
+        assert locked.wait(30)
+        lock = FileLock(path)
+        assert not lock.acquire(blocking=False)
+        assert not lock.acquire(timeout=0.2)
+    finally:
+        release.set()
+        holder.join(10)
+    assert lock.acquire(timeout=5)
+    lock.release()
+
+
+def test_only_one_process_fetches_a_missing_range(cache_dir, tmp_path):
+    context = multiprocessing.get_context('spawn')
+    log_path = str(tmp_path / 'fetches.log')
+    start, results = context.Event(), context.Queue()
+    workers = [context.Process(target=fetch_in_process, args=(cache_dir, log_path, start, results))
+               for _ in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    counts = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(10)
+    assert counts == [44] * WORKERS
+    with open(log_path) as f:
+        assert len(f.readlines()) == 1
+
+
+def test_only_one_thread_fetches_a_missing_range(cache_dir, tmp_path, monkeypatch):
+    freeze_session(monkeypatch, datetime.date(2030, 1, 1))
+    log_path = str(tmp_path / 'fetches.log')
+    fetch = slow_fetch(log_path)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_bars('AAA', '2024-01-01', '2024-03-01', fetch)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [len(bars) for bars in results] == [44] * 8
+    with open(log_path) as f:
+        assert len(f.readlines()) == 1
+
+
+def test_unused_locks_are_forgotten(cache_dir):
+    lock = cache_lock('bars/AAA')
+    assert cache_lock('bars/AAA') is lock
+    for i in range(100):
+        with cache_lock(f"bars/TMP{i}"):
+            pass
+    gc.collect()
+    assert set(cache_manager._file_locks.keys()) == {'bars/AAA'}
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+import pandas as pd
+from stock_analyzer.data import fetch_engine
+from stock_analyzer.data.fundamentals import load_fundamentals, refresh_fundamentals
+from stock_analyzer.data.metadata_cache import import_entry, read_cached_entry
+
+WEEK_AGO = time.time() - 6 * 24 * 60 * 60
+
+
+def test_refresh_fetches_again_and_records_fetch_time(fake_yahoo):
+    # Still within the metadata TTL, but a refresh wants today's numbers
+    import_entry('AAA', {'fetched_at': WEEK_AGO, 'info': {'marketCap': 1.0}})
+    before = time.time()
+    summary = refresh_fundamentals(['AAA', 'BBB'])
+    assert summary == {'rows': 2, 'refreshed': 2, 'failed': 0}
+
+    rows = load_fundamentals().query(columns=['market_cap', 'fetched_at'])
+    assert (rows['fetched_at'] >= before).all()
+    assert rows.loc['AAA', 'market_cap'] != 1.0
+    assert read_cached_entry('AAA')['fetched_at'] >= before
+
+
+def test_refresh_with_max_age_keeps_cached_fetch_time(fake_yahoo):
+    import_entry('AAA', {'fetched_at': WEEK_AGO, 'info': {'marketCap': 1.0}})
+    requests = fake_yahoo.stats.snapshot()['requests']
+    refresh_fundamentals(['AAA'], max_age=7 * 24 * 60 * 60)
+    assert fake_yahoo.stats.snapshot()['requests'] == requests
+
+    rows = load_fundamentals().query(columns=['market_cap', 'fetched_at'])
+    assert rows.loc['AAA', 'market_cap'] == 1.0
+    assert rows.loc['AAA', 'fetched_at'] == WEEK_AGO
+
+
+def test_failed_lookups_keep_previous_row(fake_yahoo, monkeypatch):
+    monkeypatch.setattr(fetch_engine, 'RETRY_BASE_DELAY', 0.01)
+    refresh_fundamentals(['AAA', 'BBB'])
+    before = load_fundamentals().query(columns=['market_cap', 'fetched_at'])
+
+    fake_yahoo.settings.error_rate = 1.0
+    assert refresh_fundamentals(['AAA']) == {'rows': 2, 'refreshed': 0, 'failed': 1}
+    # An empty entry that made it into the metadata cache counts as failed too
+    import_entry('BBB', {'fetched_at': time.time(), 'info': {}})
+    assert refresh_fundamentals(['BBB'], max_age=3600) == {'rows': 2, 'refreshed': 0, 'failed': 1}
+
+    after = load_fundamentals().query(columns=['market_cap', 'fetched_at'])
+    pd.testing.assert_frame_equal(after, before)
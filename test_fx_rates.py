@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import pytest
+from stock_analyzer.data import fx_rates
+from stock_analyzer.data.fx_rates import clear_rates, convert_ohlc, get_cross_rates
+from stock_analyzer.data.providers import DataProvider, set_provider
+
+DAYS = pd.bdate_range('2024-03-01', '2024-03-29')
+
+
+class FxProvider(DataProvider):
+    """Serves fixed units-per-USD series and counts the requests."""
+
+    name = "test-fx"
+
+    def __init__(self, rates):
+        self.rates = rates
+        self.requests = []
+
+    def fx_history(self, currencies, start_date):
+        self.requests.append(list(currencies))
+        return {currency: self.rates[currency] for currency in currencies if currency in self.rates}
+
+
+@pytest.fixture
+def fx(cache_dir):
+    provider = FxProvider({
+        'INR': pd.Series(np.linspace(80.0, 84.0, len(DAYS)), index=DAYS),
+        'EUR': pd.Series(np.linspace(0.90, 0.94, len(DAYS)), index=DAYS),
+    })
+    clear_rates()
+    set_provider(provider)
+    yield provider
+    set_provider(None)
+    clear_rates()
+
+
+def daily_bars(close=100.0):
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1.0},
+                        index=DAYS[5:15].tz_localize('Asia/Kolkata'))
+
+
+def intraday_bars(day_count=3, tz='Asia/Kolkata'):
+    """5m bars over several sessions, so each day appears many times in the index."""
+    index = pd.DatetimeIndex([])
+    for day in DAYS[5:5 + day_count]:
+        index = index.append(pd.date_range(day + pd.Timedelta(hours=9, minutes=15), periods=75, freq='5min'))
+    index = index.tz_localize(tz)
+    close = np.full(len(index), 100.0)
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                         'Volume': np.ones(len(index))}, index=index)
+
+
+def test_converts_intraday_bars_with_each_day_repeated(fx):
+    df = intraday_bars()
+    converted = convert_ohlc(df, 'INR', 'USD')
+    assert converted.index.equals(df.index)
+    for day, bars in converted.groupby(converted.index.date):
+        rate = fx.rates['INR'][pd.Timestamp(day)]
+        np.testing.assert_allclose(bars['Close'].values, 100.0 / rate)
+    # Volume is not a price
+    assert (converted['Volume'] == 1).all()
+
+
+def test_converts_directly_against_usd(fx):
+    converted = convert_ohlc(daily_bars(), 'USD', 'INR')
+    np.testing.assert_allclose(converted['Close'].values, 100.0 * fx.rates['INR'].values[5:15])
+    assert fx.requests == [['INR']]
+
+
+def test_triangulates_through_usd(fx):
+    rates = get_cross_rates('EUR', 'INR', daily_bars().index)
+    expected = fx.rates['INR'].values[5:15] / fx.rates['EUR'].values[5:15]
+    np.testing.assert_allclose(rates.values, expected)
+    # Both legs come from one bulk request
+    assert fx.requests == [['EUR', 'INR']]
+
+
+def test_minor_units_are_scaled(fx):
+    fx.rates['GBP'] = pd.Series(0.8, index=DAYS)
+    converted = convert_ohlc(daily_bars(1000.0), 'GBp', 'USD')
+    np.testing.assert_allclose(converted['Close'].values, 10.0 / 0.8)
+
+
+def test_failed_currency_is_not_requested_again_right_away(fx, monkeypatch):
+    df = daily_bars()
+    for _ in range(3):
+        assert convert_ohlc(df, 'XYZ', 'USD') is df
+    assert fx.requests == [['XYZ']]
+
+    # Asked for again once the retry interval has passed
+    monkeypatch.setattr(fx_rates, 'FAILED_CURRENCY_RETRY_SECONDS', 0)
+    fx.rates['XYZ'] = pd.Series(2.0, index=DAYS)
+    np.testing.assert_allclose(convert_ohlc(df, 'XYZ', 'USD')['Close'].values, 50.0)
+    assert fx.requests == [['XYZ'], ['XYZ']]
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from stock_analyzer.data import fetch_engine
+from stock_analyzer.data.metadata_cache import clear_metadata, get_ticker_info, read_cached_entry
+from stock_analyzer.data.providers import DataProvider, set_provider
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(fetch_engine, 'RETRY_BASE_DELAY', 0.01)
+
+
+class EmptyInfoProvider(DataProvider):
+    """Answers every lookup with the empty info yfinance gives when Yahoo has nothing."""
+
+    name = "empty"
+
+    def info(self, symbol):
+        return {'trailingPegRatio': None}
+
+
+def test_info_is_cached(fake_yahoo):
+    info = get_ticker_info('TSLA')
+    assert info['currency'] == 'USD' and info['regularMarketPrice'] is not None
+    requests = fake_yahoo.stats.snapshot()['requests']
+    clear_metadata()
+    assert get_ticker_info('TSLA') == info
+    assert fake_yahoo.stats.snapshot()['requests'] == requests
+
+
+def test_failed_lookup_is_not_stored(fake_yahoo):
+    fake_yahoo.settings.error_rate = 1.0
+    assert get_ticker_info('TSLA') is None
+    assert read_cached_entry('TSLA') is None
+
+    fake_yahoo.settings.error_rate = 0.0
+    assert get_ticker_info('TSLA')['currency'] == 'USD'
+
+
+def test_empty_answer_is_not_stored(cache_dir):
+    set_provider(EmptyInfoProvider())
+    try:
+        assert get_ticker_info('TSLA') is None
+        assert read_cached_entry('TSLA') is None
+    finally:
+        set_provider(None)
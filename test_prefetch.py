@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import threading
+import time
+from unittest import mock
+import pytest
+from stock_analyzer.data import prefetch
+from stock_analyzer.data.bar_store import has_bars
+from stock_analyzer.data.fetch_engine import get_engine
+from stock_analyzer.data.metadata_cache import read_cached_entry
+from stock_analyzer.data.prefetch import (
+    cancel_speculative_prefetch, get_watchlist, start_speculative_prefetch, start_watchlist_prefetch
+)
+from stock_analyzer.gui import main_window
+from stock_analyzer.gui.main_window import MainWindow
+from test_bar_store import make_bars
+
+
+@pytest.fixture
+def watchlist(monkeypatch):
+    """Call with a 'watchlist' config value to use it."""
+    def use(value):
+        monkeypatch.setattr(prefetch, 'load_config', lambda: {'watchlist': value})
+    return use
+
+
+@pytest.fixture
+def foreground_call():
+    """Start a foreground engine call that stays in flight until the returned event is set."""
+    release = threading.Event()
+    threads = []
+
+    def start():
+        thread = threading.Thread(target=get_engine().call, args=(release.wait, 5))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.1)
+        return release
+    yield start
+    release.set()
+    for thread in threads:
+        thread.join()
+
+
+def requests(server):
+    return server.stats.snapshot()['requests']
+
+
+def test_watchlist_is_upper_cased_and_deduplicated(watchlist):
+    watchlist(' aapl, msft,AAPL,')
+    assert get_watchlist() == ['AAPL', 'MSFT']
+    watchlist(['tcs.ns', 'TCS.NS', ''])
+    assert get_watchlist() == ['TCS.NS']
+
+
+def test_empty_watchlist_schedules_nothing(watchlist):
+    watchlist([])
+    assert start_watchlist_prefetch() is None
+
+
+def test_watchlist_prefetch_warms_bars_and_metadata(fake_yahoo, watchlist):
+    watchlist(['AAPL', 'TCS.NS'])
+    start, end = prefetch._prefetch_range()
+    start_watchlist_prefetch().result(timeout=60)
+    for symbol in ('AAPL', 'TCS.NS'):
+        assert has_bars(symbol, start, start)
+        assert read_cached_entry(symbol) is not None
+
+
+def test_watchlist_prefetch_waits_for_foreground_calls(fake_yahoo, watchlist, foreground_call):
+    watchlist(['AAPL'])
+    release = foreground_call()
+    before = requests(fake_yahoo)
+    future = start_watchlist_prefetch()
+    time.sleep(0.5)
+    assert requests(fake_yahoo) == before and not future.done()
+
+    release.set()
+    future.result(timeout=60)
+    assert requests(fake_yahoo) > before
+
+
+def test_speculative_prefetch_is_cancelled_by_foreground_call(fake_yahoo, foreground_call):
+    start, end = prefetch._prefetch_range()
+    foreground_call()
+    before = requests(fake_yahoo)
+    future = start_speculative_prefetch('AAPL')
+    time.sleep(0.3)
+    assert not future.done()
+
+    # A new foreground call cancels the waiting speculation outright
+    assert get_engine().call(lambda: 'ok') == 'ok'
+    future.result(timeout=2)
+    assert requests(fake_yahoo) == before
+    assert not has_bars('AAPL', start, start)
+
+
+def test_speculative_prefetch_fetches_longest_range(fake_yahoo):
+    start, end = prefetch._prefetch_range()
+    start_speculative_prefetch('AAPL').result(timeout=60)
+    assert has_bars('AAPL', start, start)
+
+
+def test_new_speculation_cancels_the_previous_one(monkeypatch):
+    events = []
+    monkeypatch.setattr(prefetch, '_speculate', lambda symbol, cancel: events.append(cancel))
+    start_speculative_prefetch('AAPL').result(timeout=5)
+    start_speculative_prefetch('MSFT').result(timeout=5)
+    assert events[0].is_set() and not events[1].is_set()
+    cancel_speculative_prefetch()
+    assert events[1].is_set()
+
+
+def test_main_window_cancels_speculation_before_analyzing(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main_window, 'cancel_speculative_prefetch', lambda: calls.append('cancel'))
+    window = mock.MagicMock()
+    window.symbol_var.get.return_value = ''
+    MainWindow.on_analyze(window)
+    assert calls == ['cancel']
+
+
+def test_main_window_speculates_after_showing_results(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main_window, 'start_speculative_prefetch', calls.append)
+    monkeypatch.setattr(main_window, 'get_company_name', lambda symbol: symbol)
+    window = mock.MagicMock()
+    window.current_currency = 'USD'
+
+    MainWindow._update_ui_after_fetch(window, 'AAPL', None, '2024-07-01')
+    assert calls == []
+    MainWindow._update_ui_after_fetch(window, 'AAPL', make_bars('2024-01-01', '2024-07-01'), '2024-07-01')
+    assert calls == ['AAPL']
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import pytest
+from benchmark_resample import PANDAS_AGG, RULES
+from stock_analyzer.data.resample import parse_rule, resample_ohlcv
+
+
+def minute_bars(start='2024-02-26', end='2024-04-05'):
+    """1m bars for New York sessions across the March DST change."""
+    days = pd.bdate_range(start, end)
+    minutes = np.arange(390) + 9 * 60 + 30
+    local = np.repeat(days.values.astype('datetime64[ns]'), len(minutes)) + \
+        np.tile(minutes, len(days)).astype('timedelta64[m]')
+    index = pd.DatetimeIndex(local).tz_localize('America/New_York')
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(index))))
+    return pd.DataFrame({'Open': close * 1.0001, 'High': close * 1.001, 'Low': close * 0.999, 'Close': close,
+                         'Volume': rng.integers(1, 1000, len(index)).astype(float)}, index=index)
+
+
+@pytest.mark.parametrize('rule, pandas_rule', RULES)
+def test_matches_pandas_resample(rule, pandas_rule):
+    df = minute_bars()
+    ours = resample_ohlcv(df, rule)
+    theirs = df.resample(pandas_rule, label='left', closed='left').agg(PANDAS_AGG).dropna()
+    assert (ours.index == theirs.index).all()
+    np.testing.assert_allclose(ours.values, theirs.values)
+
+
+def test_label_last_stamps_buckets_with_their_last_bar():
+    df = minute_bars()
+    daily = resample_ohlcv(df, 'D', label='last')
+    assert (daily.index.time == pd.Timestamp('15:59').time()).all()
+    weekly = resample_ohlcv(daily, 'W', label='last')
+    assert (weekly.index.dayofweek == 4).all()
+    assert weekly['Volume'].sum() == df['Volume'].sum()
+
+
+def test_bars_without_close_are_dropped():
+    df = minute_bars('2024-03-04', '2024-03-04')
+    df.iloc[:30, df.columns.get_loc('Close')] = np.nan
+    hourly = resample_ohlcv(df, '1h')
+    assert hourly.index[0] == pd.Timestamp('2024-03-04 10:00', tz='America/New_York')
+    assert hourly['Open'].iloc[0] == df['Open'].iloc[30]
+
+
+@pytest.mark.parametrize('rule', ['', '0min', '5s', '1Y', 'min5'])
+def test_unsupported_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        parse_rule(rule)
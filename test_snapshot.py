@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import datetime
+import hashlib
+import io
+import json
+import tarfile
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from stock_analyzer.data import bar_store, cache_manager
+from stock_analyzer.data.bar_store import list_symbols, read_bars, store_bars
+from stock_analyzer.data.metadata_cache import clear_metadata, import_entry, read_cached_entry
+from stock_analyzer.data.snapshot import MANIFEST_NAME, SNAPSHOT_FORMAT, export_snapshot, import_snapshot
+
+
+def use_cache(monkeypatch, path):
+    """Switch this process to another cache directory, like moving to another machine."""
+    cache_manager._close_manifest()
+    bar_store.clear_memory_tier()
+    clear_metadata()
+    monkeypatch.setenv('STOCK_ANALYZER_CACHE_DIR', str(path))
+
+
+@pytest.fixture
+def exported(cache_dir, tmp_path, monkeypatch):
+    """A bundle with bars for AAA and BBB and metadata for AAA; the cache is then switched to an empty one."""
+    monkeypatch.setattr(bar_store, 'final_bars_end', lambda exchange, now=None: datetime.date(2030, 1, 1))
+    index = pd.date_range('2024-01-01', '2024-02-29', freq='B', tz='America/New_York').as_unit('ns')
+    close = np.linspace(100, 120, len(index))
+    for symbol in ('AAA', 'BBB'):
+        df = pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                           'Volume': np.full(len(index), 1000.0)}, index=index)
+        store_bars(symbol, df, '2024-01-01', '2024-03-01')
+    import_entry('AAA', {'fetched_at': time.time(), 'info': {'currency': 'USD'}})
+    bundle = str(tmp_path / 'bundle.tar.gz')
+    assert export_snapshot(bundle)['bars'] == 2
+    use_cache(monkeypatch, tmp_path / 'other')
+    return bundle
+
+
+def write_bundle(path, members, manifest_files=None):
+    """Write a bundle from (name, data) pairs, checksummed unless manifest_files overrides it."""
+    checksums = {name: {'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)} for name, data in members}
+    manifest = json.dumps({'format': SNAPSHOT_FORMAT, 'files': manifest_files or checksums}).encode('utf-8')
+    with tarfile.open(path, 'w:gz') as tar:
+        for name, data in list(members) + [(MANIFEST_NAME, manifest)]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def test_round_trip_into_another_cache(exported):
+    assert import_snapshot(exported) == {'bars': 2, 'metadata': 1}
+    assert list_symbols() == ['AAA', 'BBB']
+    assert len(read_bars('AAA', '2024-01-01', '2024-03-01')) == 44
+    assert read_cached_entry('AAA')['info']['currency'] == 'USD'
+
+
+def test_symbols_with_ampersand_round_trip(cache_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, 'final_bars_end', lambda exchange, now=None: datetime.date(2030, 1, 1))
+    index = pd.date_range('2024-01-01', '2024-01-31', freq='B', tz='Asia/Kolkata').as_unit('ns')
+    close = np.linspace(1500, 1600, len(index))
+    df = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close,
+                       'Volume': np.full(len(index), 1000.0)}, index=index)
+    store_bars('M&M.NS', df, '2024-01-01', '2024-02-01')
+    import_entry('M&M.NS', {'fetched_at': time.time(), 'info': {'currency': 'INR'}})
+    bundle = str(tmp_path / 'bundle.tar.gz')
+    export_snapshot(bundle)
+    use_cache(monkeypatch, tmp_path / 'other')
+
+    assert import_snapshot(bundle) == {'bars': 1, 'metadata': 1}
+    assert list_symbols() == ['M&M.NS']
+    assert read_cached_entry('M&M.NS')['info']['currency'] == 'INR'
+
+
+def test_tampered_member_fails_checksum_and_imports_nothing(exported, tmp_path):
+    members = []
+    with tarfile.open(exported, 'r:gz') as tar:
+        for member in tar:
+            data = tar.extractfile(member).read()
+            if member.name == MANIFEST_NAME:
+                manifest = json.loads(data)
+            else:
+                members.append((member.name, data))
+    name, data = members[0]
+    members[0] = (name, data[:-1] + bytes([data[-1] ^ 1]))
+    tampered = str(tmp_path / 'tampered.tar.gz')
+    write_bundle(tampered, members, manifest['files'])
+
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        import_snapshot(tampered)
+    assert list_symbols() == []
+
+
+@pytest.mark.parametrize('name', ['../escape.json', 'bars/AAA/../../escape', '/etc/passwd',
+                                  'metadata/AAA.txt', 'bars/AAA', 'other/AAA.json'])
+def test_unexpected_member_names_are_rejected(cache_dir, tmp_path, name):
+    bundle = str(tmp_path / 'bad.tar.gz')
+    write_bundle(bundle, [(name, b'{}')])
+    with pytest.raises(ValueError, match="Unexpected member"):
+        import_snapshot(bundle)
+    assert not os.path.exists(tmp_path / 'escape.json')
+    assert list_symbols() == []
+
+
+def test_links_are_rejected(cache_dir, tmp_path):
+    bundle = str(tmp_path / 'link.tar.gz')
+    with tarfile.open(bundle, 'w:gz') as tar:
+        info = tarfile.TarInfo('metadata/AAA.json')
+        info.type = tarfile.SYMTYPE
+        info.linkname = '/etc/passwd'
+        tar.addfile(info)
+    with pytest.raises(ValueError, match="Unexpected member"):
+        import_snapshot(bundle)
+
+
+def test_truncated_bundle_is_rejected(exported, tmp_path):
+    with open(exported, 'rb') as f:
+        data = f.read()
+    truncated = str(tmp_path / 'truncated.tar.gz')
+    with open(truncated, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    with pytest.raises(ValueError):
+        import_snapshot(truncated)
+    assert list_symbols() == []
+
+
+def test_newer_local_metadata_is_kept(exported):
+    import_entry('AAA', {'fetched_at': time.time() + 60, 'info': {'currency': 'EUR'}})
+    assert import_snapshot(exported)['metadata'] == 0
+    assert read_cached_entry('AAA')['info']['currency'] == 'EUR'
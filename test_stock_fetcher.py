@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import time
+from stock_analyzer.data.metadata_cache import import_entry
+from stock_analyzer.data.providers import get_provider
+from stock_analyzer.data.stock_fetcher import fetch_many, fetch_native_data
+
+
+def test_history_many_reports_yfinance_failure_reasons(fake_yahoo):
+    fake_yahoo.settings.error_rate = 1.0
+    frames, errors = get_provider().history_many(['FAIL1', 'FAIL2.L'], '2020-01-01', '2020-03-01')
+    assert frames == {}
+    assert set(errors) == {'FAIL1', 'FAIL2.L'}
+    # yfinance's own reason (which step failed varies), not the generic fallback
+    for reason in errors.values():
+        assert reason and reason != "No data returned"
+
+
+def test_history_many_without_bars_reports_no_data(fake_yahoo):
+    frames, errors = get_provider().history_many(['OLD1'], '1990-01-01', '1990-03-01')
+    assert frames == {} and errors == {'OLD1': "No data returned"}
+
+
+def test_fetch_many_uses_same_currency_as_single_fetch(fake_yahoo):
+    # The suffix table says USD; the ticker's own metadata says EUR and wins in both paths
+    import_entry('EURO1', {'fetched_at': time.time(), 'info': {'currency': 'EUR'}})
+    native, currency = fetch_native_data('EURO1', '2020-01-01', '2020-03-01')
+    assert currency == 'EUR'
+    data, failures = fetch_many(['EURO1'], '2020-01-01', '2020-03-01', currency='EUR')
+    assert failures == {}
+    assert (data['EURO1']['Close'].values == native['Close'].values).all()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from stock_analyzer.data.fake_yahoo import _currency_of
+from stock_analyzer.data.market_hours import exchange_for_symbol
+from stock_analyzer.data.stock_fetcher import get_exchange_for_symbol, get_native_currency, normalize_symbol
+from stock_analyzer.data.symbol_registry import (
+    EXCHANGE_CURRENCIES, EXCHANGE_SUFFIXES, SymbolEntry, SymbolRegistry, load_registry
+)
+
+
+@pytest.fixture
+def registry():
+    return SymbolRegistry([
+        SymbolEntry('AAPL', 'NASDAQ', 'Apple Inc.', ''),
+        SymbolEntry('AMAT', 'NASDAQ', 'Applied Materials Inc.', ''),
+        SymbolEntry('APP', 'NASDAQ', 'AppLovin Corporation', ''),
+        SymbolEntry('RELIANCE', 'NSE', 'Reliance Industries Limited', '.NS'),
+        SymbolEntry('M&M', 'NSE', 'Mahindra & Mahindra Limited', '.NS'),
+        SymbolEntry('AAPL', 'NYSE', 'Duplicate', ''),
+    ])
+
+
+def test_lookup_is_case_insensitive_and_first_entry_wins(registry):
+    assert registry.lookup(' aapl ').exchange == 'NASDAQ'
+    assert registry.lookup('M&M').suffix == '.NS'
+    assert registry.lookup('MSFT') is None
+    assert registry.symbols_for_exchange('NASDAQ') == ['AAPL', 'AMAT', 'APP']
+
+
+def test_suggest_puts_exact_ticker_first_then_shortest_completions(registry):
+    assert [e.symbol for e in registry.suggest('app')] == ['APP', 'AAPL', 'AMAT']
+    assert [e.symbol for e in registry.suggest('app', limit=2)] == ['APP', 'AAPL']
+
+
+def test_suggest_matches_name_words(registry):
+    assert [e.symbol for e in registry.suggest('industries')] == ['RELIANCE']
+    assert [e.symbol for e in registry.suggest('mahindra')] == ['M&M']
+    assert registry.suggest('zzz') == [] and registry.suggest('  ') == []
+
+
+def test_load_registry_skips_unknown_exchanges(tmp_path):
+    path = tmp_path / 'symbols.csv'
+    path.write_text("symbol,exchange,name\n7203,tse,Toyota Motor\nFOO,OTC,Foo\n,NYSE,Nothing\n", encoding='utf-8')
+    registry = load_registry(str(path))
+    assert [e.symbol for e in registry.entries] == ['7203']
+    assert registry.lookup('7203') == SymbolEntry('7203', 'TSE', 'Toyota Motor', '.T')
+
+
+@pytest.mark.parametrize('exchange', sorted(EXCHANGE_SUFFIXES))
+def test_suffix_tables_agree_with_registry(exchange):
+    suffix = EXCHANGE_SUFFIXES[exchange]
+    symbol = f"TEST{suffix}"
+    expected_exchange = exchange if suffix else 'NYSE'
+    assert get_exchange_for_symbol(symbol) == expected_exchange
+    assert exchange_for_symbol(symbol) == expected_exchange
+    assert get_native_currency(symbol) == EXCHANGE_CURRENCIES[exchange]
+    assert _currency_of(symbol) == EXCHANGE_CURRENCIES[exchange]
+    assert normalize_symbol(symbol.lower()) == symbol
+
+
+def test_bare_symbols_take_their_registry_exchange():
+    assert get_exchange_for_symbol('reliance') == 'NSE'
+    assert normalize_symbol('reliance') == 'RELIANCE.NS'
+    assert get_native_currency('RELIANCE') == 'INR'
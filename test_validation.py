@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from stock_analyzer.data import fetch_engine
+from stock_analyzer.data.stock_fetcher import validate_symbols
+from stock_analyzer.data.validation_cache import get_cached_results
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(fetch_engine, 'RETRY_BASE_DELAY', 0.01)
+
+
+def test_listed_symbols_are_valid_and_cached(fake_yahoo):
+    assert validate_symbols(['AAPL', 'msft']) == {'AAPL': True, 'msft': True}
+    assert get_cached_results(['AAPL', 'MSFT']) == {'AAPL': True, 'MSFT': True}
+    requests = fake_yahoo.stats.snapshot()['requests']
+    assert validate_symbols(['AAPL']) == {'AAPL': True}
+    assert fake_yahoo.stats.snapshot()['requests'] == requests
+
+
+def test_unknown_symbols_are_invalid_and_cached(fake_yahoo):
+    fake_yahoo.settings.unknown_symbols = {'NOPE1'}
+    assert validate_symbols(['NOPE1', 'AAPL']) == {'NOPE1': False, 'AAPL': True}
+    assert get_cached_results(['NOPE1']) == {'NOPE1': False}
+
+
+def test_upstream_errors_are_not_cached_as_invalid(fake_yahoo):
+    fake_yahoo.settings.error_rate = 1.0
+    assert validate_symbols(['AAPL', 'MSFT']) == {'AAPL': False, 'MSFT': False}
+    assert get_cached_results(['AAPL', 'MSFT']) == {}
+
+    # Once the outage is over the symbols resolve
+    fake_yahoo.settings.error_rate = 0.0
+    assert validate_symbols(['AAPL', 'MSFT']) == {'AAPL': True, 'MSFT': True}
+
+
+def test_throttled_lookups_are_not_cached(fake_yahoo):
+    fake_yahoo.settings.max_rps = 0.001
+    assert validate_symbols(['AAPL']) == {'AAPL': False}
+    assert get_cached_results(['AAPL']) == {}